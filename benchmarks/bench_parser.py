@@ -0,0 +1,109 @@
+# benchmarks/bench_parser.py
+"""
+Micro-benchmark parser dokumen deployment: implementasi lama vs sekarang.
+
+    python -m benchmarks.bench_parser                       # level teks
+    python -m benchmarks.bench_parser --services 2000 --pdf # + level PDF (pdfplumber)
+
+Output kedua implementasi dibandingkan dulu; benchmark gagal jika hasilnya berbeda.
+Baris `pool` di level PDF adalah jalur deployment_parse sebenarnya (_extract_document lewat process pool,
+termasuk pemecahan per halaman); peak memory-nya hanya milik proses utama.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Callable, Dict
+
+from benchmarks.corpus import generate_pages, write_pdf
+from benchmarks.legacy_parser import legacy_extract_pdf, legacy_parse_pages
+
+
+def _normalize(result: Dict[str, Any]) -> Dict[str, Any]:
+    # Urutan global_json_updates berasal dari set(), jadi dibandingkan sebagai himpunan
+    return {**result, "global_json_updates": sorted(result["global_json_updates"])}
+
+
+def _measure(fn: Callable[[], Dict[str, Any]], repeat: int) -> Dict[str, float]:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"median_s": statistics.median(timings), "best_s": min(timings), "peak_kib": peak / 1024}
+
+
+def _report(label: str, blocks: int, stats: Dict[str, float]):
+    rate = blocks / stats["median_s"] if stats["median_s"] else float("inf")
+    print(
+        f"  {label:<8} median {stats['median_s'] * 1000:9.2f} ms | best {stats['best_s'] * 1000:9.2f} ms | "
+        f"{rate:12.0f} blocks/s | peak {stats['peak_kib']:10.1f} KiB"
+    )
+
+
+def bench_text(services: int, seed: int, repeat: int):
+    from modules.deployment_parser.parser import parse_pages
+
+    pages = generate_pages(services, seed=seed)
+    legacy = legacy_parse_pages(pages)
+    current = parse_pages(pages)
+    if _normalize(legacy) != _normalize(current):
+        raise SystemExit("Output mismatch between legacy and current text parser!")
+
+    blocks = len(current["services"])
+    print(f"[text] {services} services, {len(pages)} pages, {blocks} parsed blocks")
+    _report("legacy", blocks, _measure(lambda: legacy_parse_pages(pages), repeat))
+    _report("current", blocks, _measure(lambda: parse_pages(pages), repeat))
+
+
+def bench_pdf(services: int, seed: int, repeat: int):
+    from modules.deployment_parser.tasks import _extract_data_sync, _extract_document
+    from modules.deployment_parser.worker_pool import get_extraction_pool
+
+    with tempfile.TemporaryDirectory() as tmp:
+        pdf_path = os.path.join(tmp, "bench.pdf")
+        write_pdf(generate_pages(services, seed=seed), pdf_path)
+
+        legacy = legacy_extract_pdf(pdf_path)
+        current = _extract_data_sync(pdf_path)
+        if _normalize(legacy) != _normalize(current):
+            raise SystemExit("Output mismatch between legacy and current PDF extraction!")
+
+        blocks = len(current["services"])
+        print(f"[pdf]  {services} services, {os.path.getsize(pdf_path) // 1024} KiB PDF, {blocks} parsed blocks")
+        _report("legacy", blocks, _measure(lambda: legacy_extract_pdf(pdf_path), repeat))
+        _report("current", blocks, _measure(lambda: _extract_data_sync(pdf_path), repeat))
+
+        pool = get_extraction_pool()
+        loop = asyncio.new_event_loop()
+        try:
+            loop.run_until_complete(pool.start())  # Spawn worker tidak ikut terukur
+            _report("pool", blocks, _measure(lambda: loop.run_until_complete(_extract_document(pdf_path)), repeat))
+        finally:
+            pool.shutdown()
+            loop.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--services", type=int, default=5000, help="Jumlah block service di korpus sintetis")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--pdf", action="store_true", help="Ikut benchmark ekstraksi PDF end-to-end (lambat)")
+    args = parser.parse_args()
+
+    bench_text(args.services, args.seed, args.repeat)
+    if args.pdf:
+        bench_pdf(max(1, args.services // 10), args.seed, max(1, args.repeat // 2))
+
+
+if __name__ == "__main__":
+    main()
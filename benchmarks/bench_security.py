@@ -0,0 +1,70 @@
+# benchmarks/bench_security.py
+"""
+Micro-benchmark dekripsi payload: implementasi lama (AESGCM baru + json tiap call) vs PayloadCipher.
+
+    python -m benchmarks.bench_security
+    python -m benchmarks.bench_security --size 20000 --previous-keys 2
+"""
+import argparse
+import base64
+import json
+import os
+import time
+
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+
+from core.security import PayloadCipher, _json_backend
+
+
+def legacy_decrypt(encrypted_base64: str, key_setting: str):
+    # Salinan decrypt_payload lama, termasuk decode key dari setting di tiap call
+    raw_data = base64.b64decode(encrypted_base64)
+    iv, tag, ciphertext = raw_data[:12], raw_data[12:28], raw_data[28:]
+    key = base64.b64decode(key_setting[7:])
+    return json.loads(AESGCM(key).decrypt(iv, ciphertext + tag, None).decode("utf-8"))
+
+
+def _payload(size: int):
+    cert = "A" * size
+    return {"task": "ssl_deploy", "log_id": 1, "data": {"domain_name": "example.test", "new_cert_content": cert}}
+
+
+def _rate(fn, seconds: float) -> float:
+    count, deadline = 0, time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        for _ in range(100):
+            fn()
+        count += 100
+    return count / seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=int, default=4000, help="Ukuran isi sertifikat di payload (byte)")
+    parser.add_argument("--seconds", type=float, default=2.0, help="Lama tiap pengukuran")
+    parser.add_argument("--previous-keys", type=int, default=0,
+                        help="Payload dienkripsi dengan key lama ke-N (uji jalur rotasi)")
+    args = parser.parse_args()
+
+    keys = [os.urandom(32) for _ in range(args.previous_keys + 1)]
+    sender_key = keys[-1]
+    key_setting = "base64:" + base64.b64encode(sender_key).decode()
+    encrypted = PayloadCipher([sender_key]).encrypt(_payload(args.size))
+    print(f"payload {len(encrypted)} bytes base64, {len(keys)} active key(s), sender uses key #{len(keys) - 1}")
+
+    candidates = {"legacy": lambda: legacy_decrypt(encrypted, key_setting)}
+    for backend in ("json", "auto"):
+        cipher = PayloadCipher(keys, _json_backend(backend))
+        if cipher.decrypt(encrypted) != legacy_decrypt(encrypted, key_setting):
+            raise SystemExit(f"Output mismatch for backend {backend}!")
+        candidates[f"cached/{backend}"] = lambda c=cipher: c.decrypt(encrypted)
+
+    baseline = None
+    for label, fn in candidates.items():
+        rate = _rate(fn, args.seconds)
+        baseline = baseline or rate
+        print(f"  {label:<12} {rate:12.0f} decrypts/s  ({rate / baseline:4.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+# benchmarks/bench_service_index.py
+"""
+Latency query index service (SQLite) vs menjawab pertanyaan yang sama dengan parsing ulang.
+
+    python -m benchmarks.bench_service_index
+    python -m benchmarks.bench_service_index --documents 5000 --services 80
+"""
+import argparse
+import hashlib
+import os
+import statistics
+import tempfile
+import time
+
+from benchmarks.corpus import generate_pages
+from modules.deployment_parser.index import ServiceIndex
+from modules.deployment_parser.parser import PARSER_VERSION, parse_pages
+
+
+def _timed(fn, repeat: int):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--documents", type=int, default=2000)
+    parser.add_argument("--services", type=int, default=50, help="Service per dokumen")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="tiara-index-") as tmp:
+        index = ServiceIndex(os.path.join(tmp, "services.sqlite3"))
+
+        # Korpus: variasi dokumen dari beberapa seed (teks, tanpa ekstraksi PDF)
+        corpus = [generate_pages(args.services, seed=seed) for seed in range(20)]
+        start = time.perf_counter()
+        for i in range(args.documents):
+            result = parse_pages(corpus[i % len(corpus)])
+            index.add_document(hashlib.sha256(str(i).encode()).hexdigest(), result, log_id=i,
+                               parser_version=PARSER_VERSION)
+        elapsed = time.perf_counter() - start
+        total = args.documents * args.services
+        print(f"indexed {args.documents} documents / ~{total} services in {elapsed:.1f}s "
+              f"(parse + insert, {elapsed / args.documents * 1000:.2f} ms/doc)")
+
+        sample = index.query(limit=1)["items"][0]
+        modul, tenant = sample["modul"], sample["tenant"]
+        queries = {
+            f"modul={modul}": lambda: index.query(modul=modul, limit=50),
+            f"tenant+modul": lambda: index.query(tenant=tenant, modul=modul, limit=50),
+            f"modul, version 2.0-3.20": lambda: index.query(modul=modul, version_min="2.0", version_max="3.20", limit=50),
+            f"tenants for modul+range": lambda: index.tenants(modul=modul, version_min="2.0", version_max="3.20"),
+            "last 24h, page 1": lambda: index.query(since=time.time() - 86400, limit=50),
+        }
+        for label, fn in queries.items():
+            ms, result = _timed(fn, args.repeat)
+            size = len(result["items"]) if isinstance(result, dict) else len(result)
+            print(f"  {label:<28} {ms:8.2f} ms  ({size} rows)")
+
+        # Halaman jauh lewat keyset cursor
+        page = index.query(modul=modul, limit=50)
+        pages = 1
+        while page["next_cursor"] is not None and pages < 50:
+            cursor = page["next_cursor"]
+            page = index.query(modul=modul, limit=50, cursor=cursor)
+            pages += 1
+        ms, _ = _timed(lambda: index.query(modul=modul, limit=50, cursor=cursor), args.repeat)
+        print(f"  {'modul, page ' + str(pages):<28} {ms:8.2f} ms")
+
+        # Tanpa index: parsing ulang semua dokumen (teks saja; ekstraksi PDF jauh lebih lambat lagi)
+        per_doc, _ = _timed(lambda: parse_pages(corpus[0]), 5)
+        print(f"re-parse alternative: {per_doc:.2f} ms/doc text-only -> "
+              f"~{per_doc * args.documents / 1000:.1f}s for {args.documents} documents (excluding PDF extraction)")
+        index.close()
+
+
+if __name__ == "__main__":
+    main()
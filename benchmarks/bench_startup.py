@@ -0,0 +1,137 @@
+# benchmarks/bench_startup.py
+"""
+Cold start engine: waktu import `main` + lifespan startup dan RSS per worker uvicorn,
+untuk beberapa konfigurasi registry task. Tiap percobaan memakai interpreter baru.
+
+    python -m benchmarks.bench_startup
+    python -m benchmarks.bench_startup --runs 10 --parser-workers 2
+    python -m benchmarks.bench_startup --scenario ssl-only=ssl_deploy,ssl_deploy_batch
+
+Skenario bawaan:
+    eager       TASK_PRELOAD=true (semua handler di-import saat startup, seperti sebelum registry lazy)
+    lazy        semua task aktif, handler di-import saat dipakai pertama kali
+    ssl-only    ENABLED_TASKS=ssl_deploy,ssl_deploy_batch
+    parse-only  ENABLED_TASKS=deployment_parse
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEAVY_MODULES = ("paramiko", "pdfplumber", "pdfminer")
+
+SCENARIOS = {
+    "eager": {"TASK_PRELOAD": "true"},
+    "lazy": {},
+    "ssl-only": {"ENABLED_TASKS": "ssl_deploy,ssl_deploy_batch"},
+    "parse-only": {"ENABLED_TASKS": "deployment_parse"},
+}
+
+# Dijalankan di interpreter baru; mencetak satu baris JSON
+PROBE = r"""
+import asyncio, json, os, sys, time
+start = time.perf_counter()
+import main
+imported = time.perf_counter()
+
+def rss_kb(pid):
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return 0
+
+def children(pid):
+    try:
+        with open(f"/proc/{pid}/task/{pid}/children") as f:
+            return [int(p) for p in f.read().split()]
+    except OSError:
+        return []
+
+async def startup():
+    async with main.app.router.lifespan_context(main.app):
+        ready = time.perf_counter()
+        kids = children(os.getpid())
+        result = {
+            "import_s": imported - start,
+            "startup_s": ready - start,
+            "rss_mb": rss_kb(os.getpid()) / 1024,
+            "children": len(kids),
+            "children_rss_mb": sum(rss_kb(p) for p in kids) / 1024,
+            "modules": len(sys.modules),
+            "heavy": sorted(m for m in HEAVY if m in sys.modules),
+        }
+    return result
+
+HEAVY = %r
+print("@@RESULT " + json.dumps(asyncio.run(startup())), flush=True)
+"""
+
+
+def run_probe(overrides, parser_workers: int, workdir: str):
+    env = dict(os.environ)
+    env.setdefault("TIARA_SYNC_KEY", "base64:" + "A" * 43 + "=")
+    env.setdefault("TIARA_WEBHOOK_URL", "http://127.0.0.1:9/webhook")
+    env.update({
+        "PYTHONPATH": ROOT + os.pathsep + env.get("PYTHONPATH", ""),
+        "LOG_LEVEL": "WARNING",
+        "TASK_STORE_PATH": "",
+        "PARSER_CACHE_DISK_MAX_MB": "0",
+        "PARSER_WORKERS": str(parser_workers),
+        "ENABLED_TASKS": "",
+        "TASK_PRELOAD": "false",
+    })
+    env.update(overrides)
+    # cwd terpisah agar folder logs/ dari setup_logging tidak mengotori repo
+    proc = subprocess.run([sys.executable, "-c", PROBE % (HEAVY_MODULES,)], env=env, cwd=workdir,
+                          capture_output=True, text=True, timeout=120)
+    for line in proc.stdout.splitlines():
+        if line.startswith("@@RESULT "):
+            return json.loads(line[len("@@RESULT "):])
+    raise SystemExit(f"Probe failed (exit {proc.returncode}):\n{proc.stderr[-2000:]}")
+
+
+def parse_scenario(value: str):
+    name, _, tasks = value.partition("=")
+    return name, {"ENABLED_TASKS": tasks}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="Percobaan per skenario (median dilaporkan)")
+    parser.add_argument("--parser-workers", type=int, default=1,
+                        help="PARSER_WORKERS untuk skenario yang melayani deployment_parse")
+    parser.add_argument("--scenario", action="append", type=parse_scenario, default=[],
+                        metavar="NAME=TASK,TASK", help="Skenario tambahan (ENABLED_TASKS kustom)")
+    args = parser.parse_args()
+
+    scenarios = dict(SCENARIOS)
+    scenarios.update(dict(args.scenario))
+
+    with tempfile.TemporaryDirectory(prefix="tiara-startup-") as workdir:
+        # Pemanasan: bytecode & page cache, agar run pertama tidak bias
+        run_probe({}, args.parser_workers, workdir)
+
+        print(f"{args.runs} run(s) per scenario, PARSER_WORKERS={args.parser_workers}, median values")
+        print(f"  {'scenario':<12} {'import':>8} {'startup':>8} {'RSS':>8} {'children':>14} {'modules':>8}  heavy modules")
+        for name, overrides in scenarios.items():
+            runs = [run_probe(overrides, args.parser_workers, workdir) for _ in range(args.runs)]
+            median = {k: statistics.median(r[k] for r in runs)
+                      for k in ("import_s", "startup_s", "rss_mb", "children", "children_rss_mb", "modules")}
+            children = f"{median['children']:.0f} / {median['children_rss_mb']:.0f} MB"
+            print(f"  {name:<12} {median['import_s'] * 1000:6.0f}ms {median['startup_s'] * 1000:6.0f}ms "
+                  f"{median['rss_mb']:5.1f} MB {children:>14} {median['modules']:8.0f}  "
+                  f"{', '.join(runs[-1]['heavy']) or '-'}")
+        print("RSS = proses worker uvicorn; children = proses ekstraksi PDF (+ resource tracker) yang di-spawn.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+# benchmarks/corpus.py
+"""
+Generator korpus sintetis dokumen deployment (teks per halaman dan PDF minimal)
+untuk benchmark parser. Deterministik berdasarkan seed.
+"""
+import random
+from typing import List
+
+TENANTS = ["bank-a", "bank-b", "insure-c", "retail-d", "gov-e"]
+MODULES = ["core-api", "payment", "notification", "report", "auth", "gateway"]
+FILLER = (
+    "Deskripsi perubahan dan langkah rollback mengikuti prosedur standar. "
+    "Pastikan service sudah di-drain sebelum deployment dilakukan."
+)
+
+
+def generate_pages(services: int, seed: int = 42, lines_per_page: int = 45, global_json: bool = True) -> List[str]:
+    """Hasilkan teks per halaman, bentuknya meniru output `page.extract_text()`."""
+    rng = random.Random(seed)
+    lines = ["DEPLOYMENT DOCUMENT", f"Release Batch {seed}", "Approval: Change Advisory Board", ""]
+
+    for i in range(services):
+        lines.append(f"Git Detail #{i + 1}")
+        lines.append(f"Repository : git@git.example.com:{rng.choice(MODULES)}.git")
+        lines.append(f"Tenant : {rng.choice(TENANTS)}")
+        lines.append(f"Modul: {rng.choice(MODULES)}-{rng.randint(1, 9)}")
+        lines.append(f"Version : {rng.randint(1, 5)}.{rng.randint(0, 20)}.{rng.randint(0, 99)}")
+        if rng.random() < 0.4:
+            lines.append(f"Penambahan Env : FEATURE_{rng.randint(1, 50)}=true")
+        for _ in range(rng.randint(2, 8)):
+            lines.append(FILLER)
+        if rng.random() < 0.3:
+            lines.append(f"Config: {rng.choice(MODULES)}-override.json")
+
+    if global_json:
+        lines.append("Global Json")
+        for _ in range(5):
+            lines.append(f"{rng.choice(TENANTS)}-{rng.choice(MODULES)}.json")
+
+    return ["\n".join(lines[i:i + lines_per_page]) for i in range(0, len(lines), lines_per_page)]
+
+
+def _escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def write_pdf(pages: List[str], path: str):
+    """Tulis PDF minimal (font Helvetica, satu text object per halaman) tanpa dependency tambahan."""
+    objects: List[bytes] = [b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    font_id = 1
+    pages_id = 1 + 2 * len(pages) + 1
+
+    page_ids = []
+    for text in pages:
+        ops = ["BT /F1 9 Tf 11 TL 40 810 Td"]
+        ops.extend(f"({_escape(line)}) Tj T*" for line in text.split("\n"))
+        ops.append("ET")
+        stream = "\n".join(ops).encode("latin-1", "replace")
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        content_id = len(objects)
+        objects.append(
+            b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 595 842] /Contents %d 0 R "
+            b"/Resources << /Font << /F1 %d 0 R >> >> >>" % (pages_id, content_id, font_id)
+        )
+        page_ids.append(len(objects))
+
+    kids = b" ".join(b"%d 0 R" % pid for pid in page_ids)
+    objects.append(b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, len(page_ids)))
+    objects.append(b"<< /Type /Catalog /Pages %d 0 R >>" % pages_id)
+    catalog_id = len(objects)
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        out += b"%010d 00000 n \n" % offset
+    out += b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, catalog_id, xref)
+
+    with open(path, "wb") as f:
+        f.write(out)
@@ -0,0 +1,63 @@
+# benchmarks/legacy_parser.py
+"""
+Salinan implementasi parser sebelum optimasi (baseline benchmark).
+Jangan diubah: dipakai untuk membandingkan kecepatan dan memastikan output tetap sama.
+"""
+import re
+from typing import Any, Dict, Iterable
+
+import pdfplumber
+
+
+def legacy_parse_text(full_text: str) -> Dict[str, Any]:
+    extracted_data = []
+    global_json_files = []
+
+    # Regex Patterns
+    patterns = {
+        "tenant": r"(?i)Tenant\s*[:]?\s*(.*)",
+        "version": r"(?i)Version\s*[:]?\s*(.*)",
+        "modul": r"(?i)Modul\s*[:]?\s*(.*)",
+        "env": r"(?i)Penambahan Env\s*[:]?\s*(.*)",
+    }
+
+    blocks = re.split(r"(?i)Git Detail", full_text)
+    for block in blocks[1:]:
+        item = {}
+
+        def get_val(key, text_block):
+            match = re.search(patterns[key], text_block)
+            if match:
+                return match.group(1).strip().replace(":", "").strip()
+            return None
+
+        item['tenant'] = get_val("tenant", block)
+        item['version'] = get_val("version", block)
+        item['modul'] = get_val("modul", block)
+        item['env'] = get_val("env", block) or "None"
+
+        if item['tenant'] or item['modul']:
+            extracted_data.append(item)
+
+    if "Global Json" in full_text:
+        json_matches = re.findall(r"[\w\-\.]+\.json", full_text)
+        global_json_files = list(set(json_matches))
+
+    return {
+        "services": extracted_data,
+        "global_json_updates": global_json_files,
+        "raw_text_snippet": full_text[:500] + "...",
+    }
+
+
+def legacy_parse_pages(page_texts: Iterable[str]) -> Dict[str, Any]:
+    full_text = ""
+    for text in page_texts:
+        if text:
+            full_text += text + "\n"
+    return legacy_parse_text(full_text)
+
+
+def legacy_extract_pdf(pdf_path: str) -> Dict[str, Any]:
+    with pdfplumber.open(pdf_path) as pdf:
+        return legacy_parse_pages(page.extract_text() for page in pdf.pages)
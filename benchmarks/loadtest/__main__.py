@@ -0,0 +1,240 @@
+# benchmarks/loadtest/__main__.py
+"""
+Load test end-to-end TIARA Engine dengan SSH server dan webhook Laravel tiruan.
+
+    # Jalankan engine sendiri (uvicorn) dengan key & webhook mengarah ke stub:
+    python -m benchmarks.loadtest --spawn-engine --rate 20 --duration 30
+
+    # Atau uji engine yang sudah berjalan (TIARA_WEBHOOK_URL engine harus mengarah ke stub):
+    python -m benchmarks.loadtest --engine-url http://127.0.0.1:8001 --webhook-port 9900 --engine-pid 1234
+
+Komposisi task diatur dengan --mix, misal "ssl_deploy=0.8,deployment_parse=0.2".
+"""
+import argparse
+import asyncio
+import base64
+import logging
+import os
+import socket
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional, Tuple
+
+import httpx
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+from cryptography.x509.oid import NameOID
+
+from benchmarks.corpus import generate_pages, write_pdf
+from benchmarks.loadtest.loadgen import LoadGenerator, ProcessSampler, parse_mix, percentiles, scrape_phase_means
+from benchmarks.loadtest.ssh_server import FakeSSHServer
+from benchmarks.loadtest.webhook_stub import WebhookStub
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def _build_documents(stub: WebhookStub, count: int, services: int):
+    tmp_path = os.path.join(REPO_ROOT, ".loadtest_doc.pdf")
+    try:
+        for i in range(count):
+            write_pdf(generate_pages(services, seed=i), tmp_path)
+            with open(tmp_path, "rb") as f:
+                stub.documents[f"doc_{i}.pdf"] = f.read()
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def _self_signed_bundle(domain: str) -> Tuple[str, str]:
+    """Bundle nyata (EC, self-signed, SAN wildcard) agar lolos validasi bundle dan task sampai ke SSH."""
+    key = ec.generate_private_key(ec.SECP256R1())
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, domain)])
+    now = datetime.now(timezone.utc)
+    cert = (
+        x509.CertificateBuilder().subject_name(name).issuer_name(name).public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now - timedelta(days=1)).not_valid_after(now + timedelta(days=90))
+        .add_extension(x509.SubjectAlternativeName([x509.DNSName(domain)]), critical=False)
+        .sign(key, hashes.SHA256())
+    )
+    cert_pem = cert.public_bytes(serialization.Encoding.PEM).decode()
+    key_pem = key.private_bytes(serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8,
+                                serialization.NoEncryption()).decode()
+    return cert_pem, key_pem
+
+
+def _payload_factory(args, ssh: FakeSSHServer, stub: WebhookStub):
+    cert_pem, key_pem = _self_signed_bundle("*.example.test")
+
+    def factory(task_type: str, log_id: int) -> Dict[str, Any]:
+        if task_type == "deployment_parse":
+            doc = f"doc_{log_id % args.unique_docs}.pdf"
+            return {"task": task_type, "log_id": log_id, "data": {"file_url": f"{stub.base_url}/docs/{doc}"}}
+        domain = f"load-{log_id % args.domains if args.domains else log_id}.example.test"
+        return {
+            "task": task_type,
+            "log_id": log_id,
+            "data": {
+                "domain_name": domain,
+                "server_ip": "127.0.0.1",
+                "server_port": ssh.port,
+                "ssh_user": f"deploy{log_id % args.ssh_users}",
+                "ssh_pass_raw": "load-test",
+                "cert_path": f"/etc/ssl/{domain}.crt",
+                "key_path": f"/etc/ssl/{domain}.key",
+                "restart_command": "systemctl reload nginx",
+                "new_cert_content": cert_pem,
+                "new_key_content": key_pem,
+            },
+        }
+    return factory
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _spawn_engine(args, key: bytes, stub: WebhookStub) -> subprocess.Popen:
+    if not args.engine_port:
+        args.engine_port = _free_port()
+    env = dict(os.environ)
+    env.update({
+        "TIARA_SYNC_KEY": "base64:" + base64.b64encode(key).decode(),
+        "TIARA_WEBHOOK_URL": f"{stub.base_url}/webhook",
+        "WEBHOOK_BATCH_URL": f"{stub.base_url}/webhook/batch",
+        "LOG_LEVEL": args.engine_log_level,
+        "WEB_CONCURRENCY": str(args.engine_workers),  # Pool ekstraksi PDF dibagi antar worker
+    })
+    command = [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1",
+               "--port", str(args.engine_port), "--workers", str(args.engine_workers), "--log-level", "warning"]
+    process = subprocess.Popen(command, cwd=REPO_ROOT, env=env, stdout=subprocess.DEVNULL)
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise SystemExit(f"Engine exited during startup (code {process.returncode})")
+        try:
+            if httpx.get(f"http://127.0.0.1:{args.engine_port}/", timeout=1).status_code == 200:
+                return process
+        except httpx.HTTPError:
+            time.sleep(0.3)
+    process.terminate()
+    raise SystemExit("Engine did not become ready within 60s")
+
+
+def _resolve_key(args) -> bytes:
+    if args.spawn_engine:
+        return os.urandom(32)
+    from core.config import settings
+    return settings.SYNC_KEY_BYTES
+
+
+def _print_report(result, stub: WebhookStub, sampler: ProcessSampler, ssh: FakeSSHServer, wall: float,
+                  engine_url: str):
+    sent = result.sent
+    accepted = {log_id: r for log_id, r in sent.items() if r.get("status_code") == 200}
+    rejected = sum(1 for r in sent.values() if r.get("status_code") == 429)
+    completed = stub.completed()
+
+    print(f"\n=== Load test report ({wall:.1f}s) ===")
+    print(f"sent {len(sent)} | accepted {len(accepted)} | rejected(429) {rejected} | "
+          f"other errors {len(sent) - len(accepted) - rejected}")
+
+    accept = percentiles([r["latency"] * 1000 for r in sent.values() if "latency" in r])
+    print("accept latency ms   " + "  ".join(f"{k} {v:8.1f}" for k, v in accept.items()))
+
+    for task_type in sorted({r["task"] for r in accepted.values()}):
+        ids = [log_id for log_id, r in accepted.items() if r["task"] == task_type]
+        done = [completed[i]["received_at"] - accepted[i]["sent_at"] for i in ids if i in completed]
+        failed = sum(1 for i in ids if i in completed and completed[i]["status"] != "SUCCESS")
+        stats = percentiles([d * 1000 for d in done])
+        print(f"[{task_type}] completed {len(done)}/{len(ids)} (failed {failed})")
+        if stats:
+            print("  completion ms     " + "  ".join(f"{k} {v:8.1f}" for k, v in stats.items()))
+        if done:
+            print(f"  throughput        {len(done) / wall:.1f} tasks/s")
+
+    print(f"webhook requests {stub.requests} | fake SSH {ssh.stats.snapshot()}")
+    phases = scrape_phase_means(engine_url)
+    if phases:
+        print("engine phases (mean, dari /metrics):")
+        for phase, stats in sorted(phases.items()):
+            print(f"  {phase:<18} {stats['mean_ms']:9.1f} ms  (n={stats['count']:.0f})")
+    usage = sampler.summary()
+    if usage:
+        print("engine resources    " + "  ".join(f"{k} {v:.1f}" for k, v in usage.items()))
+
+
+async def _run(args):
+    ssh = FakeSSHServer(port=args.ssh_port, latency=args.ssh_latency, exec_time=args.exec_time).start()
+    stub = WebhookStub(port=args.webhook_port, latency=args.webhook_latency, batch=not args.no_batch).start()
+    if "deployment_parse" in parse_mix(args.mix):
+        _build_documents(stub, args.unique_docs, args.doc_services)
+
+    key = _resolve_key(args)
+    engine: Optional[subprocess.Popen] = _spawn_engine(args, key, stub) if args.spawn_engine else None
+    engine_url = f"http://127.0.0.1:{args.engine_port}" if engine else args.engine_url
+    sampler = ProcessSampler(engine.pid if engine else args.engine_pid)
+
+    print(f"fake SSH on :{ssh.port} (latency {args.ssh_latency}s) | webhook stub on {stub.base_url} | engine {engine_url}")
+    try:
+        sampler.start()
+        started = time.monotonic()
+        generator = LoadGenerator(engine_url, key, _payload_factory(args, ssh, stub),
+                                  rate=args.rate, duration=args.duration, mix=parse_mix(args.mix))
+        result = await generator.run()
+
+        # Tunggu task yang diterima selesai (dilaporkan ke webhook stub)
+        accepted = {i for i, r in result.sent.items() if r.get("status_code") == 200}
+        deadline = time.monotonic() + args.drain_timeout
+        while time.monotonic() < deadline and not accepted.issubset(stub.completed()):
+            await asyncio.sleep(0.2)
+
+        _print_report(result, stub, sampler, ssh, time.monotonic() - started, engine_url)
+    finally:
+        await sampler.stop()
+        if engine is not None:
+            engine.terminate()
+            engine.wait(timeout=30)
+        stub.stop()
+        ssh.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rate", type=float, default=10.0, help="Request per detik")
+    parser.add_argument("--duration", type=float, default=20.0, help="Lama pengiriman (detik)")
+    parser.add_argument("--mix", default="ssl_deploy=0.8,deployment_parse=0.2")
+    parser.add_argument("--drain-timeout", type=float, default=120.0, help="Batas tunggu task selesai setelah kirim")
+    parser.add_argument("--spawn-engine", action="store_true", help="Jalankan engine (uvicorn) sebagai subprocess")
+    parser.add_argument("--engine-url", default="http://127.0.0.1:8001")
+    parser.add_argument("--engine-port", type=int, default=0, help="Port engine subprocess (0 = port bebas)")
+    parser.add_argument("--engine-workers", type=int, default=1)
+    parser.add_argument("--engine-pid", type=int, help="PID engine yang sudah berjalan (untuk sampling resource)")
+    parser.add_argument("--engine-log-level", default="WARNING")
+    parser.add_argument("--ssh-port", type=int, default=0)
+    parser.add_argument("--ssh-latency", type=float, default=0.02, help="Delay per request SSH/SFTP (detik)")
+    parser.add_argument("--exec-time", type=float, default=0.0, help="Lama tambahan tiap command remote (detik)")
+    parser.add_argument("--ssh-users", type=int, default=4, help="Jumlah user SSH berbeda (kunci pool)")
+    parser.add_argument("--domains", type=int, default=0,
+                        help="Jumlah domain berbeda untuk ssl_deploy (0 = unik per request; kecil = banyak cert sudah terpasang)")
+    parser.add_argument("--webhook-port", type=int, default=0)
+    parser.add_argument("--webhook-latency", type=float, default=0.0)
+    parser.add_argument("--no-batch", action="store_true", help="Webhook stub menolak endpoint batch")
+    parser.add_argument("--unique-docs", type=int, default=5, help="Jumlah PDF berbeda untuk deployment_parse")
+    parser.add_argument("--doc-services", type=int, default=30, help="Block service per PDF")
+    args = parser.parse_args()
+
+    if not args.spawn_engine and not args.webhook_port:
+        parser.error("--webhook-port is required when testing an external engine (its TIARA_WEBHOOK_URL must point to the stub)")
+    # Reset koneksi saat engine dimatikan tidak perlu ditampilkan
+    logging.getLogger("paramiko").setLevel(logging.CRITICAL)
+    asyncio.run(_run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+# benchmarks/loadtest/loadgen.py
+"""
+Load generator: kirim payload terenkripsi ke /api/v1/execute dengan rate dan komposisi task tertentu,
+lalu ukur latency request diterima, latency penyelesaian task (lewat webhook stub), dan resource engine.
+"""
+import asyncio
+import base64
+import json
+import os
+import random
+import statistics
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+import httpx
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+
+
+def encrypt_payload(data: Dict[str, Any], key: bytes) -> str:
+    """Format sama dengan yang diharapkan core.security: base64(iv[12] + tag[16] + ciphertext)."""
+    iv = os.urandom(12)
+    sealed = AESGCM(key).encrypt(iv, json.dumps(data).encode("utf-8"), None)
+    ciphertext, tag = sealed[:-16], sealed[-16:]
+    return base64.b64encode(iv + tag + ciphertext).decode()
+
+
+def parse_mix(mix: str) -> Dict[str, float]:
+    """'ssl_deploy=0.7,deployment_parse=0.3' -> {'ssl_deploy': 0.7, 'deployment_parse': 0.3}"""
+    weights = {}
+    for part in mix.split(","):
+        name, _, weight = part.partition("=")
+        weights[name.strip()] = float(weight or 1)
+    return weights
+
+
+def percentiles(values: List[float]) -> Dict[str, float]:
+    if not values:
+        return {}
+    ordered = sorted(values)
+
+    def pick(p: float) -> float:
+        return ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))]
+
+    return {"p50": pick(50), "p90": pick(90), "p99": pick(99), "max": ordered[-1], "mean": statistics.fmean(ordered)}
+
+
+def scrape_phase_means(engine_url: str) -> Dict[str, Dict[str, float]]:
+    """Ambil rata-rata durasi per phase dari GET /metrics engine: {phase: {count, mean_ms}}."""
+    try:
+        text = httpx.get(f"{engine_url.rstrip('/')}/metrics", timeout=5).text
+    except httpx.HTTPError:
+        return {}
+    sums: Dict[str, float] = {}
+    counts: Dict[str, float] = {}
+    for line in text.splitlines():
+        if not line.startswith("tiara_phase_duration_seconds_"):
+            continue
+        name, value = line.rsplit(" ", 1)
+        phase = name.split('phase="', 1)[1].split('"', 1)[0]
+        if name.startswith("tiara_phase_duration_seconds_sum"):
+            sums[phase] = float(value)
+        elif name.startswith("tiara_phase_duration_seconds_count"):
+            counts[phase] = float(value)
+    return {
+        phase: {"count": counts[phase], "mean_ms": 1000 * sums.get(phase, 0.0) / counts[phase]}
+        for phase in counts if counts[phase]
+    }
+
+
+class ProcessSampler:
+    """Sampling RSS dan CPU proses engine dari /proc (Linux)."""
+
+    def __init__(self, pid: Optional[int], interval: float = 0.5):
+        self.pid = pid
+        self.interval = interval
+        self.rss_kib: List[int] = []
+        self.cpu_percent: List[float] = []
+        self._task: Optional[asyncio.Task] = None
+
+    def _read(self):
+        with open(f"/proc/{self.pid}/status") as f:
+            rss = next((int(line.split()[1]) for line in f if line.startswith("VmRSS:")), None)
+        if rss is None:
+            raise ProcessLookupError(self.pid)  # Proses sudah keluar (zombie)
+        with open(f"/proc/{self.pid}/stat") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+        cpu_ticks = int(fields[11]) + int(fields[12])  # utime + stime
+        return rss, cpu_ticks / os.sysconf("SC_CLK_TCK")
+
+    async def _run(self):
+        _, last_cpu = self._read()
+        last_time = time.monotonic()
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                rss, cpu = self._read()
+            except (FileNotFoundError, ProcessLookupError):
+                return
+            now = time.monotonic()
+            self.rss_kib.append(rss)
+            self.cpu_percent.append(100 * (cpu - last_cpu) / (now - last_time))
+            last_cpu, last_time = cpu, now
+
+    def start(self):
+        if self.pid and os.path.exists(f"/proc/{self.pid}"):
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except (asyncio.CancelledError, FileNotFoundError, ProcessLookupError):
+                pass
+
+    def summary(self) -> Dict[str, float]:
+        if not self.rss_kib:
+            return {}
+        return {
+            "rss_peak_mib": max(self.rss_kib) / 1024,
+            "rss_avg_mib": statistics.fmean(self.rss_kib) / 1024,
+            "cpu_avg_percent": statistics.fmean(self.cpu_percent),
+            "cpu_peak_percent": max(self.cpu_percent),
+        }
+
+
+@dataclass
+class LoadResult:
+    sent: Dict[int, Dict[str, Any]] = field(default_factory=dict)  # log_id -> {task, sent_at, status_code, latency}
+    errors: int = 0
+
+
+class LoadGenerator:
+    def __init__(self, engine_url: str, key: bytes, payload_factory, rate: float, duration: float,
+                 mix: Dict[str, float], seed: int = 1, max_connections: int = 100):
+        self.engine_url = engine_url.rstrip("/")
+        self.key = key
+        self.payload_factory = payload_factory  # (task_type, log_id) -> payload dict
+        self.rate = rate
+        self.duration = duration
+        self.mix = mix
+        self.rng = random.Random(seed)
+        self.max_connections = max_connections
+        self.result = LoadResult()
+
+    async def _send(self, client: httpx.AsyncClient, task_type: str, log_id: int):
+        body = {"payload": encrypt_payload(self.payload_factory(task_type, log_id), self.key)}
+        record = {"task": task_type, "sent_at": time.time()}
+        self.result.sent[log_id] = record
+        start = time.perf_counter()
+        try:
+            response = await client.post(f"{self.engine_url}/api/v1/execute", json=body)
+            record["status_code"] = response.status_code
+        except httpx.HTTPError:
+            record["status_code"] = None
+            self.result.errors += 1
+        record["latency"] = time.perf_counter() - start
+
+    async def run(self) -> LoadResult:
+        limits = httpx.Limits(max_connections=self.max_connections, max_keepalive_connections=self.max_connections)
+        task_types, weights = list(self.mix), list(self.mix.values())
+        async with httpx.AsyncClient(limits=limits, timeout=30.0) as client:
+            pending = []
+            loop = asyncio.get_running_loop()
+            start = loop.time()
+            total = int(self.rate * self.duration)
+            for i in range(total):
+                # Jadwal kirim tetap (open-loop): tidak melambat walau engine melambat
+                delay = start + i / self.rate - loop.time()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                task_type = self.rng.choices(task_types, weights)[0]
+                pending.append(asyncio.create_task(self._send(client, task_type, 1_000_000 + i)))
+            await asyncio.gather(*pending)
+        return self.result
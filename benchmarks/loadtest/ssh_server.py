@@ -0,0 +1,187 @@
+# benchmarks/loadtest/ssh_server.py
+"""
+SSH/SFTP server tiruan berbasis paramiko untuk load test ssl_deploy.
+- Semua password diterima.
+- Command `exec` TIDAK dijalankan; server hanya menunggu `latency` lalu membalas exit code 0.
+  Pengecualian: `sha256sum` dan `mv` diemulasikan di folder root agar cek perubahan ssl_deploy realistis,
+  dan remote plan (`sh -c` dengan marker @@TIARA:) dibalas dengan marker sukses per step.
+- File SFTP ditulis di bawah folder root sementara (path remote dipetakan ke dalamnya).
+- Setiap request (exec / operasi SFTP) ditunda `latency` detik untuk meniru RTT jaringan.
+"""
+import hashlib
+import logging
+import os
+import re
+import shlex
+import socket
+import tempfile
+import threading
+import time
+from typing import Dict, List, Optional
+
+import paramiko
+from paramiko import SFTPAttributes, SFTPHandle, SFTPServer, SFTPServerInterface
+
+logger = logging.getLogger(__name__)
+
+
+class _Stats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.connections = 0
+        self.execs = 0
+        self.sftp_ops = 0
+        self.commands: List[str] = []
+
+    def bump(self, field: str, amount: int = 1):
+        with self.lock:
+            setattr(self, field, getattr(self, field) + amount)
+
+    def snapshot(self) -> Dict[str, int]:
+        with self.lock:
+            return {"connections": self.connections, "execs": self.execs, "sftp_ops": self.sftp_ops}
+
+
+class _Handle(SFTPHandle):
+    def stat(self):
+        return SFTPAttributes.from_stat(os.fstat(self.readfile.fileno()))
+
+
+class _SFTPInterface(SFTPServerInterface):
+    def __init__(self, server, stand_in: "FakeSSHServer", *args, **kwargs):
+        super().__init__(server, *args, **kwargs)
+        self.stand_in = stand_in
+
+    def _local(self, path: str) -> str:
+        return os.path.join(self.stand_in.root, path.lstrip("/"))
+
+    def _delay(self):
+        self.stand_in.stats.bump("sftp_ops")
+        if self.stand_in.latency:
+            time.sleep(self.stand_in.latency)
+
+    def stat(self, path):
+        self._delay()
+        try:
+            return SFTPAttributes.from_stat(os.stat(self._local(path)))
+        except OSError as e:
+            return SFTPServer.convert_errno(e.errno)
+
+    lstat = stat
+
+    def open(self, path, flags, attr):
+        self._delay()
+        local = self._local(path)
+        os.makedirs(os.path.dirname(local), exist_ok=True)
+        try:
+            fd = os.open(local, flags, 0o644)
+        except OSError as e:
+            return SFTPServer.convert_errno(e.errno)
+        mode = "wb" if flags & os.O_WRONLY else ("r+b" if flags & os.O_RDWR else "rb")
+        handle = _Handle(flags)
+        handle.readfile = handle.writefile = os.fdopen(fd, mode)
+        return handle
+
+
+class _ServerInterface(paramiko.ServerInterface):
+    def __init__(self, stand_in: "FakeSSHServer"):
+        self.stand_in = stand_in
+
+    def get_allowed_auths(self, username):
+        return "password"
+
+    def check_auth_password(self, username, password):
+        return paramiko.AUTH_SUCCESSFUL
+
+    def check_channel_request(self, kind, chanid):
+        return paramiko.OPEN_SUCCEEDED
+
+    def check_channel_exec_request(self, channel, command):
+        self.stand_in.stats.bump("execs")
+        threading.Thread(target=self.stand_in.handle_exec, args=(channel, command.decode()), daemon=True).start()
+        return True
+
+
+class FakeSSHServer:
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency: float = 0.0,
+                 exec_time: float = 0.0, root: Optional[str] = None):
+        self.host = host
+        self.latency = latency
+        self.exec_time = exec_time  # Lama eksekusi command (misal reload nginx)
+        self.root = root or tempfile.mkdtemp(prefix="tiara_fake_ssh_")
+        self.stats = _Stats()
+        self.host_key = paramiko.RSAKey.generate(2048)
+        self._sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._sock.bind((host, port))
+        self.port = self._sock.getsockname()[1]
+        self._thread: Optional[threading.Thread] = None
+
+    def _local(self, path: str) -> str:
+        return os.path.join(self.root, path.lstrip("/"))
+
+    def _emulate_plan(self, script: str) -> str:
+        output = []
+        for line in script.splitlines():
+            step = re.search(r'@@TIARA:(\w+):', line)
+            if step is None:
+                continue
+            self._emulate(line[line.index("(") + 1:line.rindex(") 2>&1")])
+            output.append(f"@@TIARA:{step.group(1)}:0")
+        return "\n".join(output)
+
+    def _emulate(self, command: str) -> str:
+        if command.startswith("sh -c ") and "@@TIARA:" in command:
+            return self._emulate_plan(shlex.split(command)[2])
+        output = []
+        for part in command.split("&&"):
+            try:
+                args = [a for a in shlex.split(part) if a not in ("sudo", "-n", "--")]
+            except ValueError:
+                continue
+            if args[:1] == ["sha256sum"]:
+                for path in args[1:]:
+                    if os.path.exists(self._local(path)):
+                        with open(self._local(path), "rb") as f:
+                            output.append(f"{hashlib.sha256(f.read()).hexdigest()}  {path}")
+            elif args[:1] == ["mv"] and len(args) == 3 and os.path.exists(self._local(args[1])):
+                os.makedirs(os.path.dirname(self._local(args[2])), exist_ok=True)
+                os.replace(self._local(args[1]), self._local(args[2]))
+        return "\n".join(output) or "ok"
+
+    def handle_exec(self, channel: paramiko.Channel, command: str):
+        time.sleep(self.latency + self.exec_time)
+        try:
+            output = self._emulate(command)
+        except Exception:
+            output = "ok"
+        channel.sendall(output.encode() + b"\n")
+        channel.send_exit_status(0)
+        channel.close()
+
+    def _serve_connection(self, client: socket.socket):
+        transport = paramiko.Transport(client)
+        transport.add_server_key(self.host_key)
+        transport.set_subsystem_handler("sftp", SFTPServer, _SFTPInterface, self)
+        try:
+            transport.start_server(server=_ServerInterface(self))
+        except Exception as e:
+            logger.warning(f"Fake SSH handshake failed: {e}")
+
+    def _accept_forever(self):
+        self._sock.listen(512)
+        while True:
+            try:
+                client, _ = self._sock.accept()
+            except OSError:
+                return
+            self.stats.bump("connections")
+            self._serve_connection(client)
+
+    def start(self) -> "FakeSSHServer":
+        self._thread = threading.Thread(target=self._accept_forever, name="fake-ssh", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._sock.close()
@@ -0,0 +1,86 @@
+# benchmarks/loadtest/webhook_stub.py
+"""
+Penerima webhook tiruan (pengganti Laravel) + penyaji dokumen PDF sintetis untuk deployment_parse.
+Mencatat waktu tiap laporan status agar latency penyelesaian task bisa dihitung.
+"""
+import asyncio
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+import uvicorn
+from fastapi import FastAPI, Request, Response
+
+
+class WebhookStub:
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency: float = 0.0, batch: bool = True):
+        self.host = host
+        self.port = port
+        self.latency = latency      # Simulasi Laravel yang lambat merespons
+        self.batch = batch          # False: endpoint batch membalas 404
+        self.documents: Dict[str, bytes] = {}
+        self.reports: Dict[Any, Dict[str, Any]] = {}
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._server: Optional[uvicorn.Server] = None
+        self._thread: Optional[threading.Thread] = None
+        self.app = self._build_app()
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def _record(self, reports: List[Dict[str, Any]]):
+        now = time.time()
+        with self._lock:
+            self.requests += 1
+            for report in reports:
+                self.reports[report.get("log_id")] = {"received_at": now, "status": report.get("status")}
+
+    def _build_app(self) -> FastAPI:
+        app = FastAPI()
+
+        @app.post("/webhook")
+        async def webhook(request: Request):
+            if self.latency:
+                await asyncio.sleep(self.latency)
+            self._record([await request.json()])
+            return {"ok": True}
+
+        @app.post("/webhook/batch")
+        async def webhook_batch(request: Request):
+            if not self.batch:
+                return Response(status_code=404)
+            if self.latency:
+                await asyncio.sleep(self.latency)
+            self._record((await request.json()).get("reports", []))
+            return {"ok": True}
+
+        @app.get("/docs/{name}")
+        async def document(name: str):
+            content = self.documents.get(name)
+            if content is None:
+                return Response(status_code=404)
+            return Response(content, media_type="application/pdf")
+
+        return app
+
+    def start(self) -> "WebhookStub":
+        config = uvicorn.Config(self.app, host=self.host, port=self.port, log_level="warning", access_log=False)
+        self._server = uvicorn.Server(config)
+        self._thread = threading.Thread(target=self._server.run, name="webhook-stub", daemon=True)
+        self._thread.start()
+        while not self._server.started:
+            time.sleep(0.05)
+        if not self.port:
+            self.port = self._server.servers[0].sockets[0].getsockname()[1]
+        return self
+
+    def stop(self):
+        if self._server is not None:
+            self._server.should_exit = True
+            self._thread.join(timeout=5)
+
+    def completed(self) -> Dict[Any, Dict[str, Any]]:
+        with self._lock:
+            return dict(self.reports)
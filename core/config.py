@@ -1,25 +1,127 @@
 # core/config.py
 import base64
+from typing import Any, Dict, List, Optional
 from pydantic_settings import BaseSettings
 from dotenv import load_dotenv
 
 load_dotenv()
 
+def _decode_key(value: str) -> bytes:
+    # Fungsi ini sekarang bisa membaca format APP_KEY Laravel
+    if value.startswith('base64:'):
+        return base64.b64decode(value[7:])
+    # Jika tidak ada prefix, anggap itu raw string (meski tidak disarankan)
+    return value.encode('utf-8')
+
 class Settings(BaseSettings):
     APP_NAME: str = "TIARA Engine"
     TIARA_SYNC_KEY: str
+    # Key lama yang masih diterima selama rotasi (dipisah koma, format sama dengan TIARA_SYNC_KEY)
+    TIARA_SYNC_KEY_PREVIOUS: str = ""
+    PAYLOAD_JSON_BACKEND: str = "auto"  # auto (orjson jika terpasang) | orjson | json
     TIARA_WEBHOOK_URL: str
     LOG_LEVEL: str = "INFO"
+    LOG_FORMAT: str = "text"  # text | json (satu baris JSON per record)
+
+    # Webhook reporter (lihat core/webhook.py)
+    WEBHOOK_BATCH_URL: Optional[str] = None  # Endpoint batch Laravel (opsional)
+    WEBHOOK_BATCH_SIZE: int = 50
+    WEBHOOK_FLUSH_INTERVAL: float = 0.2
+    WEBHOOK_MAX_RETRIES: int = 5
+    WEBHOOK_BACKOFF_BASE: float = 1.0
+    WEBHOOK_BACKOFF_MAX: float = 30.0
+    WEBHOOK_TIMEOUT: float = 10.0
+    WEBHOOK_MAX_CONNECTIONS: int = 20
+    WEBHOOK_QUEUE_SIZE: int = 10_000
+
+    # SSH connection pool (lihat core/ssh_pool.py)
+    SSH_POOL_MAX_PER_HOST: int = 4
+    SSH_POOL_IDLE_TIMEOUT: float = 300.0
+    SSH_CONNECT_TIMEOUT: float = 20.0
+    SSH_EXECUTOR_WORKERS: int = 32  # Thread khusus untuk operasi paramiko yang blocking
+
+    # Batch SSL rollout (task 'ssl_deploy_batch')
+    SSL_BATCH_MAX_CONCURRENCY: int = 20
+    SSL_BATCH_MAX_PER_HOST: int = 1
+    # Deploy ke host yang sama dalam jendela ini (detik) berbagi satu restart web server (0 = tanpa jeda)
+    SSL_RESTART_COALESCE_WINDOW: float = 2.0
+
+    # Validasi bundle sertifikat sebelum SSH (lihat modules/ssl_updater/validation.py)
+    SSL_VALIDATE_BUNDLE: bool = True
+    SSL_TRUST_STORE: Optional[str] = None  # File PEM root CA untuk cek kelengkapan chain (default: certifi)
+    SSL_EXPIRY_WARNING_DAYS: float = 14.0  # Sertifikat yang habis dalam jendela ini hanya diberi warning
+    SSL_VALIDATION_CACHE_ITEMS: int = 256
+    SSL_VALIDATION_CACHE_TTL: float = 3600.0
+
+    # PDF extraction process pool (lihat modules/deployment_parser/worker_pool.py)
+    # Proses ekstraksi PER worker uvicorn. 0 = core CPU / WEB_CONCURRENCY, maksimal 4
+    PARSER_WORKERS: int = 0
+    PARSER_MAX_TASKS_PER_CHILD: int = 50   # Worker di-recycle setelah N job
+
+    PARSER_PAGES_PER_CHUNK: int = 40       # Dokumen lebih panjang dipecah ke beberapa worker (0 = off)
+    PARSER_MAX_DOWNLOAD_MB: int = 100      # Download PDF dibatalkan jika melebihi batas ini
+    PARSER_SPOOL_DIR: Optional[str] = None # Folder spool download (default: temp dir sistem)
+
+    # Task deployment_parse_bulk (lihat modules/deployment_parser/bulk.py)
+    PARSER_BULK_CONCURRENCY: int = 4       # Dokumen yang diproses bersamaan per task bulk
+    PARSER_BULK_CHUNK_SIZE: int = 50       # Hasil dokumen per webhook PARTIAL
+    PARSER_BULK_MAX_ARCHIVE_MB: int = 2048 # Batas download archive_url
+    PARSER_BULK_CHECKPOINT_PATH: str = ".cache/bulk_checkpoints.sqlite3"  # Kosong = tidak bisa dilanjutkan
+
+    # Cache hasil parsing (lihat modules/deployment_parser/cache.py)
+    PARSER_CACHE_DIR: str = ".cache/deployment_parser"
+    PARSER_CACHE_MEMORY_ITEMS: int = 256
+    PARSER_CACHE_DISK_MAX_MB: int = 256    # 0 = tanpa tier disk
+
+    # Index service hasil parsing (lihat modules/deployment_parser/index.py, GET /api/v1/services)
+    SERVICE_INDEX_PATH: str = ".cache/services.sqlite3"  # Kosong = tidak di-index
+
+    # Task store & deduplikasi (lihat core/task_store.py)
+    TASK_STORE_PATH: str = ".cache/tasks.sqlite3"  # Kosong = hanya di memori
+    TASK_DEDUP_WINDOW: float = 600.0               # Detik; duplikat task yang baru selesai tidak dijalankan ulang
+    TASK_STORE_RETENTION_DAYS: float = 7.0
+
+    # Antrian job durable (lihat core/job_queue.py); dipakai bersama oleh semua worker uvicorn
+    JOB_QUEUE_PATH: str = ".cache/jobs.sqlite3"    # Kosong = antrian hanya di memori (hilang saat restart)
+    JOB_VISIBILITY_TIMEOUT: float = 60.0           # Lease tanpa heartbeat selama ini -> job diambil worker lain
+    JOB_POLL_INTERVAL: float = 1.0
+    JOB_MAX_ATTEMPTS: int = 3                      # Lebih dari ini -> dead-letter
+    JOB_RETRY_BACKOFF: float = 5.0                 # Detik, dikali 2 per percobaan
+    JOB_QUEUE_MAX_PENDING: int = 10_000            # Per tipe task; lebih dari ini -> HTTP 429
+
+    # Progress live per task (lihat core/progress.py, GET /api/v1/tasks/{task_id}/events)
+    PROGRESS_BUFFER_SIZE: int = 200      # Event terakhir yang disimpan per task (ring buffer)
+    PROGRESS_RETENTION: float = 300.0    # Detik buffer task selesai tetap bisa di-stream
+    PROGRESS_MAX_TASKS: int = 1000
+
+    # Registry task (lihat modules/registry.py)
+    ENABLED_TASKS: str = ""                # Tipe task yang dilayani node ini, dipisah koma (kosong = semua)
+    TASK_MODULES: Dict[str, str] = {}      # Handler tambahan/pengganti: {"tipe_task": "paket.modul:fungsi"}
+    TASK_PRELOAD: bool = False             # True = import semua handler aktif saat startup (perilaku lama)
+
+    # Endpoint /api/v1/execute/batch
+    EXECUTE_BATCH_MAX_ITEMS: int = 500
+
+    # Task scheduler (lihat core/scheduler.py). Priority: angka kecil dijalankan lebih dulu.
+    SCHEDULER_MAX_CONCURRENCY: int = 32
+    SCHEDULER_DEFAULT_LIMITS: Dict[str, Any] = {"workers": 2, "max_queue": 100, "priority": 10}
+    SCHEDULER_TASK_LIMITS: Dict[str, Dict[str, Any]] = {
+        "ssl_deploy": {"workers": 16, "max_queue": 500, "priority": 0},
+        "ssl_deploy_batch": {"workers": 2, "max_queue": 20, "priority": 0},
+        "deployment_parse": {"workers": 2, "max_queue": 100, "priority": 10},
+        # Satu bulk sudah memproses banyak dokumen paralel; prioritas rendah agar parse tunggal didahulukan
+        "deployment_parse_bulk": {"workers": 1, "max_queue": 10, "priority": 20},
+    }
 
     @property
     def SYNC_KEY_BYTES(self) -> bytes:
-        # Fungsi ini sekarang bisa membaca format APP_KEY Laravel
-        if self.TIARA_SYNC_KEY.startswith('base64:'):
-            key_base64 = self.TIARA_SYNC_KEY[7:]
-            return base64.b64decode(key_base64)
-        else:
-            # Jika tidak ada prefix, anggap itu raw string (meski tidak disarankan)
-            return self.TIARA_SYNC_KEY.encode('utf-8')
+        return _decode_key(self.TIARA_SYNC_KEY)
+
+    @property
+    def SYNC_KEYS(self) -> List[bytes]:
+        """Key aktif diikuti key lama (rotasi)."""
+        previous = [_decode_key(k.strip()) for k in self.TIARA_SYNC_KEY_PREVIOUS.split(",") if k.strip()]
+        return [self.SYNC_KEY_BYTES, *previous]
 
     class Config:
         env_file = ".env"
@@ -0,0 +1,487 @@
+# core/job_queue.py
+"""
+Antrian job durable berbasis SQLite (tanpa service eksternal).
+- Job ditulis ke disk sebelum request dijawab: restart pm2 tidak menghilangkan task.
+- Dequeue dengan lease: beberapa worker uvicorn (atau node yang berbagi file lewat volume
+  dengan file locking yang benar) bisa mengambil job dari file yang sama tanpa bentrok.
+- Visibility timeout: lease diperpanjang (heartbeat) selama job berjalan; jika worker mati,
+  lease kedaluwarsa dan job diambil ulang oleh worker lain.
+- Dead-letter: job yang gagal terus (exception tak tertangani / worker crash berulang) atau
+  payload-nya tidak bisa didekripsi dipindah ke status 'dead' dan dilaporkan FAILED ke Laravel.
+
+Payload disimpan dalam bentuk terenkripsi (key/password SSH tidak pernah tersimpan polos di disk).
+Method JobQueue sinkronus dan thread-safe; dari event loop dipanggil lewat asyncio.to_thread, karena
+BEGIN IMMEDIATE bisa menunggu kunci tulis worker lain sampai busy timeout.
+Job yang kembali dengan status FAILED dari handler dianggap selesai (tidak di-retry): retry
+otomatis hanya untuk kegagalan di level engine.
+"""
+import asyncio
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Set, Tuple
+
+from .config import settings
+from .metrics import JOB_OUTCOMES
+from .progress import current_task_id
+from .scheduler import QueueFullError, TaskHandler, TaskScheduler, get_scheduler
+from .security import PayloadCipher, get_cipher
+from .task_store import DEAD, TaskStore, get_task_store
+from .webhook import report_status_to_laravel
+
+logger = logging.getLogger(__name__)
+
+READY = "ready"
+LEASED = "leased"
+DEAD_LETTER = "dead"
+
+
+@dataclass
+class Job:
+    job_id: str
+    task_type: str
+    task_id: Optional[str]
+    payload: str  # Payload terenkripsi (format sama dengan request /api/v1/execute)
+    status: str = READY
+    attempts: int = 0
+    max_attempts: int = 3
+    available_at: float = 0.0
+    lease_owner: Optional[str] = None
+    lease_expires: Optional[float] = None
+    created_at: float = 0.0
+    last_error: Optional[str] = None
+
+    def to_dict(self, include_payload: bool = False) -> Dict[str, Any]:
+        data = asdict(self)
+        if not include_payload:
+            del data["payload"]
+        return data
+
+
+class JobQueue:
+    COLUMNS = ("job_id", "task_type", "task_id", "payload", "status", "attempts", "max_attempts",
+               "available_at", "lease_owner", "lease_expires", "created_at", "last_error")
+
+    def __init__(self, db_path: str, max_attempts: int = 3, max_pending: int = 10_000,
+                 retry_backoff: float = 5.0, retry_backoff_max: float = 300.0):
+        self.db_path = db_path
+        self.max_attempts = max_attempts
+        self.max_pending = max_pending
+        self.retry_backoff = retry_backoff
+        self.retry_backoff_max = retry_backoff_max
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        # Satu koneksi per proses, dipakai dari thread executor: satu operasi (transaksi) pada satu waktu
+        self._lock = threading.RLock()
+        self._db = sqlite3.connect(db_path, isolation_level=None, check_same_thread=False, timeout=10.0)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")  # Aman terhadap crash proses (bukan mati listrik)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            " job_id TEXT PRIMARY KEY, task_type TEXT NOT NULL, task_id TEXT, payload TEXT NOT NULL,"
+            " status TEXT NOT NULL, attempts INTEGER NOT NULL DEFAULT 0, max_attempts INTEGER NOT NULL,"
+            " available_at REAL NOT NULL, lease_owner TEXT, lease_expires REAL, created_at REAL NOT NULL,"
+            " last_error TEXT)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS jobs_ready ON jobs (status, task_type, available_at, created_at)")
+
+    @classmethod
+    def from_settings(cls) -> "JobQueue":
+        return cls(
+            db_path=settings.JOB_QUEUE_PATH,
+            max_attempts=settings.JOB_MAX_ATTEMPTS,
+            max_pending=settings.JOB_QUEUE_MAX_PENDING,
+            retry_backoff=settings.JOB_RETRY_BACKOFF,
+        )
+
+    def _transaction(self):
+        return _Transaction(self._db, self._lock)
+
+    def _from_row(self, row) -> Job:
+        return Job(**dict(zip(self.COLUMNS, row)))
+
+    def _select(self, where: str, params: Tuple = (), suffix: str = "") -> List[Job]:
+        with self._lock:
+            rows = self._db.execute(
+                f"SELECT {', '.join(self.COLUMNS)} FROM jobs WHERE {where} {suffix}", params
+            ).fetchall()
+        return [self._from_row(row) for row in rows]
+
+    # --- Producer ---
+    def enqueue(self, task_type: str, payload: str, task_id: Optional[str] = None) -> Job:
+        """Raise QueueFullError jika job tipe ini yang belum selesai sudah mencapai max_pending."""
+        result = self.enqueue_many([(task_type, payload, task_id)])[0]
+        if isinstance(result, QueueFullError):
+            raise result
+        return result
+
+    def enqueue_many(self, entries: Iterable[Tuple[str, str, Optional[str]]]) -> List[Any]:
+        """Satu transaksi (satu fsync) untuk semua entry. Return Job atau QueueFullError per entry."""
+        now = time.time()
+        results: List[Any] = []
+        with self._transaction():
+            pending: Dict[str, int] = {}
+            for task_type, payload, task_id in entries:
+                if task_type not in pending:
+                    pending[task_type] = self._db.execute(
+                        "SELECT COUNT(*) FROM jobs WHERE task_type = ? AND status IN (?, ?)",
+                        (task_type, READY, LEASED),
+                    ).fetchone()[0]
+                if pending[task_type] >= self.max_pending:
+                    JOB_OUTCOMES.inc(task=task_type, outcome="rejected")
+                    results.append(QueueFullError(task_type))
+                    continue
+                job = Job(uuid.uuid4().hex, task_type, task_id, payload, max_attempts=self.max_attempts,
+                          available_at=now, created_at=now)
+                self._db.execute(
+                    f"INSERT INTO jobs ({', '.join(self.COLUMNS)}) VALUES ({', '.join('?' * len(self.COLUMNS))})",
+                    [getattr(job, c) for c in self.COLUMNS],
+                )
+                pending[task_type] += 1
+                JOB_OUTCOMES.inc(task=task_type, outcome="enqueued")
+                results.append(job)
+        return results
+
+    # --- Consumer ---
+    def lease(self, worker_id: str, task_type: str, limit: int, visibility_timeout: float) -> List[Job]:
+        """Ambil sampai `limit` job siap (atau yang lease-nya kedaluwarsa dan masih punya sisa percobaan)."""
+        if limit <= 0:
+            return []
+        now = time.time()
+        with self._transaction():
+            jobs = self._select(
+                "task_type = ? AND ((status = ? AND available_at <= ?)"
+                " OR (status = ? AND lease_expires < ? AND attempts < max_attempts))",
+                (task_type, READY, now, LEASED, now),
+                f"ORDER BY created_at LIMIT {int(limit)}",
+            )
+            for job in jobs:
+                if job.status == LEASED:
+                    JOB_OUTCOMES.inc(task=task_type, outcome="redelivered")
+                    logger.warning(f"Lease of job {job.job_id} ({task_type}) held by {job.lease_owner} expired; "
+                                   f"re-running (attempt {job.attempts + 1}/{job.max_attempts}).")
+                job.status, job.lease_owner, job.lease_expires = LEASED, worker_id, now + visibility_timeout
+                job.attempts += 1
+                self._db.execute(
+                    "UPDATE jobs SET status = ?, lease_owner = ?, lease_expires = ?, attempts = ? WHERE job_id = ?",
+                    (LEASED, worker_id, job.lease_expires, job.attempts, job.job_id),
+                )
+        return jobs
+
+    def reap_expired(self) -> List[Job]:
+        """Lease kedaluwarsa tanpa sisa percobaan (worker crash berulang) -> dead-letter."""
+        now = time.time()
+        with self._transaction():
+            jobs = self._select("status = ? AND lease_expires < ? AND attempts >= max_attempts", (LEASED, now))
+            for job in jobs:
+                self._bury(job, job.last_error or "Lease expired (worker crashed or stalled)")
+        return jobs
+
+    def extend(self, job: Job, worker_id: str, visibility_timeout: float) -> bool:
+        """Heartbeat. False jika lease sudah bukan milik worker ini (kedaluwarsa dan diambil worker lain)."""
+        expires = time.time() + visibility_timeout
+        with self._lock:
+            updated = self._db.execute(
+                "UPDATE jobs SET lease_expires = ? WHERE job_id = ? AND status = ? AND lease_owner = ?",
+                (expires, job.job_id, LEASED, worker_id),
+            ).rowcount
+        if updated:
+            job.lease_expires = expires
+        return bool(updated)
+
+    def ack(self, job: Job, worker_id: str):
+        """Job selesai: dihapus dari antrian (status akhir tetap ada di task store)."""
+        with self._lock:
+            self._db.execute("DELETE FROM jobs WHERE job_id = ? AND lease_owner = ?", (job.job_id, worker_id))
+        JOB_OUTCOMES.inc(task=job.task_type, outcome="acked")
+
+    def nack(self, job: Job, worker_id: str, error: str) -> bool:
+        """Job gagal di level engine. Return True jika dijadwalkan ulang, False jika masuk dead-letter."""
+        with self._transaction():
+            if job.attempts >= job.max_attempts:
+                self._bury(job, error)
+                return False
+            delay = min(self.retry_backoff * (2 ** (job.attempts - 1)), self.retry_backoff_max)
+            self._db.execute(
+                "UPDATE jobs SET status = ?, available_at = ?, lease_owner = NULL, lease_expires = NULL,"
+                " last_error = ? WHERE job_id = ? AND lease_owner = ?",
+                (READY, time.time() + delay, error, job.job_id, worker_id),
+            )
+        JOB_OUTCOMES.inc(task=job.task_type, outcome="retried")
+        return True
+
+    def release(self, job: Job, worker_id: str):
+        """Kembalikan job tanpa menghitung percobaan (shutdown, atau scheduler lokal penuh)."""
+        with self._lock:
+            self._db.execute(
+                "UPDATE jobs SET status = ?, available_at = ?, lease_owner = NULL, lease_expires = NULL,"
+                " attempts = MAX(attempts - 1, 0) WHERE job_id = ? AND lease_owner = ?",
+                (READY, time.time(), job.job_id, worker_id),
+            )
+        JOB_OUTCOMES.inc(task=job.task_type, outcome="released")
+
+    def dead_letter(self, job: Job, error: str):
+        """Langsung ke dead-letter (misal payload tidak bisa didekripsi; retry tidak akan membantu)."""
+        with self._transaction():
+            self._bury(job, error)
+
+    def _bury(self, job: Job, error: str):
+        job.status, job.last_error = DEAD_LETTER, error
+        self._db.execute(
+            "UPDATE jobs SET status = ?, lease_owner = NULL, lease_expires = NULL, last_error = ? WHERE job_id = ?",
+            (DEAD_LETTER, error, job.job_id),
+        )
+        JOB_OUTCOMES.inc(task=job.task_type, outcome="dead")
+
+    # --- Inspeksi & pemulihan ---
+    def dead_letters(self, limit: int = 100) -> List[Job]:
+        return self._select("status = ?", (DEAD_LETTER,), f"ORDER BY created_at DESC LIMIT {int(limit)}")
+
+    def requeue(self, job_id: str) -> bool:
+        """Jalankan ulang job dari dead-letter (percobaan direset)."""
+        with self._lock:
+            return bool(self._db.execute(
+                "UPDATE jobs SET status = ?, attempts = 0, available_at = ?, last_error = NULL"
+                " WHERE job_id = ? AND status = ?",
+                (READY, time.time(), job_id, DEAD_LETTER),
+            ).rowcount)
+
+    def counts(self) -> Dict[Tuple[str, str], int]:
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT task_type, status, COUNT(*) FROM jobs GROUP BY task_type, status"
+            ).fetchall()
+        return {(task_type, status): count for task_type, status, count in rows}
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+class _Transaction:
+    """BEGIN IMMEDIATE: kunci tulis diambil di awal, sehingga dua worker tidak me-lease job yang sama."""
+
+    def __init__(self, db: sqlite3.Connection, lock: threading.RLock):
+        self.db = db
+        self.lock = lock
+
+    def __enter__(self):
+        self.lock.acquire()
+        try:
+            self.db.execute("BEGIN IMMEDIATE")
+        except BaseException:
+            self.lock.release()
+            raise
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            self.db.execute("COMMIT" if exc_type is None else "ROLLBACK")
+        finally:
+            self.lock.release()
+        return False
+
+
+class JobConsumer:
+    """
+    Loop per worker uvicorn: me-lease job sesuai slot kosong di TaskScheduler lokal (sehingga
+    batas workers/prioritas per tipe task tetap berlaku), mendekripsi payload, lalu menjalankannya.
+    """
+
+    def __init__(self, queue: JobQueue, scheduler: TaskScheduler, store: TaskStore, cipher: PayloadCipher,
+                 registry: Mapping[str, TaskHandler], visibility_timeout: float = 60.0, poll_interval: float = 1.0):
+        self.queue = queue
+        self.scheduler = scheduler
+        self.store = store
+        self.cipher = cipher
+        self.registry = registry  # Iterasi = tipe task yang aktif di node ini
+        self.visibility_timeout = visibility_timeout
+        self.poll_interval = poll_interval
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self._held: Dict[str, Job] = {}
+        self._heartbeats: Set[asyncio.Task] = set()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._loop_task: Optional[asyncio.Task] = None
+
+    @classmethod
+    def from_settings(cls) -> "JobConsumer":
+        from modules import TASK_REGISTRY
+        return cls(
+            queue=get_job_queue(),
+            scheduler=get_scheduler(),
+            store=get_task_store(),
+            cipher=get_cipher(),
+            registry=TASK_REGISTRY,
+            visibility_timeout=settings.JOB_VISIBILITY_TIMEOUT,
+            poll_interval=settings.JOB_POLL_INTERVAL,
+        )
+
+    # --- Lifecycle ---
+    async def start(self):
+        if self._loop_task is not None and not self._loop_task.done():
+            return
+        self._wakeup = asyncio.Event()
+        self._loop_task = asyncio.create_task(self._consume_forever(), name="job-consumer")
+        logger.info(f"Job consumer {self.worker_id} started ({self.queue.db_path}).")
+
+    async def stop(self):
+        """Berhenti mengambil job baru. Job yang sedang berjalan diurus oleh scheduler.stop()."""
+        if self._loop_task is None:
+            return
+        self._loop_task.cancel()
+        try:
+            await self._loop_task
+        except asyncio.CancelledError:
+            pass
+        self._loop_task = None
+
+    def release_held(self):
+        """Panggil setelah scheduler.stop(): lease yang masih dipegang langsung bisa diambil worker lain."""
+        for job in list(self._held.values()):
+            self.queue.release(job, self.worker_id)
+        if self._held:
+            logger.warning(f"Released {len(self._held)} unfinished job(s) back to the queue.")
+        self._held.clear()
+        for heartbeat in self._heartbeats:
+            heartbeat.cancel()
+
+    def notify(self):
+        """Ada job baru (atau slot kosong): jangan tunggu poll berikutnya."""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    # --- Loop ---
+    async def _consume_forever(self):
+        while True:
+            try:
+                for job in await asyncio.to_thread(self.queue.reap_expired):
+                    await self._on_dead(job, None)
+                for task_type in list(self.registry):
+                    capacity = self.scheduler.capacity(task_type)
+                    if capacity <= 0:
+                        continue
+                    jobs = await asyncio.to_thread(self.queue.lease, self.worker_id, task_type, capacity,
+                                                   self.visibility_timeout)
+                    for job in jobs:
+                        await self._dispatch(job)
+            except sqlite3.Error:
+                logger.exception("Job queue poll failed")
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    async def _dispatch(self, job: Job):
+        try:
+            data = self.cipher.decrypt(job.payload)
+        except ValueError:
+            logger.error(f"Job {job.job_id} ({job.task_type}) payload cannot be decrypted; moving to dead-letter.")
+            await asyncio.to_thread(self.queue.dead_letter, job, "Invalid encrypted payload")
+            await self._on_dead(job, None)
+            return
+
+        record = await self.store.attach(job.task_id, data) if job.task_id else None
+        self._held[job.job_id] = job
+        try:
+            self.scheduler.submit(job.task_type, self._wrap(job, record), data)
+        except QueueFullError:
+            # Slot diambil task lain sejak capacity() dibaca; biarkan worker lain / poll berikutnya
+            self._held.pop(job.job_id, None)
+            await asyncio.to_thread(self.queue.release, job, self.worker_id)
+
+    async def _handler(self, task_type: str) -> TaskHandler:
+        # TaskRegistry.load: import handler pertama kali di thread, tidak memblokir event loop
+        load = getattr(self.registry, "load", None)
+        return await load(task_type) if load is not None else self.registry[task_type]
+
+    def _wrap(self, job: Job, record) -> TaskHandler:
+        async def run(payload: Dict[str, Any]):
+            handler = await self._handler(job.task_type)
+            heartbeat = asyncio.create_task(self._heartbeat(job))
+            self._heartbeats.add(heartbeat)
+            if record is not None:
+                current_task_id.set(record.task_id)
+                await self.store.mark_running(record)
+            try:
+                result = await handler(payload)
+            except asyncio.CancelledError:
+                # Shutdown: release_held() mengembalikan job ke antrian
+                if record is not None:
+                    await self.store.mark_queued(record)
+                raise
+            except Exception as e:
+                self._held.pop(job.job_id, None)
+                if await asyncio.to_thread(self.queue.nack, job, self.worker_id, f"{type(e).__name__}: {e}"):
+                    logger.warning(f"Job {job.job_id} ({job.task_type}) failed, will retry "
+                                   f"(attempt {job.attempts}/{job.max_attempts}): {e}")
+                    if record is not None:
+                        await self.store.mark_queued(record)
+                else:
+                    await self._on_dead(job, record, payload)
+                raise
+            else:
+                self._held.pop(job.job_id, None)
+                await asyncio.to_thread(self.queue.ack, job, self.worker_id)
+                if record is not None:
+                    await self.store.mark_finished(record, result if isinstance(result, str) else "DONE")
+                return result
+            finally:
+                heartbeat.cancel()
+                self._heartbeats.discard(heartbeat)
+                self.notify()  # Slot kosong: lease job berikutnya sekarang
+        return run
+
+    async def _heartbeat(self, job: Job):
+        interval = max(self.visibility_timeout / 3, 0.1)
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                if not await asyncio.to_thread(self.queue.extend, job, self.worker_id, self.visibility_timeout):
+                    logger.warning(f"Lost lease on job {job.job_id} ({job.task_type}); it may run twice.")
+                    return
+            except sqlite3.Error:
+                logger.exception(f"Failed to extend lease on job {job.job_id}")
+
+    async def _on_dead(self, job: Job, record, payload: Optional[Dict[str, Any]] = None):
+        logger.error(f"Job {job.job_id} ({job.task_type}) moved to dead-letter after {job.attempts} attempt(s): "
+                     f"{job.last_error}")
+        if payload is None:
+            try:
+                payload = self.cipher.decrypt(job.payload)
+            except ValueError:
+                payload = {}
+        if record is None and job.task_id:
+            record = await asyncio.to_thread(self.store.get, job.task_id)
+        if record is not None:
+            await self.store.mark_finished(record, DEAD)
+        if payload.get("log_id") is not None:
+            await report_status_to_laravel(
+                payload["log_id"], "FAILED",
+                f"Engine gave up after {job.attempts} attempt(s): {job.last_error}",
+            )
+
+
+_queue: Optional[JobQueue] = None
+_consumer: Optional[JobConsumer] = None
+
+
+def job_queue_enabled() -> bool:
+    return bool(settings.JOB_QUEUE_PATH)
+
+
+def get_job_queue() -> JobQueue:
+    global _queue
+    if _queue is None:
+        _queue = JobQueue.from_settings()
+    return _queue
+
+
+def get_job_consumer() -> JobConsumer:
+    global _consumer
+    if _consumer is None:
+        _consumer = JobConsumer.from_settings()
+    return _consumer
@@ -1,6 +1,12 @@
+import atexit
+import copy
+import json
 import logging
 import logging.config
+import logging.handlers
 import os
+import queue
+from typing import List, Optional
 from core.config import settings
 
 # --- Filter Kustom ---
@@ -14,12 +20,33 @@ class LevelFilter(logging.Filter):
         return record.levelno == self.level
 
 # --- Formatter Kustom ---
-class CustomFormatter(logging.Formatter):
+class CachedFormatter(logging.Formatter):
+    """
+    Hasil format disimpan di record, sehingga beberapa handler yang memakai
+    formatter yang SAMA (console, info, error, debug) hanya memformat sekali.
+    """
+    def format(self, record):
+        cached = record.__dict__.get("_tiara_formatted")
+        if cached is not None and cached[0] is self:
+            return cached[1]
+        text = self.render(record)
+        record._tiara_formatted = (self, text)
+        return text
+
+    def render(self, record) -> str:
+        return super().format(record)
+
+    def exception_text(self, record) -> Optional[str]:
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        return record.exc_text
+
+class CustomFormatter(CachedFormatter):
     """Formatter kustom untuk meratakan kolom nama logger secara dinamis."""
     LEVEL_WIDTH = 8  # Sedikit diperlebar untuk CRITICAL
     NAME_WIDTH = 25  # Disesuaikan agar tidak terlalu lebar
 
-    def format(self, record):
+    def render(self, record):
         # Persingkat nama logger agar rapi (misal: tiara_engine.modules.ssl -> modules.ssl)
         logger_name = record.name.replace("tiara_engine.", "")
         if len(logger_name) > self.NAME_WIDTH:
@@ -31,12 +58,65 @@ class CustomFormatter(logging.Formatter):
             f"{logger_name:<{self.NAME_WIDTH}} | "
             f"{record.getMessage()}"
         )
+        exc_text = self.exception_text(record)
+        if exc_text:
+            log_entry += "\n" + exc_text
         return log_entry
 
+class JsonFormatter(CachedFormatter):
+    """Satu baris JSON per record (LOG_FORMAT=json), untuk dikirim ke log collector."""
+    def render(self, record):
+        entry = {
+            "ts": self.formatTime(record, self.datefmt),
+            "level": record.levelname,
+            "logger": record.name.replace("tiara_engine.", ""),
+            "msg": record.getMessage(),
+        }
+        exc_text = self.exception_text(record)
+        if exc_text:
+            entry["exc"] = exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+# --- Queue Handler ---
+class LogQueueHandler(logging.handlers.QueueHandler):
+    """
+    Satu-satunya handler di thread pemanggil (event loop): hanya menaruh record ke antrian.
+    Format dan I/O file (termasuk rotasi) dikerjakan thread writer (QueueListener).
+    """
+    def prepare(self, record):
+        # Pesan digabung sekarang (args bisa berubah setelah ini); traceback diformat di thread writer
+        message = record.getMessage()
+        record = copy.copy(record)
+        record.message = message
+        record.msg = message
+        record.args = None
+        return record
+
+_listeners: List[logging.handlers.QueueListener] = []
+
+def _stop_listeners():
+    """Kosongkan antrian log (dipanggil saat exit atau setup ulang)."""
+    while _listeners:
+        _listeners.pop().stop()
+
+atexit.register(_stop_listeners)
+
+def _attach_queue(logger: logging.Logger) -> None:
+    """Pindahkan handler logger ini ke thread writer; logger hanya memegang LogQueueHandler."""
+    sinks = logger.handlers[:]
+    if not sinks:
+        return
+    log_queue = queue.SimpleQueue()
+    listener = logging.handlers.QueueListener(log_queue, *sinks, respect_handler_level=True)
+    listener.start()
+    _listeners.append(listener)
+    logger.handlers = [LogQueueHandler(log_queue)]
+
 # --- Fungsi Setup Utama ---
 def setup_logging():
     """Mengkonfigurasi logging aplikasi berdasarkan settings."""
-    
+    _stop_listeners()
+
     # Pastikan folder logs ada
     LOG_DIR = "logs"
     os.makedirs(LOG_DIR, exist_ok=True)
@@ -44,6 +124,11 @@ def setup_logging():
     # Tentukan level log root dari settings (default INFO jika tidak diset)
     ROOT_LEVEL = getattr(settings, "LOG_LEVEL", "INFO").upper()
 
+    # Console, info, dan error memakai SATU formatter, jadi tiap record cukup diformat sekali.
+    # debug.log tetap memakai format 'standard' (kecuali LOG_FORMAT=json).
+    FORMATTER = "json" if settings.LOG_FORMAT.lower() == "json" else "custom"
+    DEBUG_FORMATTER = "json" if FORMATTER == "json" else "standard"
+
     LOGGING_CONFIG = {
         "version": 1,
         "disable_existing_loggers": False,
@@ -56,6 +141,10 @@ def setup_logging():
                 "format": "%(asctime)s [%(levelname)s] %(name)s: %(message)s",
                 "datefmt": "%Y-%m-%d %H:%M:%S",
             },
+            "json": {
+                "()": JsonFormatter,
+                "datefmt": "%Y-%m-%dT%H:%M:%S%z",
+            },
         },
         "filters": {
             "info_only": {"()": LevelFilter, "level": logging.INFO},
@@ -65,14 +154,14 @@ def setup_logging():
             # 1. Console Handler: Tampilkan INFO ke atas di layar
             "console": {
                 "class": "logging.StreamHandler",
-                "formatter": "custom",
-                "level": "INFO", 
+                "formatter": FORMATTER,
+                "level": "INFO",
                 "stream": "ext://sys.stdout", # Pastikan output ke stdout
             },
             # 2. Info File Handler: HANYA mencatat level INFO (bersih dari error/debug)
             "info_file": {
                 "class": "logging.handlers.RotatingFileHandler",
-                "formatter": "custom",
+                "formatter": FORMATTER,
                 "filename": os.path.join(LOG_DIR, "info.log"),
                 "maxBytes": 10_485_760, # 10MB
                 "backupCount": 5,
@@ -83,17 +172,17 @@ def setup_logging():
             # 3. Error File Handler: Mencatat WARNING, ERROR, CRITICAL
             "error_file": {
                 "class": "logging.handlers.RotatingFileHandler",
-                "formatter": "custom",
+                "formatter": FORMATTER,
                 "filename": os.path.join(LOG_DIR, "error.log"),
                 "maxBytes": 10_485_760,
                 "backupCount": 5,
                 "encoding": "utf8",
-                "level": "WARNING", 
+                "level": "WARNING",
             },
             # 4. Debug File Handler: Mencatat SEMUA detail (jika ROOT_LEVEL=DEBUG)
             "debug_file": {
                 "class": "logging.handlers.RotatingFileHandler",
-                "formatter": "standard", # Gunakan standard agar lebih detail untuk debug
+                "formatter": DEBUG_FORMATTER, # Gunakan standard agar lebih detail untuk debug
                 "filename": os.path.join(LOG_DIR, "debug.log"),
                 "maxBytes": 10_485_760,
                 "backupCount": 3,
@@ -109,13 +198,19 @@ def setup_logging():
         },
         # Root Logger: Muara dari semua log
         "root": {
-            "level": ROOT_LEVEL, 
+            "level": ROOT_LEVEL,
             "handlers": ["console", "info_file", "error_file", "debug_file"],
         },
     }
 
     # Terapkan konfigurasi
     logging.config.dictConfig(LOGGING_CONFIG)
-    
+
+    # Handler hasil dictConfig dipindah ke thread writer (dictConfig Python 3.11 belum
+    # mendukung QueueListener). Log uvicorn tetap hanya ke console lewat antrian sendiri.
+    _attach_queue(logging.getLogger())
+    _attach_queue(logging.getLogger("uvicorn.access"))
+    _attach_queue(logging.getLogger("uvicorn.error"))
+
     # Log pesan pertama untuk memastikan semua berjalan
-    logging.getLogger("tiara_engine.core.logging").info("Sistem logging berhasil diinisialisasi.")
\ No newline at end of file
+    logging.getLogger("tiara_engine.core.logging").info("Sistem logging berhasil diinisialisasi.")
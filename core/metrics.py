@@ -0,0 +1,216 @@
+# core/metrics.py
+"""
+Metrics in-process dengan output format teks Prometheus (GET /metrics).
+Sengaja tanpa dependency tambahan: cukup Counter, Histogram, dan gauge berbasis callback.
+"""
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+LabelValues = Tuple[str, ...]
+
+# Bucket latency (detik): dari operasi lokal (decrypt) sampai restart service / parsing PDF besar
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = [f'{n}="{_escape(str(v))}"' for n, v in zip(names, values)]
+    if extra is not None:
+        pairs.append(f'{extra[0]}="{extra[1]}"')
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"Metric {self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[n]) for n in self.labelnames)
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+    def samples(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, k)} {_format_value(v)}" for k, v in items]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        self._series: Dict[LabelValues, List[float]] = {}  # counts per bucket (non-kumulatif) + [sum]
+
+    def observe(self, value: float, **labels: str):
+        key = self._key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0.0] * (len(self.buckets) + 1)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+                    break
+            series[-1] += value
+
+    @contextmanager
+    def time(self, **labels: str):
+        """`with PHASE_SECONDS.time(phase="decrypt"): ...` (juga bisa membungkus await)."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def count(self, **labels: str) -> int:
+        series = self._series.get(self._key(labels))
+        return int(sum(series[:-1])) if series else 0
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = sorted((k, list(v)) for k, v in self._series.items())
+        lines = []
+        for key, series in items:
+            cumulative = 0.0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                le = ("le", _format_value(bound))
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {_format_value(cumulative)}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(series[-1])}")
+            lines.append(f"{self.name}_count{labels} {_format_value(cumulative)}")
+        return lines
+
+
+class GaugeCallback(_Metric):
+    """Gauge yang nilainya dibaca saat scrape, misal kedalaman antrian dari scheduler.stats()."""
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str],
+                 callback: Callable[[], Iterable[Tuple[LabelValues, float]]]):
+        super().__init__(name, documentation, labelnames)
+        self.callback = callback
+
+    def samples(self) -> List[str]:
+        return [f"{self.name}{_format_labels(self.labelnames, k)} {_format_value(v)}" for k, v in self.callback()]
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> _Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.header())
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+HTTP_REQUESTS = REGISTRY.register(Counter(
+    "tiara_http_requests_total", "HTTP requests by route and status code.", ("route", "code")))
+TASKS_SUBMITTED = REGISTRY.register(Counter(
+    "tiara_tasks_submitted_total", "Task submissions by task type and outcome (accepted/rejected).", ("task", "outcome")))
+TASKS_COMPLETED = REGISTRY.register(Counter(
+    "tiara_tasks_completed_total", "Finished tasks by task type and final status.", ("task", "status")))
+TASK_SECONDS = REGISTRY.register(Histogram(
+    "tiara_task_duration_seconds", "Task run time (from dequeue to finish) by task type.", ("task",)))
+PHASE_SECONDS = REGISTRY.register(Histogram(
+    "tiara_phase_duration_seconds", "Latency of individual task phases.", ("phase",)))
+SSL_RESTARTS = REGISTRY.register(Counter(
+    "tiara_ssl_restarts_total", "Web server restarts by outcome (executed/coalesced/skipped).", ("outcome",)))
+SSL_VALIDATIONS = REGISTRY.register(Counter(
+    "tiara_ssl_bundle_validations_total", "Offline certificate bundle validations by outcome (valid/invalid) "
+    "and cache (hit/miss).", ("outcome", "cache")))
+JOB_OUTCOMES = REGISTRY.register(Counter(
+    "tiara_job_events_total", "Durable job queue events by task type "
+    "(enqueued/rejected/acked/retried/redelivered/released/dead).", ("task", "outcome")))
+WEBHOOK_REPORTS = REGISTRY.register(Counter(
+    "tiara_webhook_reports_total", "Status reports by delivery outcome (delivered/rejected/dropped).", ("outcome",)))
+
+
+def _scheduler_gauge(field: str):
+    def collect():
+        from .scheduler import get_scheduler
+        return [((task_type,), stats[field]) for task_type, stats in sorted(get_scheduler().stats().items())]
+    return collect
+
+
+REGISTRY.register(GaugeCallback(
+    "tiara_queue_depth", "Tasks waiting in the scheduler queue.", ("task",), _scheduler_gauge("queued")))
+REGISTRY.register(GaugeCallback(
+    "tiara_tasks_in_flight", "Tasks currently running.", ("task",), _scheduler_gauge("in_flight")))
+
+
+def _job_counts():
+    from .job_queue import get_job_queue, job_queue_enabled
+    if not job_queue_enabled():
+        return []
+    return sorted(get_job_queue().counts().items())
+
+
+REGISTRY.register(GaugeCallback(
+    "tiara_job_queue_jobs", "Jobs in the durable queue by task type and state (ready/leased/dead).", ("task", "state"),
+    _job_counts))
+
+
+def _webhook_pending():
+    from .webhook import get_reporter
+    return [((), get_reporter().pending())]
+
+
+REGISTRY.register(GaugeCallback(
+    "tiara_webhook_pending", "Status reports waiting for delivery.", (), _webhook_pending))
+
+
+def render_metrics() -> str:
+    return REGISTRY.render()
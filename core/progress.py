@@ -0,0 +1,175 @@
+# core/progress.py
+"""
+Event progress per task untuk streaming live (SSE, GET /api/v1/tasks/{task_id}/events).
+- Tiap task punya ring buffer (deque maxlen): memori konstan seberapa pun verbose task-nya.
+- Publish tidak pernah menunggu subscriber: event ditulis ke buffer lalu subscriber dibangunkan.
+  Subscriber yang lambat membaca dari buffer; event yang sudah tergeser dilaporkan sebagai gap.
+- Task id aktif disimpan di contextvar, sehingga kode task cukup memanggil `report_progress(...)`
+  (ikut terbawa ke asyncio task turunan, misal target di ssl_deploy_batch).
+Hanya dipanggil dari thread event loop.
+"""
+import asyncio
+import contextvars
+import time
+from collections import OrderedDict, deque
+from dataclasses import asdict, dataclass, field
+from typing import Any, AsyncIterator, Deque, Dict, List, Optional, Set
+
+from .config import settings
+
+current_task_id: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("tiara_task_id", default=None)
+
+
+@dataclass
+class ProgressEvent:
+    seq: int
+    kind: str  # status | log | progress | gap
+    message: str
+    ts: float = field(default_factory=time.time)
+    data: Dict[str, Any] = field(default_factory=dict)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+class TaskProgress:
+    def __init__(self, buffer_size: int):
+        self.events: Deque[ProgressEvent] = deque(maxlen=buffer_size)
+        self.next_seq = 1
+        self.status: Optional[str] = None
+        self.finished_at: Optional[float] = None
+        self._subscribers: Set[asyncio.Event] = set()
+
+    def publish(self, kind: str, message: str, data: Dict[str, Any]):
+        self.events.append(ProgressEvent(self.next_seq, kind, message, data=data))
+        self.next_seq += 1
+        for wakeup in self._subscribers:
+            wakeup.set()
+
+    def since(self, last_seq: int) -> List[ProgressEvent]:
+        """Event dengan seq > last_seq yang masih ada di buffer, diawali event 'gap' jika ada yang tergeser."""
+        events = [e for e in self.events if e.seq > last_seq]
+        first_available = events[0].seq if events else self.next_seq
+        if first_available > last_seq + 1:
+            dropped = first_available - last_seq - 1
+            gap = ProgressEvent(first_available - 1, "gap", f"{dropped} event(s) dropped (buffer full)",
+                                data={"dropped": dropped})
+            events.insert(0, gap)
+        return events
+
+    @property
+    def finished(self) -> bool:
+        return self.finished_at is not None
+
+
+class ProgressHub:
+    def __init__(self, buffer_size: int = 200, retention: float = 300.0, max_tasks: int = 1000):
+        self.buffer_size = buffer_size
+        self.retention = retention      # Buffer task selesai disimpan selama ini (subscriber yang terlambat)
+        self.max_tasks = max_tasks
+        self._tasks: "OrderedDict[str, TaskProgress]" = OrderedDict()
+        self._next_prune = 0.0
+
+    @classmethod
+    def from_settings(cls) -> "ProgressHub":
+        return cls(
+            buffer_size=settings.PROGRESS_BUFFER_SIZE,
+            retention=settings.PROGRESS_RETENTION,
+            max_tasks=settings.PROGRESS_MAX_TASKS,
+        )
+
+    def _task(self, task_id: str) -> TaskProgress:
+        progress = self._tasks.get(task_id)
+        if progress is None:
+            self._prune()
+            progress = self._tasks[task_id] = TaskProgress(self.buffer_size)
+        return progress
+
+    def _prune(self):
+        now = time.time()
+        if now >= self._next_prune:
+            self._next_prune = now + min(30.0, self.retention)
+            expired = [tid for tid, p in self._tasks.items() if p.finished and now - p.finished_at > self.retention]
+            for task_id in expired:
+                del self._tasks[task_id]
+        # Batas jumlah task: buang yang paling lama, utamakan yang sudah selesai dan tanpa subscriber
+        while len(self._tasks) >= self.max_tasks:
+            candidates = list(self._tasks.items())
+            victim = next((tid for tid, p in candidates if p.finished and not p._subscribers), None) \
+                or next((tid for tid, p in candidates if not p._subscribers), None) or candidates[0][0]
+            del self._tasks[victim]
+
+    def publish(self, task_id: str, kind: str, message: str, **data: Any):
+        self._task(task_id).publish(kind, message, data)
+
+    def status(self, task_id: str, status: str, final: bool = False):
+        progress = self._task(task_id)
+        progress.status = status
+        progress.publish("status", status, {"final": final})
+        progress.finished_at = time.time() if final else None
+
+    def get(self, task_id: str) -> Optional[TaskProgress]:
+        return self._tasks.get(task_id)
+
+    def sync_status(self, task_id: str, status: str, final: bool):
+        """Status dari task store (task berjalan di worker lain, atau buffer sudah dibuang)."""
+        progress = self._tasks.get(task_id)
+        if progress is None or progress.status != status:
+            self.status(task_id, status, final=final)
+
+    async def subscribe(self, task_id: str, last_seq: int = 0, keepalive: float = 15.0
+                        ) -> AsyncIterator[Optional[ProgressEvent]]:
+        """
+        Yield event baru sampai task selesai. Yield None tiap `keepalive` detik tanpa event
+        (untuk komentar keep-alive SSE). Pemanggil menghentikan iterasi saat client putus.
+        """
+        progress = self._task(task_id)
+        wakeup = asyncio.Event()
+        progress._subscribers.add(wakeup)
+        try:
+            while True:
+                wakeup.clear()
+                events = progress.since(last_seq)
+                for event in events:
+                    last_seq = max(last_seq, event.seq)
+                    yield event
+                if progress.finished and last_seq >= progress.next_seq - 1:
+                    return
+                try:
+                    await asyncio.wait_for(wakeup.wait(), timeout=keepalive)
+                except asyncio.TimeoutError:
+                    yield None
+        finally:
+            progress._subscribers.discard(wakeup)
+
+
+_hub: Optional[ProgressHub] = None
+
+
+def get_progress_hub() -> ProgressHub:
+    global _hub
+    if _hub is None:
+        _hub = ProgressHub.from_settings()
+    return _hub
+
+
+def report_progress(message: str, kind: str = "progress", **data: Any):
+    """Catat progress untuk task yang sedang berjalan (no-op di luar konteks task)."""
+    task_id = current_task_id.get()
+    if task_id is not None:
+        get_progress_hub().publish(task_id, kind, message, **data)
+
+
+class ProgressLog(list):
+    """
+    Pengganti list `log_buffer`: isi tetap dikumpulkan untuk webhook akhir, dan setiap baris
+    juga langsung dipublish sebagai event 'log' (misal dengan label server_ip di batch rollout).
+    """
+
+    def __init__(self, **labels: Any):
+        super().__init__()
+        self.labels = labels
+
+    def append(self, line: str):
+        super().append(line)
+        report_progress(line, kind="log", **self.labels)
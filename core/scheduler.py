@@ -0,0 +1,219 @@
+# core/scheduler.py
+import asyncio
+import logging
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Deque, Dict, Iterable, List, Optional, Set, Tuple
+
+from .config import settings
+from .metrics import TASK_SECONDS, TASKS_COMPLETED, TASKS_SUBMITTED
+
+logger = logging.getLogger(__name__)
+
+TaskHandler = Callable[[Dict[str, Any]], Awaitable[Any]]
+
+
+class QueueFullError(Exception):
+    """Antrian untuk tipe task ini sudah penuh; client sebaiknya mencoba lagi nanti."""
+
+    def __init__(self, task_type: str, retry_after: int = 5):
+        super().__init__(f"Queue for task '{task_type}' is full")
+        self.task_type = task_type
+        self.retry_after = retry_after
+
+
+@dataclass
+class TaskTypeConfig:
+    workers: int = 2       # Maksimal task tipe ini yang berjalan bersamaan
+    max_queue: int = 100   # Maksimal task yang menunggu di antrian
+    priority: int = 10     # Angka lebih kecil = dijalankan lebih dulu
+
+
+@dataclass
+class _TaskQueue:
+    config: TaskTypeConfig
+    pending: Deque[Tuple[TaskHandler, Dict[str, Any]]] = field(default_factory=deque)
+    in_flight: int = 0
+
+
+class TaskScheduler:
+    """
+    Scheduler in-process pengganti BackgroundTasks:
+    - Antrian terbatas per tipe task (submit gagal cepat jika penuh -> HTTP 429).
+    - Jumlah worker per tipe task dan batas global bisa dikonfigurasi.
+    - Prioritas antar tipe task (misal ssl_deploy didahulukan dari deployment_parse).
+    """
+
+    def __init__(
+        self,
+        task_configs: Optional[Dict[str, TaskTypeConfig]] = None,
+        default_config: Optional[TaskTypeConfig] = None,
+        max_concurrency: int = 32,
+    ):
+        self.task_configs = task_configs or {}
+        self.default_config = default_config or TaskTypeConfig()
+        self.max_concurrency = max_concurrency
+        self._queues: Dict[str, _TaskQueue] = {}
+        self._running: Set[asyncio.Task] = set()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._dispatcher: Optional[asyncio.Task] = None
+
+    @classmethod
+    def from_settings(cls) -> "TaskScheduler":
+        configs = {name: TaskTypeConfig(**cfg) for name, cfg in settings.SCHEDULER_TASK_LIMITS.items()}
+        return cls(
+            task_configs=configs,
+            default_config=TaskTypeConfig(**settings.SCHEDULER_DEFAULT_LIMITS),
+            max_concurrency=settings.SCHEDULER_MAX_CONCURRENCY,
+        )
+
+    def _queue(self, task_type: str) -> _TaskQueue:
+        queue = self._queues.get(task_type)
+        if queue is None:
+            config = self.task_configs.get(task_type, self.default_config)
+            queue = self._queues[task_type] = _TaskQueue(config)
+        return queue
+
+    # --- Lifecycle ---
+    async def start(self):
+        if self._dispatcher is not None and not self._dispatcher.done():
+            return
+        self._wakeup = asyncio.Event()
+        self._dispatcher = asyncio.create_task(self._dispatch_forever(), name="task-scheduler")
+        logger.info(f"Task scheduler started (max concurrency {self.max_concurrency}).")
+
+    async def stop(self, timeout: float = 30.0):
+        """Hentikan dispatcher dan tunggu task yang sedang berjalan (maksimal `timeout` detik)."""
+        if self._dispatcher is None:
+            return
+        self._dispatcher.cancel()
+        try:
+            await self._dispatcher
+        except asyncio.CancelledError:
+            pass
+        self._dispatcher = None
+
+        dropped = sum(len(q.pending) for q in self._queues.values())
+        if dropped:
+            logger.warning(f"Task scheduler stopped with {dropped} queued task(s) not started.")
+        if self._running:
+            done, pending = await asyncio.wait(self._running, timeout=timeout)
+            for task in pending:
+                task.cancel()
+            if pending:
+                # Tunggu finally/nack/release milik handler selesai sebelum lifespan menutup pool & store
+                await asyncio.gather(*pending, return_exceptions=True)
+                logger.warning(f"Cancelled {len(pending)} task(s) still running after {timeout}s.")
+        logger.info("Task scheduler stopped.")
+
+    # --- Public API ---
+    def submit(self, task_type: str, handler: TaskHandler, payload: Dict[str, Any]):
+        """Masukkan task ke antrian. Raise QueueFullError jika antrian tipe ini penuh."""
+        self._enqueue(task_type, handler, payload)
+        self._notify()
+
+    def submit_many(
+        self, entries: Iterable[Tuple[str, TaskHandler, Dict[str, Any]]]
+    ) -> List[Optional[QueueFullError]]:
+        """
+        Masukkan banyak task sekaligus; dispatcher hanya dibangunkan sekali.
+        Return list sejajar dengan `entries`: None jika masuk antrian, QueueFullError jika ditolak.
+        """
+        results: List[Optional[QueueFullError]] = []
+        for task_type, handler, payload in entries:
+            try:
+                self._enqueue(task_type, handler, payload)
+                results.append(None)
+            except QueueFullError as e:
+                results.append(e)
+        if any(result is None for result in results):
+            self._notify()
+        return results
+
+    def _enqueue(self, task_type: str, handler: TaskHandler, payload: Dict[str, Any]):
+        queue = self._queue(task_type)
+        if len(queue.pending) >= queue.config.max_queue:
+            TASKS_SUBMITTED.inc(task=task_type, outcome="rejected")
+            raise QueueFullError(task_type)
+        queue.pending.append((handler, payload))
+        TASKS_SUBMITTED.inc(task=task_type, outcome="accepted")
+
+    def _notify(self):
+        if self._dispatcher is None:
+            # Belum di-start (misal dipanggil di luar lifespan FastAPI)
+            asyncio.get_running_loop().create_task(self.start())
+        elif self._wakeup is not None:
+            self._wakeup.set()
+
+    def capacity(self, task_type: str) -> int:
+        """Slot kosong untuk tipe ini: task yang bisa langsung berjalan tanpa menunggu di antrian lokal."""
+        queue = self._queue(task_type)
+        local = queue.config.workers - queue.in_flight - len(queue.pending)
+        pending = sum(len(q.pending) for q in self._queues.values())
+        overall = self.max_concurrency - len(self._running) - pending
+        return max(0, min(local, overall))
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        return {
+            task_type: {
+                "queued": len(queue.pending),
+                "in_flight": queue.in_flight,
+                "workers": queue.config.workers,
+                "max_queue": queue.config.max_queue,
+            }
+            for task_type, queue in self._queues.items()
+        }
+
+    # --- Dispatcher ---
+    def _next_runnable(self) -> Optional[str]:
+        if len(self._running) >= self.max_concurrency:
+            return None
+        candidates = [
+            (queue.config.priority, task_type)
+            for task_type, queue in self._queues.items()
+            if queue.pending and queue.in_flight < queue.config.workers
+        ]
+        return min(candidates)[1] if candidates else None
+
+    async def _dispatch_forever(self):
+        while True:
+            task_type = self._next_runnable()
+            if task_type is None:
+                await self._wakeup.wait()
+                self._wakeup.clear()
+                continue
+
+            queue = self._queues[task_type]
+            handler, payload = queue.pending.popleft()
+            queue.in_flight += 1
+            task = asyncio.create_task(self._run(task_type, handler, payload))
+            self._running.add(task)
+            task.add_done_callback(self._on_done)
+
+    async def _run(self, task_type: str, handler: TaskHandler, payload: Dict[str, Any]):
+        # Handler boleh me-return status akhir ('SUCCESS'/'FAILED') untuk metrics
+        status = "ERROR"
+        try:
+            with TASK_SECONDS.time(task=task_type):
+                result = await handler(payload)
+            status = result if isinstance(result, str) else "DONE"
+        except Exception:
+            logger.exception(f"Unhandled error in task '{task_type}'")
+        finally:
+            self._queues[task_type].in_flight -= 1
+            TASKS_COMPLETED.inc(task=task_type, status=status)
+
+    def _on_done(self, task: asyncio.Task):
+        self._running.discard(task)
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+
+_scheduler: Optional[TaskScheduler] = None
+
+
+def get_scheduler() -> TaskScheduler:
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = TaskScheduler.from_settings()
+    return _scheduler
@@ -1,22 +1,103 @@
 # core/security.py
-import base64
+import binascii
 import json
-from typing import Dict, Any
+import logging
+import os
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from cryptography.exceptions import InvalidTag
 from cryptography.hazmat.primitives.ciphers.aead import AESGCM
 from .config import settings
+from .metrics import PHASE_SECONDS
+
+try:
+    import orjson
+except ImportError:  # Opsional: fallback ke json bawaan
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+IV_SIZE = 12
+TAG_SIZE = 16
+HEADER_SIZE = IV_SIZE + TAG_SIZE
+
+
+def _json_backend(name: str) -> Callable[[bytes], Any]:
+    if name == "json" or (name == "auto" and orjson is None):
+        return json.loads
+    if orjson is None:
+        raise RuntimeError("PAYLOAD_JSON_BACKEND=orjson but orjson is not installed")
+    return orjson.loads
+
+
+class PayloadCipher:
+    """
+    Dekripsi payload dari Laravel: base64(iv[12] + tag[16] + ciphertext), AES-256-GCM.
+    - Objek AESGCM untuk semua key aktif dibuat sekali (bukan per request).
+    - Beberapa key bisa aktif sekaligus (rotasi); key yang terakhir berhasil dicoba lebih dulu.
+    """
+
+    def __init__(self, keys: Sequence[bytes], json_loads: Callable[[bytes], Any] = json.loads):
+        if not keys:
+            raise ValueError("At least one key is required")
+        self._ciphers: List[AESGCM] = [AESGCM(key) for key in keys]
+        self._preferred = 0
+        self._loads = json_loads
+
+    @classmethod
+    def from_settings(cls) -> "PayloadCipher":
+        return cls(settings.SYNC_KEYS, _json_backend(settings.PAYLOAD_JSON_BACKEND))
+
+    def decrypt_bytes(self, encrypted_base64: str) -> bytes:
+        raw = memoryview(binascii.a2b_base64(encrypted_base64))
+        if len(raw) < HEADER_SIZE:
+            raise ValueError("Payload too short")
+        iv = raw[:IV_SIZE]
+        # Cryptography lib butuh tag di akhir ciphertext; satu kali copy via join
+        sealed = b"".join((raw[HEADER_SIZE:], raw[IV_SIZE:HEADER_SIZE]))
+
+        order = [self._preferred] + [i for i in range(len(self._ciphers)) if i != self._preferred]
+        for index in order:
+            try:
+                plaintext = self._ciphers[index].decrypt(iv, sealed, None)
+            except InvalidTag:
+                continue
+            if index != self._preferred:
+                self._preferred = index
+                if index:
+                    logger.info(f"Payload decrypted with previous key #{index}; sender has not rotated yet")
+            return plaintext
+        raise ValueError("No active key could decrypt the payload")
+
+    def decrypt(self, encrypted_base64: str) -> Any:
+        return self._loads(self.decrypt_bytes(encrypted_base64))
+
+    def encrypt(self, data: Any) -> str:
+        """
+        Kebalikan decrypt, selalu dengan key aktif (key lama hanya untuk decrypt).
+        Dipakai di produksi untuk menyimpan payload job di antrian durable (core/job_queue.py),
+        serta oleh tooling/benchmark untuk membuat request.
+        """
+        iv = os.urandom(IV_SIZE)
+        sealed = self._ciphers[0].encrypt(iv, json.dumps(data).encode("utf-8"), None)
+        return binascii.b2a_base64(iv + sealed[-TAG_SIZE:] + sealed[:-TAG_SIZE], newline=False).decode()
+
+
+_cipher: Optional[PayloadCipher] = None
+
+
+def get_cipher() -> PayloadCipher:
+    global _cipher
+    if _cipher is None:
+        _cipher = PayloadCipher.from_settings()
+    return _cipher
+
 
 def decrypt_payload(encrypted_base64: str) -> Dict[str, Any]:
     try:
-        raw_data = base64.b64decode(encrypted_base64)
-        iv = raw_data[:12]
-        tag = raw_data[12:28]
-        ciphertext = raw_data[28:]
-        
-        aesgcm = AESGCM(settings.SYNC_KEY_BYTES)
-        # Cryptography lib butuh tag di akhir ciphertext
-        decrypted_bytes = aesgcm.decrypt(iv, ciphertext + tag, None)
-        return json.loads(decrypted_bytes.decode('utf-8'))
+        with PHASE_SECONDS.time(phase="decrypt"):
+            return get_cipher().decrypt(encrypted_base64)
     except Exception as e:
         # Log error detailnya di server, tapi jangan kirim ke client demi keamanan
-        print(f"Security Error: {e}") 
-        raise ValueError("Invalid encrypted payload")
\ No newline at end of file
+        logger.warning(f"Security Error: {type(e).__name__}: {e}")
+        raise ValueError("Invalid encrypted payload")
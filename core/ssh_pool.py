@@ -0,0 +1,275 @@
+# core/ssh_pool.py
+import asyncio
+import hashlib
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from functools import partial
+from typing import Callable, Dict, List, Optional, Tuple
+
+import paramiko
+
+from .config import settings
+from .metrics import PHASE_SECONDS
+
+logger = logging.getLogger(__name__)
+
+PoolKey = Tuple[str, int, str, str]  # (server_ip, server_port, ssh_user, digest kredensial)
+CommandResult = Tuple[int, str, str]  # (exit_status, stdout, stderr)
+
+
+class PooledConnection:
+    """
+    Satu transport SSH (beserta channel SFTP-nya) yang bisa dipakai ulang.
+    Method async (`exec`, `stat`, `write_file`, ...) menjalankan operasi paramiko
+    yang blocking di executor milik pool, sehingga event loop tidak pernah tertahan.
+    """
+
+    def __init__(self, key: PoolKey, client: paramiko.SSHClient, executor: ThreadPoolExecutor):
+        self.key = key
+        self.client = client
+        self._executor = executor
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+        self.broken = False
+        self._sftp: Optional[paramiko.SFTPClient] = None
+
+    async def _run(self, fn: Callable, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, partial(fn, *args, **kwargs))
+
+    # --- Operasi sinkronus (dijalankan di thread executor) ---
+    def _open_sftp_sync(self) -> paramiko.SFTPClient:
+        """SFTP channel di-cache per koneksi, dibuka ulang jika sudah tertutup."""
+        if self._sftp is None or self._sftp.sock.closed:
+            self._sftp = self.client.open_sftp()
+        return self._sftp
+
+    def _exec_sync(self, command: str) -> CommandResult:
+        stdin, stdout, stderr = self.client.exec_command(command)
+        exit_status = stdout.channel.recv_exit_status()  # Tunggu command selesai
+        out_str = stdout.read().decode().strip()
+        err_str = stderr.read().decode().strip()
+        return exit_status, out_str, err_str
+
+    def _write_file_sync(self, path: str, content: str):
+        with self._open_sftp_sync().open(path, 'w') as f:
+            f.write(content)
+
+    def _write_files_sync(self, files: List[Tuple[str, str]]):
+        sftp = self._open_sftp_sync()
+        for path, content in files:
+            with sftp.open(path, 'w') as f:
+                # Pipelined: write tidak menunggu ack per chunk; close() menunggu semua ack sekaligus
+                f.set_pipelined(True)
+                f.write(content)
+
+    # --- API async untuk task ---
+    async def open_sftp(self) -> paramiko.SFTPClient:
+        return await self._run(self._open_sftp_sync)
+
+    async def exec(self, command: str) -> CommandResult:
+        """Jalankan command remote dan tunggu exit status-nya tanpa memblokir event loop."""
+        return await self._run(self._exec_sync, command)
+
+    async def stat(self, path: str) -> paramiko.SFTPAttributes:
+        sftp = await self.open_sftp()
+        return await self._run(sftp.stat, path)
+
+    async def write_file(self, path: str, content: str):
+        await self._run(self._write_file_sync, path, content)
+
+    async def write_files(self, files: List[Tuple[str, str]]):
+        """Upload beberapa file (path, content) dalam satu kali hop ke executor, dengan write pipelined."""
+        await self._run(self._write_files_sync, files)
+
+    def is_healthy(self) -> bool:
+        transport = self.client.get_transport()
+        if transport is None or not transport.is_active():
+            return False
+        try:
+            # Paket SSH_MSG_IGNORE: murah, dan gagal jika socket sudah putus
+            transport.send_ignore()
+        except Exception:
+            return False
+        return True
+
+    def close(self):
+        try:
+            if self._sftp is not None:
+                self._sftp.close()
+        except Exception:
+            pass
+        self.client.close()
+
+
+class _HostSlot:
+    def __init__(self, max_connections: int):
+        self.limit = asyncio.Semaphore(max_connections)
+        self.idle: List[PooledConnection] = []
+        self.users = 0  # Task yang sedang menunggu atau memakai koneksi slot ini
+
+
+def _credential_digest(ssh_pass: Optional[str]) -> str:
+    """Password tidak disimpan di key pool; digest cukup untuk membedakan kredensial."""
+    return hashlib.sha256((ssh_pass or "").encode("utf-8")).hexdigest()[:16]
+
+
+class SSHPool:
+    """
+    Pool transport SSH per (server_ip, server_port, ssh_user, kredensial).
+    - Koneksi idle dipakai ulang oleh task berikutnya ke server yang sama dengan kredensial yang sama
+      (password yang dirotasi tidak memakai transport yang diautentikasi dengan password lama).
+    - Jumlah koneksi per host dibatasi (task lain menunggu giliran).
+    - Koneksi idle terlalu lama ditutup, koneksi mati dibuang saat health check.
+    """
+
+    def __init__(
+        self,
+        max_per_host: int = 4,
+        idle_timeout: float = 300.0,
+        connect_timeout: float = 20.0,
+        executor_workers: int = 32,
+    ):
+        self.max_per_host = max_per_host
+        self.idle_timeout = idle_timeout
+        self.connect_timeout = connect_timeout
+        self._slots: Dict[PoolKey, _HostSlot] = {}
+        self._reaper: Optional[asyncio.Task] = None
+        self.closed = False
+        # Executor khusus SSH (terpisah dari default executor) agar deploy yang lambat
+        # tidak menghabiskan thread milik parsing PDF atau bagian lain aplikasi.
+        self._executor = ThreadPoolExecutor(max_workers=executor_workers, thread_name_prefix="ssh-io")
+
+    async def _run(self, fn: Callable, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, partial(fn, *args, **kwargs))
+
+    @classmethod
+    def from_settings(cls) -> "SSHPool":
+        return cls(
+            max_per_host=settings.SSH_POOL_MAX_PER_HOST,
+            idle_timeout=settings.SSH_POOL_IDLE_TIMEOUT,
+            connect_timeout=settings.SSH_CONNECT_TIMEOUT,
+            executor_workers=settings.SSH_EXECUTOR_WORKERS,
+        )
+
+    def _slot(self, key: PoolKey) -> _HostSlot:
+        slot = self._slots.get(key)
+        if slot is None:
+            slot = self._slots[key] = _HostSlot(self.max_per_host)
+        return slot
+
+    @asynccontextmanager
+    async def acquire(self, server_ip: str, server_port: int, ssh_user: str, ssh_pass: Optional[str]):
+        """
+        Pinjam koneksi untuk satu task. Koneksi dikembalikan ke pool setelah selesai,
+        atau ditutup jika task gagal/dibatalkan di tengah jalan (thread executor mungkin
+        masih memakai channel-nya, jadi status transport tidak bisa dipercaya).
+        """
+        self._ensure_reaper()
+        key = (server_ip, int(server_port), ssh_user, _credential_digest(ssh_pass))
+        slot = self._slot(key)
+
+        slot.users += 1
+        try:
+            async with slot.limit:
+                conn = await self._checkout(key, slot, ssh_pass)
+                try:
+                    yield conn
+                except BaseException:
+                    conn.broken = True
+                    raise
+                finally:
+                    await self._checkin(slot, conn)
+        finally:
+            slot.users -= 1
+            self._prune_slot(key, slot)
+
+    def _prune_slot(self, key: PoolKey, slot: _HostSlot):
+        """Slot tanpa koneksi idle dan tanpa pemakai dilepas agar dict tidak tumbuh per host selamanya."""
+        if slot.users == 0 and not slot.idle and self._slots.get(key) is slot:
+            del self._slots[key]
+
+    async def _checkout(self, key: PoolKey, slot: _HostSlot, ssh_pass: Optional[str]) -> PooledConnection:
+        while slot.idle:
+            conn = slot.idle.pop()
+            if await self._run(conn.is_healthy):
+                logger.debug(f"Reusing SSH transport to {key[0]}:{key[1]} as {key[2]}")
+                return conn
+            logger.info(f"Discarding dead SSH transport to {key[0]}:{key[1]}")
+            await self._run(conn.close)
+        return await self._connect(key, ssh_pass)
+
+    async def _connect(self, key: PoolKey, ssh_pass: Optional[str]) -> PooledConnection:
+        server_ip, server_port, ssh_user, _ = key
+        client = paramiko.SSHClient()
+        client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+        try:
+            with PHASE_SECONDS.time(phase="ssh_connect"):
+                await self._run(
+                    client.connect,
+                    hostname=server_ip,
+                    port=server_port,
+                    username=ssh_user,
+                    password=ssh_pass,
+                    timeout=self.connect_timeout,
+                )
+        except BaseException:
+            client.close()
+            raise
+        return PooledConnection(key, client, self._executor)
+
+    async def _checkin(self, slot: _HostSlot, conn: PooledConnection):
+        if conn.broken:
+            await self._run(conn.close)
+            return
+        conn.last_used = time.monotonic()
+        slot.idle.append(conn)
+
+    # --- Idle Eviction ---
+    def _ensure_reaper(self):
+        if self._reaper is None or self._reaper.done():
+            self._reaper = asyncio.create_task(self._reap_forever(), name="ssh-pool-reaper")
+
+    async def _reap_forever(self):
+        interval = max(1.0, self.idle_timeout / 4)
+        while True:
+            await asyncio.sleep(interval)
+            await self.evict_idle()
+
+    async def evict_idle(self):
+        now = time.monotonic()
+        expired: List[PooledConnection] = []
+        for key, slot in list(self._slots.items()):
+            keep = [c for c in slot.idle if now - c.last_used < self.idle_timeout]
+            expired.extend(c for c in slot.idle if c not in keep)
+            slot.idle = keep
+            self._prune_slot(key, slot)
+        for conn in expired:
+            logger.debug(f"Closing idle SSH transport to {conn.key[0]}:{conn.key[1]}")
+            await self._run(conn.close)
+
+    async def close(self):
+        self.closed = True
+        if self._reaper is not None:
+            self._reaper.cancel()
+            self._reaper = None
+        for slot in self._slots.values():
+            for conn in slot.idle:
+                await self._run(conn.close)
+            slot.idle.clear()
+        self._slots.clear()
+        # Thread yang masih menjalankan operasi paramiko tidak ditunggu (shutdown tidak tertahan)
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+_pool: Optional[SSHPool] = None
+
+
+def get_ssh_pool() -> SSHPool:
+    global _pool
+    if _pool is None or _pool.closed:
+        _pool = SSHPool.from_settings()
+    return _pool
@@ -0,0 +1,351 @@
+# core/task_store.py
+"""
+Status task di sisi engine: disimpan di memori, dipersist ke SQLite.
+- Setiap task punya task_id (untuk polling GET /api/v1/tasks/{task_id}) dan idempotency key.
+- Request duplikat (retry Laravel setelah timeout) ditempelkan ke task yang sedang berjalan
+  atau yang baru saja selesai dengan sukses, bukan dijalankan ulang (mencegah restart web server
+  dua kali). Task yang gagal boleh dikirim ulang.
+- Mode shared (antrian job durable aktif, lihat core/job_queue.py): SQLite menjadi sumber
+  kebenaran bersama untuk semua worker uvicorn, karena task bisa di-claim di satu worker
+  dan dijalankan di worker lain.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from dataclasses import asdict, dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from .config import settings
+from .progress import current_task_id, get_progress_hub
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "QUEUED"
+RUNNING = "RUNNING"
+ACTIVE_STATUSES = (QUEUED, RUNNING)
+# Hanya task yang berhasil yang menyerap retry; task gagal boleh dikirim ulang dan dijalankan lagi
+SUCCEEDED_STATUSES = ("SUCCESS", "DONE")
+INTERRUPTED = "INTERRUPTED"  # Masih aktif saat engine sebelumnya berhenti
+DEAD = "DEAD"                # Job dipindah ke dead-letter setelah percobaan habis
+
+
+@dataclass
+class TaskRecord:
+    task_id: str
+    idempotency_key: str
+    task_type: str
+    log_id: Any
+    status: str = QUEUED
+    created_at: float = 0.0
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    duplicates: int = 0  # Jumlah request duplikat yang ditempelkan ke task ini
+
+    @property
+    def active(self) -> bool:
+        return self.status in ACTIVE_STATUSES
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def idempotency_key(payload: Dict[str, Any]) -> str:
+    """
+    Key eksplisit `idempotency_key` di payload, atau `log_id`, atau hash isi `data`.
+    Selalu diawali tipe task agar tidak bentrok antar tipe.
+    """
+    task_type = payload.get("task")
+    if payload.get("idempotency_key"):
+        return f"{task_type}:key:{payload['idempotency_key']}"
+    if payload.get("log_id") is not None:
+        return f"{task_type}:log:{payload['log_id']}"
+    canonical = json.dumps(payload.get("data", {}), sort_keys=True, separators=(",", ":"), default=str)
+    return f"{task_type}:sha256:{hashlib.sha256(canonical.encode('utf-8')).hexdigest()}"
+
+
+class TaskStore:
+    COLUMNS = ("task_id", "idempotency_key", "task_type", "log_id", "status",
+               "created_at", "started_at", "finished_at", "duplicates")
+
+    def __init__(self, db_path: Optional[str] = None, dedup_window: float = 600.0, retention_days: float = 7.0,
+                 shared: bool = False):
+        self.db_path = db_path
+        self.dedup_window = dedup_window
+        self.retention_days = retention_days
+        self.shared = shared and bool(db_path)
+        self._by_id: Dict[str, TaskRecord] = {}
+        self._by_key: Dict[str, TaskRecord] = {}
+        self._next_prune = 0.0
+        self._lock = threading.RLock()  # Dipakai dari thread asyncio.to_thread dan threadpool endpoint
+        self._db: Optional[sqlite3.Connection] = None
+        if db_path:
+            self._open_db(db_path)
+
+    @classmethod
+    def from_settings(cls) -> "TaskStore":
+        return cls(
+            db_path=settings.TASK_STORE_PATH or None,
+            dedup_window=settings.TASK_DEDUP_WINDOW,
+            retention_days=settings.TASK_STORE_RETENTION_DAYS,
+            shared=bool(settings.JOB_QUEUE_PATH),
+        )
+
+    # --- Persistence ---
+    def _open_db(self, db_path: str):
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._db = sqlite3.connect(db_path, isolation_level=None, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")  # Cukup aman untuk status; jauh lebih cepat
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS tasks ("
+            " task_id TEXT PRIMARY KEY, idempotency_key TEXT NOT NULL, task_type TEXT, log_id TEXT,"
+            " status TEXT NOT NULL, created_at REAL, started_at REAL, finished_at REAL, duplicates INTEGER DEFAULT 0)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS tasks_key ON tasks (idempotency_key, created_at)")
+
+        now = time.time()
+        self._db.execute("DELETE FROM tasks WHERE created_at < ?", (now - self.retention_days * 86400,))
+        if self.shared:
+            # Task yang belum selesai tetap ada di antrian job dan akan dijalankan ulang
+            return
+        # Antrian scheduler ada di memori: task yang belum selesai saat restart tidak akan berjalan lagi
+        interrupted = self._db.execute(
+            "UPDATE tasks SET status = ?, finished_at = ? WHERE status IN (?, ?)",
+            (INTERRUPTED, now, *ACTIVE_STATUSES),
+        ).rowcount
+        if interrupted:
+            logger.warning(f"Marked {interrupted} unfinished task(s) from the previous run as {INTERRUPTED}.")
+
+        # Task yang baru selesai dengan sukses tetap dipakai untuk deduplikasi setelah restart
+        rows = self._db.execute(
+            f"SELECT {', '.join(self.COLUMNS)} FROM tasks WHERE finished_at >= ? AND status IN (?, ?)",
+            (now - self.dedup_window, *SUCCEEDED_STATUSES),
+        ).fetchall()
+        for row in rows:
+            self._remember(self._from_row(row))
+
+    def _from_row(self, row) -> TaskRecord:
+        record = TaskRecord(**dict(zip(self.COLUMNS, row)))
+        # log_id disimpan sebagai JSON agar tipenya (int/str) kembali seperti yang dikirim Laravel
+        if record.log_id is not None:
+            try:
+                record.log_id = json.loads(record.log_id)
+            except ValueError:
+                pass  # Baris lama: string mentah
+        return record
+
+    def _persist(self, record: TaskRecord):
+        if self._db is None:
+            return
+        values = [getattr(record, c) for c in self.COLUMNS]
+        values[3] = None if record.log_id is None else json.dumps(record.log_id)
+        self._db.execute(
+            f"INSERT OR REPLACE INTO tasks ({', '.join(self.COLUMNS)}) VALUES ({', '.join('?' * len(self.COLUMNS))})",
+            values,
+        )
+
+    def _update(self, record: TaskRecord, *columns: str):
+        """
+        Tulis hanya kolom yang diubah: di mode shared record di memori bisa basi (worker lain menambah
+        `duplicates` sementara task berjalan), jadi INSERT OR REPLACE seluruh baris akan menimpanya.
+        """
+        if self._db is None:
+            return
+        with self._lock:
+            self._db.execute(
+                f"UPDATE tasks SET {', '.join(f'{c} = ?' for c in columns)} WHERE task_id = ?",
+                [getattr(record, c) for c in columns] + [record.task_id],
+            )
+
+    def _latest_for_key(self, key: str) -> Optional[TaskRecord]:
+        row = self._db.execute(
+            f"SELECT {', '.join(self.COLUMNS)} FROM tasks WHERE idempotency_key = ? ORDER BY created_at DESC LIMIT 1",
+            (key,),
+        ).fetchone()
+        return self._from_row(row) if row else None
+
+    def _publish(self, record: TaskRecord):
+        # Perubahan status juga menjadi event progress (stream SSE)
+        get_progress_hub().status(record.task_id, record.status, final=not record.active)
+
+    # --- Memory ---
+    def _remember(self, record: TaskRecord):
+        self._by_id[record.task_id] = record
+        self._by_key[record.idempotency_key] = record
+
+    def _forget(self, record: TaskRecord):
+        self._by_id.pop(record.task_id, None)
+        if self._by_key.get(record.idempotency_key) is record:
+            del self._by_key[record.idempotency_key]
+
+    def _prune(self, now: float):
+        """Task selesai yang sudah lewat jendela dedup dilepas dari memori (tetap ada di SQLite)."""
+        if now < self._next_prune:
+            return
+        self._next_prune = now + min(60.0, self.dedup_window)
+        expired = [r for r in self._by_id.values()
+                   if not r.active and r.finished_at is not None and now - r.finished_at > self.dedup_window]
+        for record in expired:
+            self._forget(record)
+
+    # --- Public API ---
+    # Method async menjalankan SQLite di thread (BEGIN IMMEDIATE bisa menunggu worker lain sampai
+    # busy timeout) lalu mem-publish perubahan status di event loop. Method sinkronus thread-safe.
+    async def claim(self, payload: Dict[str, Any]) -> Tuple[TaskRecord, bool]:
+        """
+        Return (record, created). created=False berarti request ini duplikat dari task
+        yang masih aktif atau sukses dalam jendela dedup; task tidak boleh dijalankan lagi.
+        """
+        return (await self.claim_many([payload]))[0]
+
+    async def claim_many(self, payloads: List[Dict[str, Any]]) -> List[Tuple[TaskRecord, bool]]:
+        """Claim beberapa payload dalam satu transaksi (request batch). Hasil sejajar dengan payloads."""
+        if not payloads:
+            return []
+        results = await asyncio.to_thread(self._claim_many_sync, payloads)
+        for record, created in results:
+            if created:
+                self._publish(record)
+        return results
+
+    def _claim_many_sync(self, payloads: List[Dict[str, Any]]) -> List[Tuple[TaskRecord, bool]]:
+        with self._lock:
+            if not self.shared:
+                return [self._claim(payload) for payload in payloads]
+            # Cek + insert atomik terhadap worker lain yang memakai file yang sama
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                results = [self._claim(payload) for payload in payloads]
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+            self._db.execute("COMMIT")
+            return results
+
+    def _claim(self, payload: Dict[str, Any]) -> Tuple[TaskRecord, bool]:
+        now = time.time()
+        key = idempotency_key(payload)
+        if self.shared:
+            existing = self._latest_for_key(key)
+        else:
+            self._prune(now)
+            existing = self._by_key.get(key)
+        if existing is not None and (existing.active or (
+                existing.status in SUCCEEDED_STATUSES and now - existing.finished_at <= self.dedup_window)):
+            existing.duplicates += 1
+            if self._db is not None:
+                self._db.execute("UPDATE tasks SET duplicates = duplicates + 1 WHERE task_id = ?",
+                                 (existing.task_id,))
+            logger.info(f"Duplicate request for {key} attached to task {existing.task_id} ({existing.status}).")
+            return existing, False
+
+        record = TaskRecord(
+            task_id=uuid.uuid4().hex,
+            idempotency_key=key,
+            task_type=payload.get("task"),
+            log_id=payload.get("log_id"),
+            created_at=now,
+        )
+        if not self.shared:
+            self._remember(record)
+        self._persist(record)
+        return record, True
+
+    async def attach(self, task_id: str, payload: Dict[str, Any]) -> TaskRecord:
+        """Record untuk job yang di-claim di worker lain (atau sebelum restart); dibuat ulang jika sudah hilang."""
+        return await asyncio.to_thread(self._attach_sync, task_id, payload)
+
+    def _attach_sync(self, task_id: str, payload: Dict[str, Any]) -> TaskRecord:
+        with self._lock:
+            record = self.get(task_id)
+            if record is None:
+                record = TaskRecord(
+                    task_id=task_id,
+                    idempotency_key=idempotency_key(payload),
+                    task_type=payload.get("task"),
+                    log_id=payload.get("log_id"),
+                    created_at=time.time(),
+                )
+                if not self.shared:
+                    self._remember(record)
+                self._persist(record)
+            return record
+
+    async def release(self, *records: TaskRecord):
+        """Batalkan claim (misal antrian penuh) agar retry berikutnya bisa membuat task baru."""
+        if records:
+            await asyncio.to_thread(self._release_sync, records)
+
+    def _release_sync(self, records: Tuple[TaskRecord, ...]):
+        with self._lock:
+            for record in records:
+                self._forget(record)
+            if self._db is not None:
+                self._db.executemany("DELETE FROM tasks WHERE task_id = ?", [(r.task_id,) for r in records])
+
+    async def mark_queued(self, record: TaskRecord):
+        """Task kembali ke antrian (retry job atau lease dilepas saat shutdown)."""
+        record.status = QUEUED
+        record.started_at = None
+        await self._save_status(record, "started_at")
+
+    async def mark_running(self, record: TaskRecord):
+        record.status = RUNNING
+        record.started_at = time.time()
+        await self._save_status(record, "started_at")
+
+    async def mark_finished(self, record: TaskRecord, status: str):
+        record.status = status
+        record.finished_at = time.time()
+        await self._save_status(record, "finished_at")
+
+    async def _save_status(self, record: TaskRecord, timestamp: str):
+        self._publish(record)  # Subscriber SSE tidak perlu menunggu SQLite
+        await asyncio.to_thread(self._update, record, "status", timestamp)
+
+    def get(self, task_id: str) -> Optional[TaskRecord]:
+        """Sinkronus: dari event loop panggil lewat asyncio.to_thread (mode shared selalu membaca SQLite)."""
+        with self._lock:
+            record = None if self.shared else self._by_id.get(task_id)
+            if record is None and self._db is not None:
+                row = self._db.execute(
+                    f"SELECT {', '.join(self.COLUMNS)} FROM tasks WHERE task_id = ?", (task_id,)
+                ).fetchone()
+                record = self._from_row(row) if row else None
+            return record
+
+    def tracked(self, record: TaskRecord, handler: Callable[[Dict[str, Any]], Awaitable[Any]]):
+        """Bungkus handler task agar status RUNNING/selesai tercatat di store."""
+        async def run(payload: Dict[str, Any]):
+            current_task_id.set(record.task_id)
+            await self.mark_running(record)
+            status = "ERROR"
+            try:
+                result = await handler(payload)
+                status = result if isinstance(result, str) else "DONE"
+                return result
+            finally:
+                await self.mark_finished(record, status)
+        return run
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+
+_store: Optional[TaskStore] = None
+
+
+def get_task_store() -> TaskStore:
+    global _store
+    if _store is None:
+        _store = TaskStore.from_settings()
+    return _store
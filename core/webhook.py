@@ -0,0 +1,294 @@
+# core/webhook.py
+import asyncio
+import logging
+import random
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+from .config import settings
+from .metrics import PHASE_SECONDS, WEBHOOK_REPORTS
+
+logger = logging.getLogger(__name__)
+
+# Status code yang layak dicoba ulang (server sibuk / error sementara)
+RETRYABLE_STATUS = {408, 425, 429, 500, 502, 503, 504}
+# Status code yang menandakan endpoint batch tidak tersedia di Laravel
+BATCH_UNSUPPORTED_STATUS = {404, 405, 501}
+
+
+@dataclass
+class _Report:
+    payload: Dict[str, Any]
+    attempts: int = 0
+    delivered: Optional[asyncio.Future] = None  # True jika diterima Laravel, False jika ditolak / dibuang
+
+    def settle(self, ok: bool):
+        if self.delivered is not None and not self.delivered.done():
+            self.delivered.set_result(ok)
+
+
+class WebhookReporter:
+    """
+    Reporter webhook tunggal untuk seluruh aplikasi.
+    Memegang satu httpx.AsyncClient (keep-alive, pooled) selama hidupnya,
+    mengantrikan laporan, mengirim secara batch jika Laravel mendukung,
+    dan mencoba ulang dengan exponential backoff jika gagal.
+    """
+
+    def __init__(
+        self,
+        webhook_url: str,
+        secret_token: str,
+        batch_url: Optional[str] = None,
+        batch_size: int = 50,
+        flush_interval: float = 0.2,
+        max_retries: int = 5,
+        backoff_base: float = 1.0,
+        backoff_max: float = 30.0,
+        timeout: float = 10.0,
+        max_connections: int = 20,
+        queue_size: int = 10_000,
+    ):
+        self.webhook_url = webhook_url
+        self.batch_url = batch_url
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self.queue_size = queue_size
+        self.headers = {
+            'X-Engine-Secret': secret_token,
+            'Accept': 'application/json',
+        }
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._client: Optional[httpx.AsyncClient] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._retry_tasks: Dict[asyncio.Task, _Report] = {}  # Laporan yang sedang menunggu backoff
+
+    @classmethod
+    def from_settings(cls) -> "WebhookReporter":
+        return cls(
+            webhook_url=settings.TIARA_WEBHOOK_URL,
+            secret_token=settings.TIARA_SYNC_KEY,
+            batch_url=settings.WEBHOOK_BATCH_URL,
+            batch_size=settings.WEBHOOK_BATCH_SIZE,
+            flush_interval=settings.WEBHOOK_FLUSH_INTERVAL,
+            max_retries=settings.WEBHOOK_MAX_RETRIES,
+            backoff_base=settings.WEBHOOK_BACKOFF_BASE,
+            backoff_max=settings.WEBHOOK_BACKOFF_MAX,
+            timeout=settings.WEBHOOK_TIMEOUT,
+            max_connections=settings.WEBHOOK_MAX_CONNECTIONS,
+            queue_size=settings.WEBHOOK_QUEUE_SIZE,
+        )
+
+    # --- Lifecycle ---
+    @property
+    def running(self) -> bool:
+        return self._worker is not None and not self._worker.done()
+
+    async def start(self):
+        if self.running:
+            return
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        limits = httpx.Limits(
+            max_connections=self.max_connections,
+            max_keepalive_connections=self.max_connections,
+        )
+        self._client = httpx.AsyncClient(limits=limits, timeout=self.timeout, headers=self.headers)
+        self._worker = asyncio.create_task(self._run(), name="webhook-reporter")
+        logger.info("Webhook reporter started.")
+
+    async def stop(self, drain_timeout: float = 10.0):
+        """
+        Kirim sisa antrian (best effort) lalu tutup koneksi. Laporan yang sedang menunggu backoff
+        retry dicoba sekali lagi tanpa jeda; yang tetap gagal dicatat per log_id.
+        """
+        if not self.running:
+            return
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout=drain_timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Webhook reporter stopped with {self._queue.qsize()} report(s) still queued.")
+
+        self._worker.cancel()
+        try:
+            await self._worker
+        except asyncio.CancelledError:
+            pass
+
+        # Sisa antrian + laporan di backoff: satu percobaan terakhir
+        waiting = list(self._retry_tasks.items())
+        for task, _ in waiting:
+            task.cancel()
+        await asyncio.gather(*(task for task, _ in waiting), return_exceptions=True)
+        leftover = [item for task, item in waiting if task.cancelled()]
+        while not self._queue.empty():
+            leftover.append(self._queue.get_nowait())
+            self._queue.task_done()
+        if leftover:
+            await self._final_attempt(leftover, drain_timeout)
+
+        await self._client.aclose()
+        self._worker = None
+        self._client = None
+        logger.info("Webhook reporter stopped.")
+
+    # --- Public API ---
+    async def report(self, log_id: Any, status: str, output_log: str, **extra: Any) -> asyncio.Future:
+        """
+        Antrikan satu laporan status. Tidak menunggu pengiriman selesai; future yang dikembalikan
+        selesai dengan True setelah Laravel menerima laporan, atau False jika ditolak / dibuang.
+        """
+        if not self.running:
+            await self.start()
+        payload = {
+            "log_id": log_id,
+            "status": status,          # 'SUCCESS' atau 'FAILED'
+            "output_log": output_log,  # Log lengkap untuk debugging di UI Laravel
+        }
+        payload.update(extra)
+        item = _Report(payload, delivered=asyncio.get_running_loop().create_future())
+        await self._queue.put(item)
+        return item.delivered
+
+    def pending(self) -> int:
+        return self._queue.qsize() if self._queue else 0
+
+    # --- Worker ---
+    async def _run(self):
+        while True:
+            first = await self._queue.get()
+            batch = [first]
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + self.flush_interval
+
+            # Kumpulkan laporan lain yang datang dalam jendela flush
+            while len(batch) < self.batch_size:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout=remaining))
+                except asyncio.TimeoutError:
+                    break
+
+            try:
+                await self._deliver(batch)
+            except Exception as e:
+                logger.error(f"Unexpected webhook reporter error: {e}")
+                for item in batch:
+                    self._schedule_retry(item)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    async def _deliver(self, batch: List[_Report]):
+        if self.batch_url and len(batch) > 1:
+            delivered = await self._send_batch(batch)
+            if delivered:
+                return
+        results = await asyncio.gather(*(self._send_one(item) for item in batch))
+        for item, ok in zip(batch, results):
+            if not ok:
+                self._schedule_retry(item)
+
+    async def _send_batch(self, batch: List[_Report]) -> bool:
+        """Return True jika batch terkirim. False berarti fallback ke pengiriman satu per satu."""
+        try:
+            with PHASE_SECONDS.time(phase="webhook_delivery"):
+                response = await self._client.post(self.batch_url, json={"reports": [i.payload for i in batch]})
+        except httpx.HTTPError as e:
+            logger.warning(f"Batch webhook failed ({len(batch)} reports): {e}")
+            return False
+
+        if response.is_success:
+            logger.info(f"Successfully reported {len(batch)} statuses in one batch.")
+            WEBHOOK_REPORTS.inc(len(batch), outcome="delivered")
+            for item in batch:
+                item.settle(True)
+            return True
+        if response.status_code in BATCH_UNSUPPORTED_STATUS:
+            logger.warning(f"Laravel does not accept batch reports (Code {response.status_code}). Disabling batch mode.")
+            self.batch_url = None
+        else:
+            logger.warning(f"Batch webhook rejected. Code: {response.status_code}, Body: {response.text}")
+        return False
+
+    async def _send_one(self, item: _Report) -> bool:
+        log_id = item.payload.get("log_id")
+        try:
+            with PHASE_SECONDS.time(phase="webhook_delivery"):
+                response = await self._client.post(self.webhook_url, json=item.payload)
+        except httpx.HTTPError as e:
+            logger.warning(f"Error reporting to webhook for {log_id}: {e}")
+            return False
+
+        if response.is_success:
+            logger.info(f"Successfully reported status for {log_id}")
+            WEBHOOK_REPORTS.inc(outcome="delivered")
+            item.settle(True)
+            return True
+        if response.status_code in RETRYABLE_STATUS:
+            logger.warning(f"Webhook busy for {log_id}. Code: {response.status_code}")
+            return False
+
+        # 4xx lain tidak akan berhasil walau dicoba ulang
+        logger.error(f"Webhook rejected report for {log_id}. Code: {response.status_code}, Body: {response.text}")
+        WEBHOOK_REPORTS.inc(outcome="rejected")
+        item.settle(False)
+        return True
+
+    async def _final_attempt(self, items: List[_Report], timeout: float):
+        logger.info(f"Flushing {len(items)} pending webhook report(s) before shutdown.")
+        try:
+            results = await asyncio.wait_for(asyncio.gather(*(self._send_one(item) for item in items)), timeout)
+        except asyncio.TimeoutError:
+            results = [False] * len(items)
+        for item, ok in zip(items, results):
+            if not ok:
+                logger.error(f"Dropping report for {item.payload.get('log_id')} "
+                             f"(status {item.payload.get('status')}) at shutdown.")
+                WEBHOOK_REPORTS.inc(outcome="dropped")
+                item.settle(False)
+
+    def _schedule_retry(self, item: _Report):
+        item.attempts += 1
+        if item.attempts > self.max_retries:
+            logger.error(f"Dropping report for {item.payload.get('log_id')} after {self.max_retries} retries.")
+            WEBHOOK_REPORTS.inc(outcome="dropped")
+            item.settle(False)
+            return
+        delay = min(self.backoff_max, self.backoff_base * (2 ** (item.attempts - 1)))
+        delay *= random.uniform(0.5, 1.0)  # Jitter agar retry tidak serempak
+        task = asyncio.create_task(self._requeue_later(item, delay))
+        self._retry_tasks[task] = item
+        task.add_done_callback(lambda t: self._retry_tasks.pop(t, None))
+
+    async def _requeue_later(self, item: _Report, delay: float):
+        await asyncio.sleep(delay)
+        await self._queue.put(item)
+
+
+_reporter: Optional[WebhookReporter] = None
+
+
+def get_reporter() -> WebhookReporter:
+    global _reporter
+    if _reporter is None:
+        _reporter = WebhookReporter.from_settings()
+    return _reporter
+
+
+async def report_status_to_laravel(log_id: Any, status: str, output_log: str, **extra: Any) -> asyncio.Future:
+    """
+    Fungsi bantu untuk mengirim laporan balik ke Laravel via Webhook.
+    Laporan diantrikan ke reporter global dan dikirim di background; `await` pada future yang
+    dikembalikan untuk menunggu konfirmasi pengiriman (True = diterima Laravel).
+    """
+    return await get_reporter().report(log_id, status, output_log, **extra)
@@ -1,31 +1,113 @@
 # main.py
+import asyncio
+import json
 import logging
-from fastapi import FastAPI, HTTPException, BackgroundTasks
+import sys
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from typing import Any, Dict, List, Optional, Tuple
 from pydantic import BaseModel
-from core.security import decrypt_payload
-from modules import get_task_handler
+from core.config import settings
+from core.security import decrypt_payload, get_cipher
+from modules import TASK_REGISTRY, check_task_enabled, load_task_handler
 from core.logging_config import setup_logging  # <--- 1. Import ini
+from core.webhook import get_reporter
+from core.scheduler import QueueFullError, get_scheduler
+from core.metrics import HTTP_REQUESTS, render_metrics
+from core.task_store import get_task_store
+from core.progress import get_progress_hub
+from core.job_queue import get_job_consumer, get_job_queue, job_queue_enabled
+from modules.deployment_parser.worker_pool import get_extraction_pool
+from modules.deployment_parser.index import get_service_index, service_index_enabled
+from modules.deployment_parser.router import router as services_router
 
 # 2. Setup Logging di awal
 setup_logging()
 logger = logging.getLogger(__name__)
 
-app = FastAPI(title="TIARA Engine Base")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Reporter webhook hidup selama aplikasi berjalan (koneksi keep-alive ke Laravel)
+    await get_reporter().start()
+    await get_scheduler().start()
+    if settings.TASK_PRELOAD:
+        TASK_REGISTRY.preload()
+    # Worker PDF hanya disiapkan jika node ini melayani deployment_parse / deployment_parse_bulk
+    if TASK_REGISTRY.is_enabled("deployment_parse") or TASK_REGISTRY.is_enabled("deployment_parse_bulk"):
+        await get_extraction_pool().start()
+    logger.info(f"Enabled tasks: {', '.join(TASK_REGISTRY)}")
+    if job_queue_enabled():
+        await get_job_consumer().start()
+    yield
+    if job_queue_enabled():
+        await get_job_consumer().stop()
+    await get_scheduler().stop()
+    if job_queue_enabled():
+        # Job yang belum selesai dikembalikan ke antrian untuk worker lain / setelah restart
+        get_job_consumer().release_held()
+        get_job_queue().close()
+    get_extraction_pool().shutdown()
+    # Pool SSH (dan paramiko) hanya ada jika handler ssl_updater pernah dimuat
+    ssh_pool = sys.modules.get("core.ssh_pool")
+    if ssh_pool is not None:
+        await ssh_pool.get_ssh_pool().close()
+    await get_reporter().stop()
+    get_task_store().close()
+    if service_index_enabled():
+        get_service_index().close()
+    # Checkpoint bulk hanya ada jika handler deployment_parse_bulk pernah dimuat
+    bulk = sys.modules.get("modules.deployment_parser.bulk")
+    if bulk is not None:
+        bulk.close_bulk_checkpoint()
+
+app = FastAPI(title="TIARA Engine Base", lifespan=lifespan)
+app.include_router(services_router)
+
+@app.middleware("http")
+async def count_requests(request: Request, call_next):
+    response = await call_next(request)
+    # Pakai template route (bukan path mentah) agar label tidak meledak
+    route = getattr(request.scope.get("route"), "path", "unmatched")
+    HTTP_REQUESTS.inc(route=route, code=str(response.status_code))
+    return response
 
 class EncryptedRequest(BaseModel):
     payload: str
 
+class EncryptedBatchRequest(BaseModel):
+    # Salah satu: list payload terenkripsi, atau satu payload terenkripsi berisi array task
+    payloads: Optional[List[str]] = None
+    payload: Optional[str] = None
+
 @app.post("/api/v1/execute")
-async def execute_task(req: EncryptedRequest, background_tasks: BackgroundTasks):
+async def execute_task(req: EncryptedRequest):
     try:
         data = decrypt_payload(req.payload)
         task_type = data.get('task')
         logger.info(f"Received task request: {task_type}") # <--- Contoh log
 
-        task_handler = get_task_handler(task_type)
-        background_tasks.add_task(task_handler, data)
+        _check_task_type(task_type)
+
+        # Retry dari Laravel untuk task yang sama ditempelkan ke task yang sudah ada
+        store = get_task_store()
+        record, created = await store.claim(data)
+        if created:
+            try:
+                error = (await _submit_many([(task_type, record, data)]))[0]
+            except BaseException:
+                # Claim yang tidak pernah masuk antrian akan memblokir retry Laravel sebagai duplikat
+                await store.release(record)
+                raise
+            if error is not None:
+                await store.release(record)
+                raise error
 
-        return {"status": "accepted", "task": task_type}
+        return {"status": "accepted", "task": task_type, **_task_ref(record, created)}
+
+    except QueueFullError as e:
+        logger.warning(f"Rejecting task, queue full: {e}")
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(e.retry_after)})
 
     except ValueError as e:
         logger.warning(f"Invalid payload received: {e}") # <--- Log warning
@@ -34,6 +116,179 @@ async def execute_task(req: EncryptedRequest, background_tasks: BackgroundTasks)
         logger.exception("Internal Engine Error") # <--- Log error dengan stack trace
         raise HTTPException(status_code=500, detail="Internal Engine Error")
 
+def _check_task_type(task_type: str):
+    """
+    Antrian durable: cukup terdaftar, job bisa diambil node lain yang melayani tipe ini.
+    Tanpa antrian durable: handler harus aktif di node ini. Raise ValueError jika tidak.
+    """
+    if job_queue_enabled() and TASK_REGISTRY.is_registered(task_type):
+        return
+    check_task_enabled(task_type)
+
+async def _submit_many(entries: List[Tuple[str, Any, Dict[str, Any]]]) -> List[Optional[QueueFullError]]:
+    """Entry (task_type, TaskRecord, data). Return list sejajar: None jika diterima, QueueFullError jika ditolak."""
+    if job_queue_enabled():
+        cipher = get_cipher()
+        # Dienkripsi ulang dengan key aktif: job tetap bisa dibaca setelah rotasi key selesai
+        # Di thread: transaksi SQLite bisa menunggu kunci tulis worker lain
+        jobs = await asyncio.to_thread(
+            get_job_queue().enqueue_many, [(t, cipher.encrypt(data), r.task_id) for t, r, data in entries]
+        )
+        get_job_consumer().notify()
+        return [job if isinstance(job, QueueFullError) else None for job in jobs]
+    # Masuk antrian scheduler (dibatasi per tipe task), bukan BackgroundTasks tanpa batas
+    store = get_task_store()
+    handlers = [await load_task_handler(t) for t, _, _ in entries]
+    return get_scheduler().submit_many(
+        [(t, store.tracked(r, handler), data) for (t, r, data), handler in zip(entries, handlers)]
+    )
+
+def _task_ref(record, created: bool) -> Dict[str, Any]:
+    return {"task_id": record.task_id, "task_status": record.status, "duplicate": not created}
+
+def _decrypt_batch(req: EncryptedBatchRequest) -> List[Any]:
+    """Return list item (dict task hasil dekripsi, atau ValueError untuk item yang gagal didekripsi)."""
+    if (req.payloads is None) == (req.payload is None):
+        raise ValueError("Provide exactly one of 'payloads' or 'payload'")
+
+    if req.payload is not None:
+        # Satu payload terenkripsi berisi array: sekali decode + decrypt + parse untuk semua task
+        items = decrypt_payload(req.payload)
+        if not isinstance(items, list):
+            raise ValueError("Encrypted batch payload must be a JSON array")
+        _check_batch_size(len(items))
+        return items
+
+    _check_batch_size(len(req.payloads))
+    items = []
+    for encrypted in req.payloads:
+        try:
+            items.append(decrypt_payload(encrypted))
+        except ValueError as e:
+            items.append(e)
+    return items
+
+def _check_batch_size(count: int):
+    if count > settings.EXECUTE_BATCH_MAX_ITEMS:
+        raise ValueError(f"Batch too large ({count} > {settings.EXECUTE_BATCH_MAX_ITEMS} items)")
+
+@app.post("/api/v1/execute/batch")
+async def execute_batch(req: EncryptedBatchRequest):
+    try:
+        items = _decrypt_batch(req)
+    except ValueError as e:
+        logger.warning(f"Invalid batch payload received: {e}")
+        raise HTTPException(status_code=400, detail=str(e))
+
+    store = get_task_store()
+    results: List[Dict[str, Any]] = []
+    valid = []      # (index, task_type, data) yang lolos validasi
+    for index, data in enumerate(items):
+        result: Dict[str, Any] = {"index": index}
+        results.append(result)
+        try:
+            if isinstance(data, ValueError):
+                raise data
+            if not isinstance(data, dict):
+                raise ValueError("Task must be a JSON object")
+            task_type = data.get('task')
+            result.update(task=task_type, log_id=data.get('log_id'))
+            _check_task_type(task_type)
+            valid.append((index, task_type, data))
+        except ValueError as e:
+            result.update(status="rejected", error=str(e))
+
+    # Satu transaksi claim untuk seluruh batch (bukan satu BEGIN IMMEDIATE per item)
+    try:
+        claims = await store.claim_many([data for _, _, data in valid])
+    except Exception:
+        logger.exception("Internal Engine Error")
+        raise HTTPException(status_code=500, detail="Internal Engine Error")
+    entries = []    # (task_type, record, data) yang harus dijalankan
+    positions = []  # index result untuk tiap entry
+    records = []    # TaskRecord untuk tiap entry
+    for (index, task_type, data), (record, created) in zip(valid, claims):
+        if not created:
+            results[index].update(status="accepted", **_task_ref(record, created))
+            continue
+        entries.append((task_type, record, data))
+        positions.append(index)
+        records.append(record)
+
+    # Semua task valid masuk antrian sekaligus (dispatcher dibangunkan sekali)
+    try:
+        outcomes = await _submit_many(entries)
+    except Exception:
+        logger.exception("Internal Engine Error")
+        await store.release(*records)
+        raise HTTPException(status_code=500, detail="Internal Engine Error")
+
+    rejected = []
+    for index, record, error in zip(positions, records, outcomes):
+        if error is None:
+            results[index].update(status="accepted", **_task_ref(record, True))
+        else:
+            rejected.append(record)
+            results[index].update(status="rejected", error=str(error), retry_after=error.retry_after)
+    await store.release(*rejected)
+
+    accepted = sum(1 for r in results if r["status"] == "accepted")
+    logger.info(f"Batch request: {accepted}/{len(results)} task(s) accepted")
+    return {"accepted": accepted, "rejected": len(results) - accepted, "results": results}
+
+@app.get("/api/v1/tasks/{task_id}")
+def get_task_status(task_id: str):
+    record = get_task_store().get(task_id)
+    if record is None:
+        raise HTTPException(status_code=404, detail="Task not found")
+    return record.to_dict()
+
+@app.get("/api/v1/tasks/{task_id}/events")
+async def stream_task_events(task_id: str, request: Request):
+    """
+    Server-sent events: status + log/progress task secara live, berakhir saat task selesai.
+    Client yang reconnect mengirim header Last-Event-ID dan melanjutkan dari event berikutnya.
+    """
+    store = get_task_store()
+    record = await asyncio.to_thread(store.get, task_id)
+    if record is None:
+        raise HTTPException(status_code=404, detail="Task not found")
+    last_event_id = request.headers.get("last-event-id", "0")
+    last_seq = int(last_event_id) if last_event_id.isdigit() else 0
+
+    async def events():
+        hub = get_progress_hub()
+        # Task di worker lain (antrian durable) atau buffer sudah dibuang: minimal status dari store
+        hub.sync_status(task_id, record.status, final=not record.active)
+        async for event in hub.subscribe(task_id, last_seq, keepalive=5.0):
+            if event is None:
+                current = await asyncio.to_thread(store.get, task_id)
+                if current is not None:
+                    hub.sync_status(task_id, current.status, final=not current.active)
+                yield ": keep-alive\n\n"
+                continue
+            data = json.dumps(event.to_dict(), ensure_ascii=False, default=str)
+            yield f"id: {event.seq}\nevent: {event.kind}\ndata: {data}\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@app.get("/api/v1/jobs")
+def get_job_queue_status(dead_limit: int = 50):
+    if not job_queue_enabled():
+        raise HTTPException(status_code=404, detail="Durable job queue is disabled")
+    queue = get_job_queue()
+    counts: Dict[str, Dict[str, int]] = {}
+    for (task_type, state), count in queue.counts().items():
+        counts.setdefault(task_type, {})[state] = count
+    # Tanpa payload: isinya terenkripsi dan tidak berguna untuk inspeksi
+    return {"counts": counts, "dead_letters": [job.to_dict() for job in queue.dead_letters(dead_limit)]}
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    # Format teks Prometheus
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
 @app.get("/")
 def health_check():
     return {"status": "ready", "mode": "Modular Monolith"}
\ No newline at end of file
@@ -1,15 +1,23 @@
 # modules/__init__.py
-from .ssl_updater.tasks import run_ssl_deploy_task
-from .deployment_parser.tasks import run_deployment_parse_task 
-# from .data_migrator.tasks import run_migration_task
+# Handler task di-import saat pertama kali dipakai (lihat modules/registry.py),
+# sehingga startup worker tidak memuat paramiko/pdfplumber untuk task yang tidak dilayaninya.
+from .registry import TaskRegistry
 
-TASK_REGISTRY = {
-    'ssl_deploy': run_ssl_deploy_task,
-    'deployment_parse': run_deployment_parse_task,
-}
+TASK_REGISTRY = TaskRegistry.from_settings()
+
+def check_task_enabled(task_type: str):
+    """Raise ValueError jika tipe task tidak dilayani node ini (tanpa meng-import handler-nya)."""
+    if task_type in TASK_REGISTRY:
+        return
+    if TASK_REGISTRY.is_registered(task_type):
+        raise ValueError(f"Task '{task_type}' is not enabled on this engine node")
+    raise ValueError(f"No handler registered for task: {task_type}")
 
 def get_task_handler(task_type: str):
-    handler = TASK_REGISTRY.get(task_type)
-    if not handler:
-        raise ValueError(f"No handler registered for task: {task_type}")
-    return handler
\ No newline at end of file
+    check_task_enabled(task_type)
+    return TASK_REGISTRY[task_type]
+
+async def load_task_handler(task_type: str):
+    """get_task_handler untuk event loop: import pertama handler berjalan di thread."""
+    check_task_enabled(task_type)
+    return await TASK_REGISTRY.load(task_type)
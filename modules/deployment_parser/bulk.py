@@ -0,0 +1,351 @@
+# modules/deployment_parser/bulk.py
+"""
+Task 'deployment_parse_bulk': ingest banyak dokumen deployment dalam satu task (misal backfill arsip).
+Sumber dokumen (boleh dikombinasikan): satu zip (archive_path / archive_url), satu folder (directory),
+dan daftar URL (file_urls). Hanya file .pdf yang diproses.
+
+- Dokumen diproses paralel oleh `max_concurrency` worker; ekstraksi tetap lewat process pool yang sama
+  dengan deployment_parse, jadi CPU tetap dibatasi PARSER_WORKERS.
+- Dokumen yang sudah ada di index service (hash isi + versi parser sama) dilewati, begitu juga duplikat
+  di dalam bulk yang sama.
+- Hasil dikirim ke Laravel per `chunk_size` dokumen (status PARTIAL), ditutup satu laporan akhir.
+- Setiap chunk yang sudah diterima Laravel (pengiriman webhook terkonfirmasi) dicatat di checkpoint (SQLite);
+  chunk yang gagal terkirim tidak dicatat dan bulk berakhir FAILED. Jika task terputus lalu dijalankan lagi
+  (retry job queue, atau dikirim ulang dengan bulk_id yang sama), dokumen yang sudah dilaporkan tidak
+  diproses ulang. Bulk yang berakhir FAILED bisa dikirim ulang dengan log_id yang sama (task gagal tidak
+  di-dedup, lihat core/task_store.py): hanya dokumen yang gagal dan yang belum dilaporkan yang diproses.
+  Checkpoint dihapus setelah bulk selesai dengan SUCCESS.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import zipfile
+from collections import Counter
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from core.config import settings
+from core.progress import report_progress
+from .cache import CHUNK_SIZE, sha256_file
+from .index import get_service_index, service_index_enabled
+from .parser import PARSER_VERSION
+from .tasks import _download_pdf, _index_document, _parse_document, _spool_file, report_status_to_laravel
+
+logger = logging.getLogger(__name__)
+
+SOURCE_FIELDS = ("archive_path", "archive_url", "directory", "file_urls")
+# parsed = diekstrak, cached = dari parse cache, skipped = sudah di-index, duplicate = hash sama di bulk ini
+STATUSES = ("parsed", "cached", "skipped", "duplicate", "failed")
+
+
+@dataclass
+class BulkItem:
+    key: str       # Identitas stabil untuk checkpoint: "zip:<member>", "file:<path relatif>", "url:<url>"
+    kind: str      # zip | file | url
+    location: str  # Nama member zip, path relatif terhadap directory, atau URL
+
+
+class BulkCheckpoint:
+    """Dokumen yang hasilnya sudah dikirim ke Laravel, per bulk_id."""
+
+    def __init__(self, db_path: str, retention_days: float = 7.0):
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(db_path, isolation_level=None, check_same_thread=False, timeout=10.0)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS bulk_items ("
+            " bulk_id TEXT NOT NULL, item_key TEXT NOT NULL, doc_hash TEXT, status TEXT NOT NULL,"
+            " chunk INTEGER NOT NULL, recorded_at REAL NOT NULL, PRIMARY KEY (bulk_id, item_key))"
+        )
+        # Bulk yang ditinggalkan (tidak pernah selesai) dibuang setelah masa retensi task store
+        self._db.execute("DELETE FROM bulk_items WHERE recorded_at < ?", (time.time() - retention_days * 86400,))
+
+    @classmethod
+    def from_settings(cls) -> "BulkCheckpoint":
+        return cls(settings.PARSER_BULK_CHECKPOINT_PATH, retention_days=settings.TASK_STORE_RETENTION_DAYS)
+
+    def load(self, bulk_id: str) -> Tuple[Dict[str, Tuple[Optional[str], str]], int]:
+        """
+        Return ({item_key: (doc_hash, status)}, nomor chunk berikutnya).
+        Dokumen yang gagal tidak termasuk (dicoba lagi), tapi chunk-nya tetap terhitung agar nomor chunk tidak dipakai ulang.
+        """
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT item_key, doc_hash, status, chunk FROM bulk_items WHERE bulk_id = ?", (bulk_id,)
+            ).fetchall()
+        done = {key: (doc_hash, status) for key, doc_hash, status, _ in rows if status != "failed"}
+        next_chunk = max((chunk for *_, chunk in rows), default=-1) + 1
+        return done, next_chunk
+
+    def record(self, bulk_id: str, chunk: int, entries: List[Dict[str, Any]]):
+        now = time.time()
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO bulk_items (bulk_id, item_key, doc_hash, status, chunk, recorded_at)"
+                    " VALUES (?, ?, ?, ?, ?, ?)",
+                    [(bulk_id, e["key"], e.get("doc_hash"), e["status"], chunk, now) for e in entries],
+                )
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+            self._db.execute("COMMIT")
+
+    def clear(self, bulk_id: str):
+        with self._lock:
+            self._db.execute("DELETE FROM bulk_items WHERE bulk_id = ?", (bulk_id,))
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+_checkpoint: Optional[BulkCheckpoint] = None
+
+
+def bulk_checkpoint_enabled() -> bool:
+    return bool(settings.PARSER_BULK_CHECKPOINT_PATH)
+
+
+def get_bulk_checkpoint() -> BulkCheckpoint:
+    global _checkpoint
+    if _checkpoint is None:
+        _checkpoint = BulkCheckpoint.from_settings()
+    return _checkpoint
+
+
+def close_bulk_checkpoint():
+    global _checkpoint
+    if _checkpoint is not None:
+        _checkpoint.close()
+        _checkpoint = None
+
+
+# --- Sumber dokumen ---
+def _is_pdf(name: str) -> bool:
+    return name.lower().endswith(".pdf")
+
+
+def _collect_items(data: Dict[str, Any], archive: Optional[zipfile.ZipFile]) -> List[BulkItem]:
+    """Daftar dokumen dalam urutan stabil (urutan zip, lalu folder terurut, lalu URL)."""
+    items: List[BulkItem] = []
+    if archive is not None:
+        for info in archive.infolist():
+            if not info.is_dir() and _is_pdf(info.filename) and not info.filename.startswith("__MACOSX/"):
+                items.append(BulkItem(f"zip:{info.filename}", "zip", info.filename))
+
+    directory = data.get('directory')
+    if directory:
+        if not os.path.isdir(directory):
+            raise ValueError(f"Directory not found: {directory}")
+        for root, dirs, names in os.walk(directory):
+            dirs.sort()
+            for name in sorted(names):
+                if _is_pdf(name):
+                    relative = os.path.relpath(os.path.join(root, name), directory)
+                    items.append(BulkItem(f"file:{relative}", "file", relative))
+
+    for url in data.get('file_urls') or []:
+        items.append(BulkItem(f"url:{url}", "url", url))
+    return items
+
+
+def _spool_zip_member(archive: zipfile.ZipFile, name: str, log_id: Any) -> Tuple[str, str]:
+    """Salin satu member zip ke spool file sambil menghitung SHA-256. Return (path, sha256 hex)."""
+    info = archive.getinfo(name)
+    max_bytes = settings.PARSER_MAX_DOWNLOAD_MB * 1024 * 1024
+    if info.file_size > max_bytes:
+        raise ValueError(f"PDF too large ({info.file_size} bytes). Limit: {max_bytes} bytes.")
+
+    fd, spool_path = _spool_file(log_id)
+    digest = hashlib.sha256()
+    try:
+        with os.fdopen(fd, "wb") as f, archive.open(info) as member:
+            for chunk in iter(lambda: member.read(CHUNK_SIZE), b""):
+                digest.update(chunk)
+                f.write(chunk)
+    except BaseException:
+        os.remove(spool_path)
+        raise
+    return spool_path, digest.hexdigest()
+
+
+def _default_bulk_id(data: Dict[str, Any]) -> str:
+    sources = json.dumps({k: data.get(k) for k in SOURCE_FIELDS}, sort_keys=True)
+    return hashlib.sha256(sources.encode()).hexdigest()[:16]
+
+
+# --- Task Handler ---
+async def run_deployment_parse_bulk_task(payload: Dict[str, Any]):
+    """
+    Payload dari Laravel:
+    {
+        "data": {
+            "archive_path": "/var/www/html/storage/app/releases.zip",  ATAU  "archive_url": "http://...zip",
+            "directory": "/mnt/arsip/release-docs",                    (opsional)
+            "file_urls": ["http://laravel-app.test/storage/docs/a.pdf", ...],  (opsional)
+            "bulk_id": "backfill-2026",  (opsional, kunci checkpoint; default log_id)
+            "max_concurrency": 4,        (opsional)
+            "chunk_size": 50,            (opsional, dokumen per webhook)
+            "skip_known": true           (opsional, lewati dokumen yang sudah di-index)
+        },
+        "log_id": 123
+    }
+    Setiap chunk dilaporkan dengan status PARTIAL (field tambahan chunk, final=false);
+    laporan terakhir berisi ringkasan dengan status SUCCESS/FAILED dan final=true.
+    """
+    data = payload.get('data', {})
+    log_id = payload.get('log_id')
+
+    bulk_id = str(data.get('bulk_id') or log_id or _default_bulk_id(data))
+    max_concurrency = max(1, int(data.get('max_concurrency') or settings.PARSER_BULK_CONCURRENCY))
+    chunk_size = max(1, int(data.get('chunk_size') or settings.PARSER_BULK_CHUNK_SIZE))
+    skip_known = bool(data.get('skip_known', True)) and service_index_enabled()
+    directory = data.get('directory')
+
+    checkpoint = get_bulk_checkpoint() if bulk_checkpoint_enabled() else None
+    counts: Counter = Counter()
+    summary: Dict[str, Any] = {"bulk_id": bulk_id}
+    archive_spool = None
+    archive = None
+    confirmations: List[asyncio.Task] = []  # Menunggu konfirmasi pengiriman tiap chunk
+
+    logger.info(f"[START] Bulk deployment parse {bulk_id} (concurrency={max_concurrency}, chunk={chunk_size})")
+
+    try:
+        # 1. Siapkan sumber dokumen
+        if data.get('archive_url'):
+            report_progress("Downloading archive...", phase="download")
+            archive_spool, _ = await _download_pdf(data['archive_url'], log_id, suffix=".zip",
+                                                   max_mb=settings.PARSER_BULK_MAX_ARCHIVE_MB)
+        archive_file = archive_spool or data.get('archive_path')
+        if archive_file:
+            archive = zipfile.ZipFile(archive_file)
+        items = await asyncio.to_thread(_collect_items, data, archive)
+        if not items:
+            raise ValueError("No PDF documents found in archive_path/archive_url, directory or file_urls.")
+
+        # 2. Lanjutkan dari checkpoint: dokumen yang sudah dilaporkan tidak diproses lagi
+        done, next_chunk = await asyncio.to_thread(checkpoint.load, bulk_id) if checkpoint else ({}, 0)
+        counts.update(status for _, status in done.values())
+        seen = {doc_hash for doc_hash, _ in done.values() if doc_hash}
+        pending = [item for item in items if item.key not in done]
+        if done:
+            logger.info(f"Resuming bulk {bulk_id}: {len(done)}/{len(items)} documents already reported.")
+            report_progress(f"Resuming: {len(done)}/{len(items)} documents already reported", resumed=len(done))
+
+        buffer: List[Dict[str, Any]] = []
+        chunk_counter = {"next": next_chunk}
+
+        async def confirm(chunk: int, entries: List[Dict[str, Any]], delivered: asyncio.Future) -> bool:
+            # Checkpoint hanya setelah Laravel menerima chunk: chunk yang hilang diproses lagi saat resume
+            if not await delivered:
+                logger.warning(f"Bulk {bulk_id}: chunk {chunk} was not delivered, it will be reprocessed on resume.")
+                return False
+            if checkpoint:
+                await asyncio.to_thread(checkpoint.record, bulk_id, chunk, entries)
+            return True
+
+        async def flush():
+            if not buffer:
+                return
+            entries = buffer[:]
+            buffer.clear()
+            chunk = chunk_counter["next"]
+            chunk_counter["next"] += 1
+            body = {"bulk_id": bulk_id, "chunk": chunk, "documents": entries}
+            delivered = await report_status_to_laravel(log_id, "PARTIAL", "", result_data=body, chunk=chunk, final=False)
+            # Tidak ditunggu di sini: worker lanjut memproses dokumen selama webhook di-retry
+            confirmations.append(asyncio.create_task(confirm(chunk, entries, delivered)))
+
+        async def process(item: BulkItem) -> Dict[str, Any]:
+            entry: Dict[str, Any] = {"key": item.key, "source": item.location, "doc_hash": None}
+            spool = None
+            try:
+                # 3. Ambil file + hash isi
+                if item.kind == "url":
+                    spool, doc_hash = await _download_pdf(item.location, log_id)
+                    target_file = spool
+                elif item.kind == "zip":
+                    spool, doc_hash = await asyncio.to_thread(_spool_zip_member, archive, item.location, log_id)
+                    target_file = spool
+                else:
+                    target_file = os.path.join(directory, item.location)
+                    doc_hash = await asyncio.to_thread(sha256_file, target_file)
+                entry["doc_hash"] = doc_hash
+
+                # 4. Lewati dokumen yang sudah pernah dilihat
+                if doc_hash in seen:
+                    entry["status"] = "duplicate"
+                    return entry
+                seen.add(doc_hash)
+                if skip_known and await asyncio.to_thread(get_service_index().has_document, doc_hash, PARSER_VERSION):
+                    entry["status"] = "skipped"
+                    return entry
+
+                # 5. Parse (cache / process pool) lalu index
+                result, cached = await _parse_document(target_file, doc_hash)
+                await _index_document(doc_hash, result, log_id, source=item.location)
+                entry.update(status="cached" if cached else "parsed",
+                             services=len(result.get("services", [])), result=result)
+            except Exception as e:
+                logger.warning(f"Bulk {bulk_id}: document {item.key} failed: {e}")
+                entry.update(status="failed", error=str(e))
+            finally:
+                if spool and os.path.exists(spool):
+                    os.remove(spool)
+            return entry
+
+        queue = iter(pending)
+
+        async def worker():
+            # Iterator dipakai bersama: setiap worker mengambil dokumen berikutnya begitu selesai
+            for item in queue:
+                entry = await process(item)
+                counts[entry["status"]] += 1
+                buffer.append(entry)
+                processed = sum(counts.values())
+                report_progress(f"{processed}/{len(items)} documents processed ({counts['failed']} failed)",
+                                total=len(items), processed=processed, **{s: counts[s] for s in STATUSES})
+                if len(buffer) >= chunk_size:
+                    await flush()
+
+        await asyncio.gather(*(worker() for _ in range(min(max_concurrency, len(pending)))))
+        await flush()
+        undelivered = (await asyncio.gather(*confirmations)).count(False)
+
+        summary.update(total=len(items), resumed=len(done), chunks=chunk_counter["next"],
+                       undelivered_chunks=undelivered, **{s: counts[s] for s in STATUSES})
+        final_status = "SUCCESS" if not counts["failed"] and not undelivered else "FAILED"
+        if checkpoint and final_status == "SUCCESS":
+            # FAILED: checkpoint disimpan, bulk yang dikirim ulang hanya mencoba lagi dokumen yang gagal
+            await asyncio.to_thread(checkpoint.clear, bulk_id)
+
+    except Exception as e:
+        # Checkpoint tidak dihapus: bulk yang dikirim ulang melanjutkan dari chunk terakhir
+        logger.exception(f"Bulk deployment parse {bulk_id} failed: {e}")
+        report_progress(f"Bulk parse failed: {e}", kind="log")
+        summary.update(error=str(e), **{s: counts[s] for s in STATUSES})
+        final_status = "FAILED"
+
+    finally:
+        for task in confirmations:
+            task.cancel()
+        if archive is not None:
+            archive.close()
+        if archive_spool and os.path.exists(archive_spool):
+            os.remove(archive_spool)
+
+    # Di luar finally: task yang dibatalkan (shutdown) tidak dilaporkan gagal, job-nya dilanjutkan nanti
+    logger.info(f"[FINISH] Bulk deployment parse {bulk_id}: {dict(counts)}")
+    await report_status_to_laravel(log_id, final_status, "", result_data=summary, final=True)
+    return final_status
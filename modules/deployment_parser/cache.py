@@ -0,0 +1,152 @@
+# modules/deployment_parser/cache.py
+import hashlib
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 1024 * 1024
+
+
+def sha256_file(path: str) -> str:
+    """Hash SHA-256 isi file, dibaca per chunk agar memori tetap kecil."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ParseCache:
+    """
+    Cache hasil parsing dokumen deployment, di-key oleh SHA-256 isi PDF + versi parser.
+    - Tier 1: LRU di memori (jumlah item terbatas).
+    - Tier 2: file JSON di disk, total ukuran dibatasi (file paling lama dipakai dihapus dulu).
+    Versi parser ikut menjadi bagian key, jadi perubahan regex otomatis membuat entri lama tidak terpakai.
+    """
+
+    def __init__(self, cache_dir: str, memory_items: int = 256, disk_max_bytes: int = 256 * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.memory_items = memory_items
+        self.disk_max_bytes = disk_max_bytes
+        self._memory: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk_usage: Optional[int] = None
+
+    @classmethod
+    def from_settings(cls) -> "ParseCache":
+        return cls(
+            cache_dir=settings.PARSER_CACHE_DIR,
+            memory_items=settings.PARSER_CACHE_MEMORY_ITEMS,
+            disk_max_bytes=settings.PARSER_CACHE_DISK_MAX_MB * 1024 * 1024,
+        )
+
+    @staticmethod
+    def _key(doc_hash: str, parser_version: str) -> str:
+        return f"{parser_version}-{doc_hash}"
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    # --- Public API (sinkronus, file I/O kecil; panggil via asyncio.to_thread dari task async) ---
+    def get(self, doc_hash: str, parser_version: str) -> Optional[Dict[str, Any]]:
+        key = self._key(doc_hash, parser_version)
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                return self._memory[key]
+
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf8") as f:
+                result = json.load(f)
+            os.utime(path)  # Tandai baru dipakai (dasar eviksi di disk)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable parse cache entry {path}: {e}")
+            return None
+
+        self._remember(key, result)
+        return result
+
+    def put(self, doc_hash: str, parser_version: str, result: Dict[str, Any]):
+        key = self._key(doc_hash, parser_version)
+        self._remember(key, result)
+
+        if self.disk_max_bytes <= 0:
+            return
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf8") as f:
+                json.dump(result, f)
+            size = os.path.getsize(tmp_path)
+            if os.path.exists(path):
+                size -= os.path.getsize(path)  # Entri lama ditimpa
+            os.replace(tmp_path, path)  # Atomic: pembaca tidak pernah melihat file setengah jadi
+        except OSError as e:
+            logger.warning(f"Failed to write parse cache entry {path}: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return
+
+        with self._lock:
+            if self._disk_usage is not None:
+                self._disk_usage += size
+        self._evict_disk()
+
+    # --- Internal ---
+    def _remember(self, key: str, result: Dict[str, Any]):
+        with self._lock:
+            self._memory[key] = result
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_items:
+                self._memory.popitem(last=False)
+
+    def _scan_disk(self):
+        entries = []
+        try:
+            with os.scandir(self.cache_dir) as it:
+                for entry in it:
+                    if entry.name.endswith(".json"):
+                        stat = entry.stat()
+                        entries.append((stat.st_mtime, stat.st_size, entry.path))
+        except FileNotFoundError:
+            pass
+        return entries
+
+    def _evict_disk(self):
+        with self._lock:
+            if self._disk_usage is None:
+                self._disk_usage = sum(size for _, size, _ in self._scan_disk())
+            if self._disk_usage <= self.disk_max_bytes:
+                return
+
+            # Hapus entri yang paling lama tidak dipakai sampai di bawah batas
+            for _, size, path in sorted(self._scan_disk()):
+                if self._disk_usage <= self.disk_max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                    self._disk_usage -= size
+                except FileNotFoundError:
+                    pass
+            logger.info(f"Parse cache evicted to {self._disk_usage} bytes on disk.")
+
+
+_cache: Optional[ParseCache] = None
+
+
+def get_parse_cache() -> ParseCache:
+    global _cache
+    if _cache is None:
+        _cache = ParseCache.from_settings()
+    return _cache
@@ -0,0 +1,232 @@
+# modules/deployment_parser/index.py
+"""
+Index lokal (SQLite) untuk semua service hasil ekstraksi dokumen deployment.
+Pertanyaan seperti "tenant mana saja yang mendapat modul X versi Y bulan lalu" dijawab dari
+index ini dalam hitungan milidetik, tanpa parsing ulang PDF.
+
+- Satu baris `documents` per dokumen (doc_hash = SHA-256 isi PDF, sama dengan key ParseCache).
+- Satu baris `services` per service, dengan `version_key` agar filter rentang versi bisa
+  memakai index (lihat `version_key`).
+- Dokumen yang di-parse ulang (cache hit / dikirim lagi) menimpa service lamanya;
+  `first_indexed_at` tetap, `last_indexed_at` diperbarui.
+"""
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_VERSION_TOKEN = re.compile(r"(\d+)")
+_VERSION_PREFIX = re.compile(r"^v(?=\d)")  # "v2.4.1" dan "V2.4.1" sama dengan "2.4.1"
+SCHEMA_VERSION = 1  # 1: version_key tanpa awalan v
+
+
+def version_key(version: Optional[str]) -> Optional[str]:
+    """
+    Bentuk versi yang bisa diurutkan sebagai string: angka di-pad 10 digit, sisanya lowercase.
+    "1.10.0" -> "0000000001.0000000010.0000000000", sehingga 1.10.0 > 1.9.3 seperti seharusnya.
+    Awalan "v" sebelum angka diabaikan.
+    """
+    if not version:
+        return None
+    parts = _VERSION_TOKEN.split(_VERSION_PREFIX.sub("", version.strip().lower()))
+    return "".join(part.zfill(10) if i % 2 else part for i, part in enumerate(parts))
+
+
+class ServiceIndex:
+    SERVICE_COLUMNS = ("id", "doc_hash", "position", "tenant", "modul", "version", "env", "indexed_at", "log_id")
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        # Dipakai dari thread event loop (asyncio.to_thread) dan threadpool endpoint FastAPI
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(db_path, isolation_level=None, check_same_thread=False, timeout=10.0)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(
+            "CREATE TABLE IF NOT EXISTS documents ("
+            " doc_hash TEXT PRIMARY KEY, log_id TEXT, source TEXT, parser_version TEXT,"
+            " service_count INTEGER NOT NULL, global_json TEXT NOT NULL,"
+            " first_indexed_at REAL NOT NULL, last_indexed_at REAL NOT NULL);"
+            "CREATE TABLE IF NOT EXISTS services ("
+            " id INTEGER PRIMARY KEY AUTOINCREMENT, doc_hash TEXT NOT NULL, position INTEGER NOT NULL,"
+            " tenant TEXT COLLATE NOCASE, modul TEXT COLLATE NOCASE, version TEXT, version_key TEXT,"
+            " env TEXT, indexed_at REAL NOT NULL, log_id TEXT);"
+            # Index berakhir dengan rowid (= id): filter kesetaraan + ORDER BY id DESC tanpa sort
+            "CREATE INDEX IF NOT EXISTS services_tenant ON services (tenant, modul);"
+            "CREATE INDEX IF NOT EXISTS services_modul ON services (modul);"
+            "CREATE INDEX IF NOT EXISTS services_modul_version ON services (modul, version_key);"
+            "CREATE INDEX IF NOT EXISTS services_doc ON services (doc_hash);"
+            "CREATE INDEX IF NOT EXISTS services_time ON services (indexed_at);"
+        )
+        self._migrate()
+
+    def _migrate(self):
+        if self._db.execute("PRAGMA user_version").fetchone()[0] >= SCHEMA_VERSION:
+            return
+        # Index lama menyimpan "v2.4.1" dengan key yang diawali "v" (tidak pernah cocok dengan filter versi)
+        rows = self._db.execute("SELECT id, version FROM services WHERE version LIKE 'v%'").fetchall()
+        self._db.execute("BEGIN IMMEDIATE")
+        try:
+            self._db.executemany("UPDATE services SET version_key = ? WHERE id = ?",
+                                 [(version_key(version), row_id) for row_id, version in rows])
+            self._db.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        except BaseException:
+            self._db.execute("ROLLBACK")
+            raise
+        self._db.execute("COMMIT")
+        if rows:
+            logger.info(f"Re-keyed {len(rows)} indexed service version(s) with a 'v' prefix.")
+
+    @classmethod
+    def from_settings(cls) -> "ServiceIndex":
+        return cls(settings.SERVICE_INDEX_PATH)
+
+    # --- Tulis ---
+    def add_document(self, doc_hash: str, result: Dict[str, Any], log_id: Any = None,
+                     source: Optional[str] = None, parser_version: Optional[str] = None) -> int:
+        """Simpan (atau timpa) semua service satu dokumen dalam satu transaksi. Return jumlah service."""
+        services = result.get("services") or []
+        now = time.time()
+        log_id = None if log_id is None else str(log_id)
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._db.execute(
+                    "SELECT first_indexed_at FROM documents WHERE doc_hash = ?", (doc_hash,)
+                ).fetchone()
+                first_indexed_at = row[0] if row else now
+                self._db.execute(
+                    "INSERT OR REPLACE INTO documents (doc_hash, log_id, source, parser_version, service_count,"
+                    " global_json, first_indexed_at, last_indexed_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (doc_hash, log_id, source, parser_version, len(services),
+                     json.dumps(result.get("global_json_updates") or []), first_indexed_at, now),
+                )
+                self._db.execute("DELETE FROM services WHERE doc_hash = ?", (doc_hash,))
+                self._db.executemany(
+                    "INSERT INTO services (doc_hash, position, tenant, modul, version, version_key, env,"
+                    " indexed_at, log_id) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    [
+                        (doc_hash, position, s.get("tenant"), s.get("modul"), s.get("version"),
+                         version_key(s.get("version")), s.get("env"), first_indexed_at, log_id)
+                        for position, s in enumerate(services)
+                    ],
+                )
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+            self._db.execute("COMMIT")
+        return len(services)
+
+    # --- Query ---
+    @staticmethod
+    def _filters(tenant: Optional[str] = None, modul: Optional[str] = None, version: Optional[str] = None,
+                 version_min: Optional[str] = None, version_max: Optional[str] = None,
+                 doc_hash: Optional[str] = None, since: Optional[float] = None,
+                 until: Optional[float] = None) -> Tuple[List[str], List[Any]]:
+        clauses: List[str] = []
+        params: List[Any] = []
+        for column, value in (("s.tenant", tenant), ("s.modul", modul), ("s.doc_hash", doc_hash)):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        if version is not None:
+            clauses.append("s.version_key = ?")
+            params.append(version_key(version))
+        if version_min is not None:
+            clauses.append("s.version_key >= ?")
+            params.append(version_key(version_min))
+        if version_max is not None:
+            clauses.append("s.version_key <= ?")
+            params.append(version_key(version_max))
+        if since is not None:
+            clauses.append("s.indexed_at >= ?")
+            params.append(since)
+        if until is not None:
+            clauses.append("s.indexed_at < ?")
+            params.append(until)
+        return clauses, params
+
+    def query(self, limit: int = 50, cursor: Optional[int] = None, **filters: Any) -> Dict[str, Any]:
+        """
+        Service terbaru lebih dulu. Pagination keyset: kirim `next_cursor` dari halaman sebelumnya
+        sebagai `cursor` (tetap cepat di halaman jauh, tidak seperti OFFSET).
+        """
+        clauses, params = self._filters(**filters)
+        if cursor is not None:
+            clauses.append("s.id < ?")
+            params.append(cursor)
+        where = " AND ".join(clauses) or "1"
+        columns = ", ".join(f"s.{c}" for c in self.SERVICE_COLUMNS)
+        with self._lock:
+            rows = self._db.execute(
+                f"SELECT {columns}, d.global_json FROM services s JOIN documents d ON d.doc_hash = s.doc_hash"
+                f" WHERE {where} ORDER BY s.id DESC LIMIT ?",
+                (*params, limit + 1),
+            ).fetchall()
+        items = []
+        for row in rows[:limit]:
+            item = dict(zip(self.SERVICE_COLUMNS, row[:-1]))
+            item["global_json_updates"] = json.loads(row[-1])
+            items.append(item)
+        next_cursor = items[-1]["id"] if len(rows) > limit else None
+        return {"items": items, "next_cursor": next_cursor}
+
+    def tenants(self, **filters: Any) -> List[Dict[str, Any]]:
+        """Tenant yang cocok dengan filter, beserta jumlah service dan kapan terakhir muncul."""
+        clauses, params = self._filters(**filters)
+        where = " AND ".join(clauses) or "1"
+        with self._lock:
+            rows = self._db.execute(
+                f"SELECT s.tenant, COUNT(*), MAX(s.indexed_at) FROM services s WHERE {where}"
+                " GROUP BY s.tenant ORDER BY s.tenant",
+                params,
+            ).fetchall()
+        return [{"tenant": tenant, "services": count, "last_indexed_at": last} for tenant, count, last in rows]
+
+    def has_document(self, doc_hash: str, parser_version: Optional[str] = None) -> bool:
+        """Dokumen sudah di-index (dengan versi parser yang sama, jika diberikan)."""
+        with self._lock:
+            row = self._db.execute("SELECT parser_version FROM documents WHERE doc_hash = ?", (doc_hash,)).fetchone()
+        return row is not None and (parser_version is None or row[0] == parser_version)
+
+    def document(self, doc_hash: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT doc_hash, log_id, source, parser_version, service_count, global_json,"
+                " first_indexed_at, last_indexed_at FROM documents WHERE doc_hash = ?",
+                (doc_hash,),
+            ).fetchone()
+        if row is None:
+            return None
+        keys = ("doc_hash", "log_id", "source", "parser_version", "service_count", "global_json_updates",
+                "first_indexed_at", "last_indexed_at")
+        document = dict(zip(keys, row))
+        document["global_json_updates"] = json.loads(document["global_json_updates"])
+        return document
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+_index: Optional[ServiceIndex] = None
+
+
+def service_index_enabled() -> bool:
+    return bool(settings.SERVICE_INDEX_PATH)
+
+
+def get_service_index() -> ServiceIndex:
+    global _index
+    if _index is None:
+        _index = ServiceIndex.from_settings()
+    return _index
@@ -0,0 +1,171 @@
+# modules/deployment_parser/parser.py
+import hashlib
+import json
+import re
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+# Label field di dokumen -> key hasil
+FIELD_LABELS = {
+    "tenant": "Tenant",
+    "version": "Version",
+    "modul": "Modul",
+    "env": "Penambahan Env",
+}
+VALUE_PATTERN = r"\s*[:]?\s*(.*)"
+
+# Regex Patterns (bentuk per-field, dipakai sebagai sumber versi parser)
+PATTERNS = {key: rf"(?i){label}{VALUE_PATTERN}" for key, label in FIELD_LABELS.items()}
+
+# Naikkan jika logika parsing berubah. Hash PATTERNS ikut masuk ke versi,
+# jadi mengubah regex otomatis meng-invalidate cache hasil parsing lama.
+PARSER_VERSION = "1-" + hashlib.sha256(json.dumps(PATTERNS, sort_keys=True).encode()).hexdigest()[:12]
+
+BLOCK_SEPARATOR = re.compile(r"(?i)Git Detail")
+SNIPPET_LENGTH = 500
+
+# Regex per-field yang sudah dikompilasi (jalur lambat untuk teks dengan karakter Unicode khusus)
+FIELD_PATTERNS = {key: re.compile(pattern) for key, pattern in PATTERNS.items()}
+FIELD_VALUE = re.compile(VALUE_PATTERN)
+LOWERED_LABELS = {key: label.lower() for key, label in FIELD_LABELS.items()}
+# Satu-satunya karakter non-ASCII yang membuat `str.lower()` + `str.find()` tidak setara dengan
+# pencocokan (?i) milik `re` untuk huruf label di atas: İ (panjang berubah), ı dan ſ (cocok dengan i/s).
+CASEFOLD_SPECIALS = ("\u0130", "\u0131", "\u017f")
+
+
+def scan_fields(block: str) -> Dict[str, Optional[str]]:
+    """
+    Ambil nilai pertama tiap field dari satu block.
+    Block di-lowercase SEKALI lalu tiap label dicari dengan substring search (C-level),
+    hasilnya identik dengan `re.search(PATTERNS[key], block)` namun jauh lebih cepat.
+    """
+    found: Dict[str, Optional[str]] = {}
+    if any(ch in block for ch in CASEFOLD_SPECIALS):
+        for key, pattern in FIELD_PATTERNS.items():
+            match = pattern.search(block)
+            found[key] = match.group(1).strip().replace(":", "").strip() if match else None
+        return found
+
+    lowered = block.lower()
+    for key, label in LOWERED_LABELS.items():
+        index = lowered.find(label)
+        if index < 0:
+            found[key] = None
+            continue
+        value = FIELD_VALUE.match(block, index + len(label)).group(1)
+        found[key] = value.strip().replace(":", "").strip()
+    return found
+
+
+def _is_filename_char(ch: str) -> bool:
+    # Setara dengan kelas regex [\w\-\.] untuk str (\w Unicode = isalnum() atau '_')
+    return ch.isalnum() or ch in "_-."
+
+
+def find_json_filenames(text: str) -> List[str]:
+    """
+    Setara dengan `re.findall(r"[\w\-\.]+\.json", text)`, tapi hanya bekerja di sekitar
+    kemunculan '.json' (regex aslinya mencoba backtracking di setiap awal kata).
+    """
+    results = []
+    length = len(text)
+    pos = 0
+    while True:
+        index = text.find(".json", pos)
+        if index < 0:
+            return results
+
+        # Rentang karakter nama file di sekitar '.json' (tidak mundur melewati match sebelumnya)
+        start = index
+        while start > pos and _is_filename_char(text[start - 1]):
+            start -= 1
+        end = index + 5
+        while end < length and _is_filename_char(text[end]):
+            end += 1
+
+        # Greedy: match berakhir di '.json' terakhir dalam rentang, minimal 1 karakter sebelumnya
+        last = text.rfind(".json", start + 1, end)
+        if last < 0:
+            pos = end
+            continue
+        results.append(text[start:last + 5])
+        pos = last + 5
+
+
+def parse_service_block(block: str) -> Optional[Dict[str, Any]]:
+    """Ambil field service dari satu block teks. Return None jika bukan block service yang valid."""
+    fields = scan_fields(block)
+    item = {
+        'tenant': fields['tenant'],
+        'version': fields['version'],
+        'modul': fields['modul'],
+        'env': fields['env'] or "None",
+    }
+
+    # Validasi minimal: harus ada tenant atau modul
+    if item['tenant'] or item['modul']:
+        return item
+    return None
+
+
+class DocumentParser:
+    """
+    Parser dokumen deployment yang menerima teks halaman satu per satu.
+    Hanya block service yang sedang terbuka (belum ketemu 'Git Detail' berikutnya)
+    yang disimpan di memori; block yang sudah lengkap langsung di-parse dan di-yield.
+    Hasil akhirnya identik dengan parsing `full_text` sekaligus.
+    """
+
+    def __init__(self):
+        self.services: List[Dict[str, Any]] = []
+        self._partial = ""              # Block yang masih terbuka
+        self._in_header = True          # Block pertama (header umum) di-skip
+        self._snippet = ""
+        self._has_global_json = False
+        self._json_files = set()
+
+    def feed(self, page_text: str) -> Iterator[Dict[str, Any]]:
+        """Masukkan teks satu halaman. Yield service dari block yang sudah tertutup."""
+        if not page_text:
+            return
+        text = page_text + "\n"
+
+        if len(self._snippet) < SNIPPET_LENGTH:
+            self._snippet += text[:SNIPPET_LENGTH - len(self._snippet)]
+        # 'Global Json' dan nama file .json tidak bisa melintasi batas halaman ("\n" di antaranya)
+        if "Global Json" in text:
+            self._has_global_json = True
+        self._json_files.update(find_json_filenames(text))
+
+        pieces = BLOCK_SEPARATOR.split(self._partial + text)
+        self._partial = pieces.pop()
+        for block in pieces:
+            yield from self._close_block(block)
+
+    def finish(self) -> Dict[str, Any]:
+        """Tutup block terakhir dan kembalikan hasil dalam format `_extract_data_sync`."""
+        for _ in self._close_block(self._partial):
+            pass
+        self._partial = ""
+        return {
+            "services": self.services,
+            "global_json_updates": list(self._json_files) if self._has_global_json else [],
+            "raw_text_snippet": self._snippet + "..." # Opsional: untuk debug
+        }
+
+    def _close_block(self, block: str) -> Iterator[Dict[str, Any]]:
+        if self._in_header:
+            self._in_header = False
+            return
+        item = parse_service_block(block)
+        if item is not None:
+            self.services.append(item)
+            yield item
+
+
+def parse_pages(page_texts: Iterable[str]) -> Dict[str, Any]:
+    """Parse urutan teks halaman (sudah diekstrak) menjadi hasil akhir."""
+    parser = DocumentParser()
+    for text in page_texts:
+        for _ in parser.feed(text):
+            pass
+    return parser.finish()
@@ -0,0 +1,64 @@
+# modules/deployment_parser/router.py
+"""
+API query index service hasil parsing (lihat index.py).
+Sengaja tidak meng-import tasks.py (pdfplumber): node yang tidak melayani deployment_parse
+tetap bisa menjawab query dari file index yang sama.
+"""
+from typing import Any, Dict, Optional
+
+from fastapi import APIRouter, HTTPException, Query
+
+from .index import get_service_index, service_index_enabled
+
+router = APIRouter(prefix="/api/v1/services", tags=["deployment_parser"])
+
+
+def _index():
+    if not service_index_enabled():
+        raise HTTPException(status_code=404, detail="Service index is disabled")
+    return get_service_index()
+
+
+def _filters(tenant, modul, version, version_min, version_max, doc_hash, since, until) -> Dict[str, Any]:
+    return {"tenant": tenant, "modul": modul, "version": version, "version_min": version_min,
+            "version_max": version_max, "doc_hash": doc_hash, "since": since, "until": until}
+
+
+@router.get("")
+def list_services(
+    tenant: Optional[str] = None,
+    modul: Optional[str] = None,
+    version: Optional[str] = Query(None, description="Versi persis"),
+    version_min: Optional[str] = Query(None, description="Batas bawah versi (inklusif)"),
+    version_max: Optional[str] = Query(None, description="Batas atas versi (inklusif)"),
+    doc_hash: Optional[str] = None,
+    since: Optional[float] = Query(None, description="Unix timestamp, dokumen pertama kali di-index"),
+    until: Optional[float] = None,
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[int] = Query(None, description="next_cursor dari halaman sebelumnya"),
+):
+    filters = _filters(tenant, modul, version, version_min, version_max, doc_hash, since, until)
+    return _index().query(limit=limit, cursor=cursor, **filters)
+
+
+@router.get("/tenants")
+def list_tenants(
+    tenant: Optional[str] = None,
+    modul: Optional[str] = None,
+    version: Optional[str] = None,
+    version_min: Optional[str] = None,
+    version_max: Optional[str] = None,
+    doc_hash: Optional[str] = None,
+    since: Optional[float] = None,
+    until: Optional[float] = None,
+):
+    filters = _filters(tenant, modul, version, version_min, version_max, doc_hash, since, until)
+    return {"tenants": _index().tenants(**filters)}
+
+
+@router.get("/documents/{doc_hash}")
+def get_document(doc_hash: str):
+    document = _index().document(doc_hash)
+    if document is None:
+        raise HTTPException(status_code=404, detail="Document not indexed")
+    return document
@@ -1,21 +1,30 @@
 # modules/deployment_parser/tasks.py
 import asyncio
+import hashlib
 import logging
 import json
 import os
-import re
+import tempfile
 import httpx
 import pdfplumber
-from typing import Dict, Any, List
+from pdfminer.pdftypes import resolve1
+from pdfminer.psparser import LIT
+from typing import Dict, Any, Iterator, List, Optional, Tuple
+from core import webhook
 from core.config import settings
+from core.metrics import PHASE_SECONDS
+from core.progress import report_progress
+from .cache import CHUNK_SIZE, get_parse_cache, sha256_file
+from .index import get_service_index, service_index_enabled
+from .parser import PARSER_VERSION, DocumentParser, parse_pages
+from .worker_pool import get_extraction_pool
 
 logger = logging.getLogger(__name__)
 
-# --- Helper Reporting (Bisa dipindah ke core/utils.py agar reusable) ---
-async def report_status_to_laravel(log_id: int, status: str, output_log: str, result_data: Dict = None):
-    webhook_url = settings.TIARA_WEBHOOK_URL
-    secret_token = settings.TIARA_SYNC_KEY
-    
+LIT_FORM = LIT("Form")
+
+# --- Helper Reporting ---
+async def report_status_to_laravel(log_id: int, status: str, output_log: str, result_data: Dict = None, **extra: Any) -> asyncio.Future:
     # Kita kirim hasil ekstraksi JSON dalam field 'output_log' (sebagai string) 
     # atau field baru jika Laravel Anda sudah siap menerimanya.
     # Disini saya masukkan ke output_log agar tersimpan di text column database Laravel.
@@ -24,85 +33,189 @@ async def report_status_to_laravel(log_id: int, status: str, output_log: str, re
     if result_data:
         final_output = json.dumps(result_data, indent=2)
 
-    payload = {
-        "log_id": log_id,
-        "status": status,
-        "output_log": final_output, 
-    }
-    
-    headers = {'X-Engine-Secret': secret_token, 'Accept': 'application/json'}
-    
-    try:
-        async with httpx.AsyncClient() as client:
-            await client.post(webhook_url, json=payload, headers=headers, timeout=10.0)
-            logger.info(f"Reported status for Doc Parse {log_id}")
-    except Exception as e:
-        logger.error(f"Error reporting webhook: {e}")
+    return await webhook.report_status_to_laravel(log_id, status, final_output, **extra)
 
 # --- Logika "Heavy Lifting" Parsing PDF ---
+def _page_has_text_layer(page) -> bool:
+    """
+    Cek murah (tanpa menjalankan layout pdfminer) apakah halaman mungkin berisi teks.
+    Halaman hasil scan tidak punya font di resources-nya, jadi bisa di-skip.
+    """
+    try:
+        resources = resolve1(page.page_obj.resources) or {}
+        if resolve1(resources.get("Font")):
+            return True
+        # Teks bisa ada di dalam Form XObject; anggap mungkin berisi teks
+        xobjects = resolve1(resources.get("XObject")) or {}
+        return any(
+            getattr(resolve1(xobj), "attrs", {}).get("Subtype") == LIT_FORM
+            for xobj in xobjects.values()
+        )
+    except Exception:
+        return True
+
+def _page_texts(pdf) -> Iterator[str]:
+    for page in pdf.pages:
+        if not _page_has_text_layer(page):
+            continue
+        text = page.extract_text()
+        page.flush_cache()  # Lepas objek layout halaman ini agar memori tetap datar
+        if text:
+            yield text
+
+def _iter_page_texts(pdf_path: str, pages: List[int] = None) -> Iterator[str]:
+    """Yield teks per halaman. `pages` (1-based) membatasi halaman yang dibaca."""
+    with pdfplumber.open(pdf_path, pages=pages) as pdf:
+        yield from _page_texts(pdf)
+
+def _page_count(pdf) -> int:
+    """Jumlah halaman dari /Count di page tree (tanpa membuat objek Page); fallback ke pdf.pages."""
+    try:
+        count = resolve1(resolve1(pdf.doc.catalog.get("Pages")).get("Count"))
+        if isinstance(count, int) and count >= 0:
+            return count
+    except Exception:
+        pass
+    return len(pdf.pages)
+
 def _extract_data_sync(pdf_path: str) -> Dict[str, Any]:
     """
     Fungsi sinkronus untuk parsing PDF (CPU bound).
-    Akan dijalankan di threadpool agar tidak memblokir async loop.
+    Akan dijalankan di process pool agar tidak memblokir async loop maupun berebut GIL.
+    Halaman dibaca satu per satu; block service di-parse begitu block-nya tertutup.
     """
-    extracted_data = []
-    global_json_files = []
-    
-    # Regex Patterns
-    patterns = {
-        "tenant": r"(?i)Tenant\s*[:]?\s*(.*)",
-        "version": r"(?i)Version\s*[:]?\s*(.*)",
-        "modul": r"(?i)Modul\s*[:]?\s*(.*)",
-        "env": r"(?i)Penambahan Env\s*[:]?\s*(.*)",
-    }
+    try:
+        return parse_pages(_iter_page_texts(pdf_path))
+    except Exception as e:
+        raise ValueError(f"Failed to parse PDF: {str(e)}")
 
+def _extract_unless_longer_sync(pdf_path: str, max_pages: int) -> Tuple[Optional[Dict[str, Any]], int]:
+    """
+    Satu job pool untuk dokumen yang mungkin dipecah: hitung halaman, lalu dokumen dengan
+    <= max_pages halaman langsung diekstrak utuh di worker yang sama (tanpa job kedua dan tanpa
+    membuka PDF dua kali). Return (hasil atau None jika harus dipecah, jumlah halaman).
+    """
     try:
         with pdfplumber.open(pdf_path) as pdf:
-            full_text = ""
-            for page in pdf.pages:
-                text = page.extract_text()
-                if text:
-                    full_text += text + "\n"
-        
-        # 1. Parsing Block per Service (Split by 'Git Detail' or 'Service')
-        # Menggunakan 'Git Detail' sebagai pemisah antar service dalam 1 dokumen
-        blocks = re.split(r"(?i)Git Detail", full_text)
-        
-        # Skip block pertama (biasanya header umum)
-        for block in blocks[1:]:
-            item = {}
-            
-            # Helper untuk regex search yang aman
-            def get_val(key, text_block):
-                match = re.search(patterns[key], text_block)
-                if match:
-                    return match.group(1).strip().replace(":", "").strip()
-                return None
-
-            item['tenant'] = get_val("tenant", block)
-            item['version'] = get_val("version", block)
-            item['modul'] = get_val("modul", block)
-            item['env'] = get_val("env", block) or "None"
-
-            # Validasi minimal: harus ada tenant atau modul
-            if item['tenant'] or item['modul']:
-                extracted_data.append(item)
-
-        # 2. Parsing Global Json (biasanya di akhir dokumen)
-        if "Global Json" in full_text:
-            # Cari semua string yang berakhiran .json
-            json_matches = re.findall(r"[\w\-\.]+\.json", full_text)
-            global_json_files = list(set(json_matches))
-
-        return {
-            "services": extracted_data,
-            "global_json_updates": global_json_files,
-            "raw_text_snippet": full_text[:500] + "..." # Opsional: untuk debug
-        }
-        
+            page_count = _page_count(pdf)
+            if page_count > max_pages:
+                return None, page_count
+            return parse_pages(_page_texts(pdf)), page_count
+    except Exception as e:
+        raise ValueError(f"Failed to parse PDF: {str(e)}")
+
+def _extract_page_texts_sync(pdf_path: str, first_page: int, last_page: int) -> List[str]:
+    """Ekstrak teks halaman first_page..last_page (1-based, inklusif) untuk satu potongan dokumen."""
+    try:
+        return list(_iter_page_texts(pdf_path, pages=list(range(first_page, last_page + 1))))
     except Exception as e:
         raise ValueError(f"Failed to parse PDF: {str(e)}")
 
+async def _extract_document(pdf_path: str) -> Dict[str, Any]:
+    """
+    Dokumen kecil diekstrak utuh oleh satu worker. Dokumen besar dipecah per rentang halaman
+    ke beberapa worker, lalu teksnya di-parse berurutan begitu tiap potongan selesai.
+    """
+    pool = get_extraction_pool()
+    chunk_size = settings.PARSER_PAGES_PER_CHUNK
+    if pool.workers <= 1 or chunk_size <= 0:
+        return await pool.run(_extract_data_sync, pdf_path)
+
+    result, page_count = await pool.run(_extract_unless_longer_sync, pdf_path, chunk_size)
+    if result is not None:
+        return result
+
+    logger.info(f"Splitting {page_count} pages into chunks of {chunk_size} across workers...")
+    report_progress(f"Extracting {page_count} pages in {-(-page_count // chunk_size)} chunk(s)", pages=page_count)
+    chunks = [
+        asyncio.ensure_future(pool.run(_extract_page_texts_sync, pdf_path, first, min(first + chunk_size - 1, page_count)))
+        for first in range(1, page_count + 1, chunk_size)
+    ]
+    parser = DocumentParser()
+    try:
+        for index, chunk in enumerate(chunks):
+            for text in await chunk:
+                for _ in parser.feed(text):
+                    pass
+            pages_done = min((index + 1) * chunk_size, page_count)
+            report_progress(f"Extracted {pages_done}/{page_count} pages", pages_done=pages_done, pages=page_count)
+    finally:
+        for chunk in chunks:
+            chunk.cancel()
+    return parser.finish()
+
+# --- Download PDF (streaming ke spool file) ---
+def _spool_file(log_id: Any, suffix: str = ".pdf") -> Tuple[int, str]:
+    spool_dir = settings.PARSER_SPOOL_DIR or None
+    if spool_dir:
+        os.makedirs(spool_dir, exist_ok=True)
+    return tempfile.mkstemp(prefix=f"tiara_{log_id}_", suffix=suffix, dir=spool_dir)
+
+async def _download_pdf(file_url: str, log_id: Any, suffix: str = ".pdf", max_mb: int = None) -> Tuple[str, str]:
+    """
+    Download PDF per chunk langsung ke spool file unik, sambil menghitung SHA-256.
+    Memori tetap kecil berapapun ukuran dokumen; download dibatalkan begitu melewati batas ukuran.
+    Return (path spool file, sha256 hex). Pemanggil wajib menghapus file spool.
+    """
+    max_bytes = (max_mb or settings.PARSER_MAX_DOWNLOAD_MB) * 1024 * 1024
+    fd, spool_path = _spool_file(log_id, suffix)
+    digest = hashlib.sha256()
+    received = 0
+    try:
+        with os.fdopen(fd, "wb") as f:
+            async with httpx.AsyncClient() as client:
+                async with client.stream("GET", file_url, timeout=30.0) as resp:
+                    if resp.status_code != 200:
+                        raise Exception(f"Failed to download file. Status: {resp.status_code}")
+
+                    declared = resp.headers.get("Content-Length")
+                    if declared and declared.isdigit() and int(declared) > max_bytes:
+                        raise Exception(f"File too large ({declared} bytes). Limit: {max_bytes} bytes.")
+
+                    async for chunk in resp.aiter_bytes(CHUNK_SIZE):
+                        received += len(chunk)
+                        if received > max_bytes:
+                            raise Exception(f"File too large (more than {max_bytes} bytes). Download aborted.")
+                        digest.update(chunk)
+                        f.write(chunk)
+    except BaseException:
+        os.remove(spool_path)
+        raise
+
+    logger.info(f"Downloaded {received} bytes to {spool_path}")
+    report_progress(f"Downloaded {received} bytes", phase="download", bytes=received)
+    return spool_path, digest.hexdigest()
+
+# --- Parsing + index per dokumen (dipakai juga oleh task bulk) ---
+async def _parse_document(target_file: str, doc_hash: str) -> Tuple[Dict[str, Any], bool]:
+    """
+    Cek cache berdasarkan hash isi PDF (dokumen yang sama tidak perlu di-parse ulang),
+    jika tidak ada jalankan ekstraksi lalu simpan ke cache. Return (hasil, dari_cache).
+    """
+    cache = get_parse_cache()
+    cached_result = await asyncio.to_thread(cache.get, doc_hash, PARSER_VERSION)
+    if cached_result is not None:
+        logger.info(f"Parse cache hit for document {doc_hash[:12]}. Skipping extraction.")
+        report_progress("Document already parsed before. Using cached result.", phase="cache")
+        return cached_result, True
+
+    logger.info("Running extraction logic...")
+    report_progress("Extracting text from PDF...", phase="extraction")
+    with PHASE_SECONDS.time(phase="extraction"):
+        result = await _extract_document(target_file)
+    await asyncio.to_thread(cache.put, doc_hash, PARSER_VERSION, result)
+    return result, False
+
+async def _index_document(doc_hash: str, result: Dict[str, Any], log_id: Any, source: str = None):
+    """Simpan ke index service. Gagal index hanya di-log, tidak menggagalkan task."""
+    if not service_index_enabled():
+        return
+    try:
+        await asyncio.to_thread(get_service_index().add_document, doc_hash, result,
+                                log_id=log_id, source=source, parser_version=PARSER_VERSION)
+    except Exception:
+        logger.exception(f"Failed to index services of document {doc_hash[:12]}")
+
 # --- Task Handler Utama ---
 async def run_deployment_parse_task(payload: Dict[str, Any]):
     """
@@ -125,7 +238,7 @@ async def run_deployment_parse_task(payload: Dict[str, Any]):
     
     logger.info(f"[START] Parsing Deployment Doc. Log ID: {log_id}")
     
-    temp_filename = f"temp_{log_id}.pdf"
+    spool_file = None
     final_status = "FAILED"
     extraction_result = {}
     error_msg = ""
@@ -134,38 +247,43 @@ async def run_deployment_parse_task(payload: Dict[str, Any]):
         # 1. Dapatkan File PDF (Download atau Copy)
         if file_url:
             logger.info(f"Downloading PDF from {file_url}...")
-            async with httpx.AsyncClient() as client:
-                resp = await client.get(file_url, timeout=30.0)
-                if resp.status_code != 200:
-                    raise Exception(f"Failed to download PDF. Status: {resp.status_code}")
-                with open(temp_filename, "wb") as f:
-                    f.write(resp.content)
-            target_file = temp_filename
+            report_progress("Downloading PDF...", phase="download")
+            with PHASE_SECONDS.time(phase="pdf_download"):
+                spool_file, doc_hash = await _download_pdf(file_url, log_id)
+            target_file = spool_file
             
         elif file_path and os.path.exists(file_path):
             logger.info(f"Using local file: {file_path}")
             target_file = file_path
+            doc_hash = await asyncio.to_thread(sha256_file, target_file)
         else:
             raise ValueError("No valid file_url or file_path provided in payload.")
 
-        # 2. Jalankan Logika Ekstraksi (CPU Bound -> run in thread)
-        logger.info("Running extraction logic...")
-        extraction_result = await asyncio.to_thread(_extract_data_sync, target_file)
+        # 2-3. Cek cache lalu ekstraksi (CPU bound -> worker process)
+        extraction_result, _ = await _parse_document(target_file, doc_hash)
         
         logger.info(f"Extraction success. Found {len(extraction_result.get('services', []))} services.")
+        report_progress(f"Found {len(extraction_result.get('services', []))} services.", phase="done")
         final_status = "SUCCESS"
 
+        # 4. Simpan ke index service (gagal index tidak menggagalkan task)
+        await _index_document(doc_hash, extraction_result, log_id, source=file_url or file_path)
+
     except Exception as e:
         logger.exception(f"Parsing failed: {e}")
+        report_progress(f"Parsing failed: {e}", kind="log")
         error_msg = str(e)
         final_status = "FAILED"
     
     finally:
-        # 3. Cleanup Temp File
-        if file_url and os.path.exists(temp_filename):
-            os.remove(temp_filename)
-
-        # 4. Report ke Laravel
-        output_content = error_msg if final_status == "FAILED" else ""
-        # Jika sukses, output_content kosong, tapi result_data terisi JSON
-        await report_status_to_laravel(log_id, final_status, output_content, result_data=extraction_result)
\ No newline at end of file
+        # 5. Cleanup Spool File
+        if spool_file and os.path.exists(spool_file):
+            os.remove(spool_file)
+
+    # 6. Report ke Laravel (di luar finally: task yang dibatalkan saat shutdown dijalankan ulang
+    # dari antrian job, bukan dilaporkan FAILED)
+    output_content = error_msg if final_status == "FAILED" else ""
+    # Jika sukses, output_content kosong, tapi result_data terisi JSON
+    await report_status_to_laravel(log_id, final_status, output_content, result_data=extraction_result)
+
+    return final_status
\ No newline at end of file
@@ -0,0 +1,121 @@
+# modules/deployment_parser/worker_pool.py
+import asyncio
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+from typing import Callable, Optional
+
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def _warm_up():
+    """Initializer worker: import pdfplumber sekali saat proses dibuat, bukan saat job pertama."""
+    import pdfplumber  # noqa: F401
+    import pdfminer.high_level  # noqa: F401
+
+
+def _ping() -> int:
+    return os.getpid()
+
+
+DEFAULT_MAX_WORKERS = 4
+
+
+def _default_workers() -> int:
+    """
+    PARSER_WORKERS=0: core CPU dibagi jumlah worker uvicorn (WEB_CONCURRENCY), maksimal DEFAULT_MAX_WORKERS.
+    Tiap worker uvicorn punya pool sendiri; tanpa pembagian ini `--workers 4` di mesin 16 core
+    menjalankan 64 proses ekstraksi.
+    """
+    web_workers = max(1, int(os.environ.get("WEB_CONCURRENCY") or 1))
+    return max(1, min(DEFAULT_MAX_WORKERS, (os.cpu_count() or 1) // web_workers))
+
+
+class ExtractionPool:
+    """
+    Pool proses untuk ekstraksi PDF (CPU bound, pdfplumber).
+    Tiap worker adalah proses terpisah sehingga tidak berebut GIL dengan API,
+    dan di-recycle setelah rata-rata `max_tasks_per_child` job untuk membatasi kebocoran memori.
+
+    Catatan: recycle dilakukan per generasi pool (bukan argumen max_tasks_per_child milik
+    ProcessPoolExecutor) karena argumen tersebut bisa hang di CPython 3.11.
+    """
+
+    def __init__(self, workers: int = 0, max_tasks_per_child: int = 50):
+        self.workers = workers or _default_workers()
+        self.max_tasks_per_child = max_tasks_per_child
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._jobs_on_executor = 0
+
+    @classmethod
+    def from_settings(cls) -> "ExtractionPool":
+        return cls(
+            workers=settings.PARSER_WORKERS,
+            max_tasks_per_child=settings.PARSER_MAX_TASKS_PER_CHILD,
+        )
+
+    def _new_executor(self) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),  # Aman dari thread milik event loop
+            initializer=_warm_up,
+        )
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = self._new_executor()
+            self._jobs_on_executor = 0
+        elif self.max_tasks_per_child and self._jobs_on_executor >= self.workers * self.max_tasks_per_child:
+            # Ganti generasi pool: job yang sedang jalan di pool lama tetap diselesaikan
+            logger.info(f"Recycling PDF extraction workers after {self._jobs_on_executor} jobs.")
+            old_executor = self._executor
+            self._executor = self._new_executor()
+            self._jobs_on_executor = 0
+            old_executor.shutdown(wait=False)
+            for _ in range(self.workers):
+                self._executor.submit(_ping)  # Spawn + warm-up worker baru di background
+        self._jobs_on_executor += 1
+        return self._executor
+
+    async def start(self):
+        """Panaskan semua worker di awal agar job pertama tidak menanggung biaya spawn + import."""
+        loop = asyncio.get_running_loop()
+        if self._executor is None:
+            self._executor = self._new_executor()
+            self._jobs_on_executor = 0
+        pids = await asyncio.gather(*(loop.run_in_executor(self._executor, _ping) for _ in range(self.workers)))
+        logger.info(f"PDF extraction pool ready ({len(set(pids))} worker process(es)).")
+
+    async def run(self, fn: Callable, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        executor = self._get_executor()
+        try:
+            return await loop.run_in_executor(executor, partial(fn, *args, **kwargs))
+        except BrokenProcessPool:
+            # Worker mati (misal OOM-killed). Buang pool agar job berikutnya mendapat pool baru;
+            # job lain yang gagal karena pool yang sama tidak membuang pool pengganti yang sudah dibuat.
+            if self._executor is executor:
+                logger.error("PDF extraction pool is broken. Recreating on next job.")
+                self._executor = None
+            executor.shutdown(wait=False, cancel_futures=True)
+            raise
+
+    def shutdown(self, wait: bool = True):
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait, cancel_futures=True)
+            self._executor = None
+
+
+_pool: Optional[ExtractionPool] = None
+
+
+def get_extraction_pool() -> ExtractionPool:
+    global _pool
+    if _pool is None:
+        _pool = ExtractionPool.from_settings()
+    return _pool
@@ -0,0 +1,145 @@
+# modules/registry.py
+"""
+Registry handler task yang dimuat secara lazy.
+Handler didaftarkan sebagai spec "paket.modul:fungsi"; modulnya baru di-import saat task
+tipe tersebut pertama kali dipakai. Worker yang tidak pernah menerima deployment_parse
+tidak memuat pdfplumber/pdfminer, dan yang tidak menerima ssl_deploy tidak memuat paramiko.
+
+Sumber spec (yang belakangan menimpa yang sebelumnya):
+1. BUILTIN_TASKS di bawah.
+2. Entry point group `tiara_engine.tasks` dari paket yang terpasang (nama = tipe task).
+3. Setting TASK_MODULES, misal {"data_migration": "modules.data_migrator.tasks:run_migration_task"}.
+
+Setting ENABLED_TASKS (dipisah koma, kosong = semua) membatasi tipe task yang dilayani node ini.
+Di event loop, pakai `await registry.load(task_type)`: import pertama berjalan di thread.
+"""
+import asyncio
+import importlib
+import logging
+from importlib.metadata import entry_points
+from typing import Any, Awaitable, Callable, Dict, Iterable, Iterator, Mapping, Optional, Union
+
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+TaskHandler = Callable[[Dict[str, Any]], Awaitable[Any]]
+HandlerSpec = Union[str, TaskHandler]
+
+ENTRY_POINT_GROUP = "tiara_engine.tasks"
+
+BUILTIN_TASKS: Dict[str, str] = {
+    "ssl_deploy": "modules.ssl_updater.tasks:run_ssl_deploy_task",
+    "ssl_deploy_batch": "modules.ssl_updater.tasks:run_ssl_deploy_batch_task",
+    "deployment_parse": "modules.deployment_parser.tasks:run_deployment_parse_task",
+    "deployment_parse_bulk": "modules.deployment_parser.bulk:run_deployment_parse_bulk_task",
+    # "data_migration": "modules.data_migrator.tasks:run_migration_task",
+}
+
+
+def _parse_enabled(value: str) -> Optional[frozenset]:
+    names = frozenset(name.strip() for name in value.split(",") if name.strip())
+    return names or None
+
+
+def load_spec(spec: str) -> TaskHandler:
+    module_name, _, attr = spec.partition(":")
+    if not module_name or not attr:
+        raise ValueError(f"Invalid task handler spec '{spec}' (expected 'package.module:function')")
+    handler: Any = importlib.import_module(module_name)
+    for part in attr.split("."):
+        handler = getattr(handler, part)
+    return handler
+
+
+class TaskRegistry(Mapping[str, TaskHandler]):
+    """
+    Mapping tipe task -> handler. Iterasi/`in` hanya membaca spec (tanpa import);
+    `registry[task_type]` me-resolve handler (import modul sekali, lalu di-cache).
+    """
+
+    def __init__(self, specs: Optional[Dict[str, HandlerSpec]] = None, enabled: Optional[Iterable[str]] = None,
+                 entry_point_group: Optional[str] = ENTRY_POINT_GROUP):
+        self._base_specs: Dict[str, HandlerSpec] = dict(specs or {})
+        self._registered: Dict[str, HandlerSpec] = {}
+        self.enabled = frozenset(enabled) if enabled is not None else None
+        self.entry_point_group = entry_point_group
+        self._specs: Optional[Dict[str, HandlerSpec]] = None
+        self._handlers: Dict[str, TaskHandler] = {}
+
+    @classmethod
+    def from_settings(cls) -> "TaskRegistry":
+        registry = cls(BUILTIN_TASKS, enabled=_parse_enabled(settings.ENABLED_TASKS))
+        for task_type, spec in settings.TASK_MODULES.items():
+            registry.register(task_type, spec)
+        return registry
+
+    def _all_specs(self) -> Dict[str, HandlerSpec]:
+        if self._specs is None:
+            # Entry point dibaca saat lookup pertama, bukan saat import (scan metadata paket tidak gratis)
+            specs = dict(self._base_specs)
+            if self.entry_point_group:
+                for ep in entry_points(group=self.entry_point_group):
+                    specs[ep.name] = ep.value
+            specs.update(self._registered)
+            self._specs = specs
+            if self.enabled is not None:
+                unknown = self.enabled - specs.keys()
+                if unknown:
+                    logger.warning(f"ENABLED_TASKS contains unknown task type(s): {', '.join(sorted(unknown))}")
+        return self._specs
+
+    def register(self, task_type: str, handler: HandlerSpec):
+        """Daftarkan spec "modul:fungsi" atau callable langsung (menimpa pendaftaran sebelumnya)."""
+        self._registered[task_type] = handler
+        self._handlers.pop(task_type, None)
+        if self._specs is not None:
+            self._specs[task_type] = handler
+
+    def is_registered(self, task_type: str) -> bool:
+        return task_type in self._all_specs()
+
+    def is_enabled(self, task_type: str) -> bool:
+        return self.is_registered(task_type) and (self.enabled is None or task_type in self.enabled)
+
+    def spec(self, task_type: str) -> Optional[HandlerSpec]:
+        return self._all_specs().get(task_type) if self.is_enabled(task_type) else None
+
+    def __getitem__(self, task_type: str) -> TaskHandler:
+        handler = self._handlers.get(task_type)
+        if handler is not None:
+            return handler
+        spec = self.spec(task_type)
+        if spec is None:
+            raise KeyError(task_type)
+        if isinstance(spec, str):
+            logger.info(f"Loading handler for task '{task_type}' from {spec}")
+            handler = load_spec(spec)
+        else:
+            handler = spec
+        self._handlers[task_type] = handler
+        return handler
+
+    async def load(self, task_type: str) -> TaskHandler:
+        """Seperti registry[task_type], tapi import modul handler (bisa ratusan ms) tidak memblokir event loop."""
+        handler = self._handlers.get(task_type)
+        if handler is not None:
+            return handler
+        return await asyncio.to_thread(self.__getitem__, task_type)
+
+    def __iter__(self) -> Iterator[str]:
+        return (task_type for task_type in self._all_specs() if self.is_enabled(task_type))
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def __contains__(self, task_type: object) -> bool:
+        return isinstance(task_type, str) and self.is_enabled(task_type)
+
+    def loaded(self) -> Dict[str, TaskHandler]:
+        return dict(self._handlers)
+
+    def preload(self):
+        """Import semua handler yang aktif sekarang (TASK_PRELOAD=true), seperti perilaku lama."""
+        for task_type in self:
+            self[task_type]
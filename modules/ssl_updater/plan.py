@@ -0,0 +1,70 @@
+# modules/ssl_updater/plan.py
+"""
+Remote execution plan: beberapa step shell dikompilasi menjadi SATU script yang dijalankan
+dalam satu exec channel. Setiap step mencetak marker berisi exit code-nya, sehingga hasil
+per step tetap bisa dilaporkan ke log_buffer seperti saat step dijalankan satu per satu.
+"""
+import shlex
+from dataclasses import dataclass
+from typing import Dict, List
+
+PLAN_MARKER = "@@TIARA:"
+
+
+@dataclass
+class PlanStep:
+    name: str
+    command: str
+    required: bool = False   # Gagal -> jalankan `cleanup` lalu hentikan plan
+    cleanup: str = ""
+
+
+@dataclass
+class StepResult:
+    exit_status: int
+    output: str  # stdout + stderr step ini
+
+
+class RemotePlan:
+    def __init__(self):
+        self.steps: List[PlanStep] = []
+
+    def add(self, name: str, command: str, required: bool = False, cleanup: str = "") -> "RemotePlan":
+        self.steps.append(PlanStep(name, command, required, cleanup))
+        return self
+
+    def script(self) -> str:
+        lines = []
+        for step in self.steps:
+            # Subshell: `exit` di dalam command hanya mengakhiri step ini
+            lines.append(f'( {step.command} ) 2>&1; rc=$?; echo "{PLAN_MARKER}{step.name}:$rc"')
+            if step.required:
+                cleanup = f"{step.cleanup}; " if step.cleanup else ""
+                lines.append(f'[ "$rc" -eq 0 ] || {{ {cleanup}exit "$rc"; }}')
+        return "\n".join(lines)
+
+    def command(self) -> str:
+        """Command untuk exec: script dijalankan oleh sh (tidak bergantung login shell user)."""
+        return "sh -c " + shlex.quote(self.script())
+
+    @staticmethod
+    def parse(output: str) -> Dict[str, StepResult]:
+        """Pecah output plan per step. Step yang tidak punya marker tidak sempat berjalan."""
+        results: Dict[str, StepResult] = {}
+        buffer: List[str] = []
+        for line in output.splitlines():
+            position = line.find(PLAN_MARKER)
+            if position < 0:
+                buffer.append(line)
+                continue
+            if position:
+                buffer.append(line[:position])
+            name, _, code = line[position + len(PLAN_MARKER):].rpartition(":")
+            try:
+                exit_status = int(code)
+            except ValueError:
+                buffer.append(line)
+                continue
+            results[name] = StepResult(exit_status, "\n".join(buffer).strip())
+            buffer = []
+        return results
@@ -0,0 +1,153 @@
+# modules/ssl_updater/restart.py
+"""
+Penggabungan restart web server per host.
+Beberapa deploy ke host yang sama (dengan user, kredensial, dan restart_command yang sama) dalam
+satu jendela waktu cukup memicu SATU restart; semua deploy menerima hasil restart yang sama.
+Restart tidak menunggu jendela penuh jika tidak ada deploy lain ke host itu yang masih berjalan
+(deploy mendaftar lewat expect() sebelum mulai). Batch rollout mendaftarkan semua targetnya sekaligus,
+dan slot per host hanya dipegang selama fase SSH, jadi target ke host yang sama tetap bisa bergabung.
+"""
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Set, Tuple
+
+from core.config import settings
+from core.metrics import PHASE_SECONDS, SSL_RESTARTS
+from core.ssh_pool import _credential_digest, get_ssh_pool
+
+logger = logging.getLogger(__name__)
+
+# (server_ip, server_port, ssh_user, digest kredensial, restart_command): password lama dan baru tidak berbagi restart
+RestartKey = Tuple[str, int, str, str, str]
+
+
+def _restart_key(server_ip: str, server_port: int, ssh_user: str, ssh_pass: Optional[str],
+                 restart_cmd: str) -> RestartKey:
+    return (server_ip, int(server_port), ssh_user, _credential_digest(ssh_pass), restart_cmd)
+
+
+@dataclass
+class RestartResult:
+    exit_status: int
+    out_str: str
+    err_str: str
+    shared_with: int = 0  # Jumlah deploy lain yang ikut memakai restart ini
+
+
+@dataclass
+class _PendingRestart:
+    future: asyncio.Future
+    waiters: int = 0
+    ssh_pass: Optional[str] = field(default=None, repr=False)
+    ready: asyncio.Event = field(default_factory=asyncio.Event)  # Semua deploy yang diharapkan sudah bergabung
+
+
+class ExpectedDeploy:
+    """Deploy yang sedang berjalan ke satu host; restart yang menunggu jendela ikut menunggunya."""
+
+    def __init__(self, coalescer: "RestartCoalescer", key: RestartKey):
+        self._coalescer = coalescer
+        self.key = key
+        self.active = True
+
+    def release(self):
+        """Idempoten: dipanggil saat deploy bergabung ke restart, atau selesai tanpa restart."""
+        if self.active:
+            self.active = False
+            self._coalescer._leave(self.key)
+
+
+def _retrieve_exception(future: asyncio.Future):
+    # Semua penunggu bisa saja sudah dibatalkan; exception restart tetap "diambil" agar tidak di-log asyncio
+    if not future.cancelled():
+        future.exception()
+
+
+class RestartCoalescer:
+    def __init__(self, window: float = 2.0):
+        self.window = window
+        self._pending: Dict[RestartKey, _PendingRestart] = {}
+        self._expected: Dict[RestartKey, int] = {}
+        self._tasks: Set[asyncio.Task] = set()  # Referensi kuat: task tanpa referensi bisa di-GC di tengah jalan
+
+    def expect(self, server_ip: str, server_port: int, ssh_user: str, ssh_pass: Optional[str],
+               restart_cmd: str) -> ExpectedDeploy:
+        """Daftarkan deploy yang nantinya (mungkin) meminta restart; wajib di-release di finally."""
+        key = _restart_key(server_ip, server_port, ssh_user, ssh_pass, restart_cmd)
+        self._expected[key] = self._expected.get(key, 0) + 1
+        return ExpectedDeploy(self, key)
+
+    def _leave(self, key: RestartKey):
+        left = self._expected.get(key, 0) - 1
+        if left > 0:
+            self._expected[key] = left
+            return
+        self._expected.pop(key, None)
+        pending = self._pending.get(key)
+        if pending is not None:
+            pending.ready.set()
+
+    async def restart(self, server_ip: str, server_port: int, ssh_user: str, ssh_pass: Optional[str],
+                      restart_cmd: str, expected: Optional[ExpectedDeploy] = None) -> RestartResult:
+        """
+        Panggil SETELAH file sertifikat dipindahkan dan koneksi SSH dikembalikan ke pool,
+        agar restart (yang memakai koneksi pool sendiri) tidak menunggu slot yang sedang dipegang.
+        `expected` (dari expect()) dilepas di sini: deploy ini sudah bergabung.
+        """
+        key = _restart_key(server_ip, server_port, ssh_user, ssh_pass, restart_cmd)
+        pending = self._pending.get(key)
+        if pending is None:
+            pending = _PendingRestart(asyncio.get_running_loop().create_future(), ssh_pass=ssh_pass)
+            self._pending[key] = pending
+            task = asyncio.create_task(self._run_after_window(key, pending))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        else:
+            SSL_RESTARTS.inc(outcome="coalesced")
+        pending.waiters += 1
+        if expected is not None:
+            expected.release()
+        if key not in self._expected:
+            pending.ready.set()  # Tidak ada deploy lain ke host ini yang masih berjalan
+        try:
+            # shield: pembatalan satu deploy tidak membatalkan restart milik deploy lain
+            return await asyncio.shield(pending.future)
+        except asyncio.CancelledError:
+            pending.future.add_done_callback(_retrieve_exception)
+            raise
+
+    async def _run_after_window(self, key: RestartKey, pending: _PendingRestart):
+        try:
+            if self.window > 0:
+                try:
+                    await asyncio.wait_for(pending.ready.wait(), self.window)
+                except asyncio.TimeoutError:
+                    pass  # Deploy yang belum sampai tidak ditunggu lebih lama; mereka memakai restart berikutnya
+        finally:
+            # Deploy yang datang setelah ini memulai jendela baru (file mereka belum ikut ter-reload)
+            self._pending.pop(key, None)
+
+        server_ip, server_port, ssh_user, _, restart_cmd = key
+        try:
+            async with get_ssh_pool().acquire(server_ip, server_port, ssh_user, pending.ssh_pass) as conn:
+                if pending.waiters > 1:
+                    logger.info(f"Running one restart on {server_ip} for {pending.waiters} deployments: {restart_cmd}")
+                with PHASE_SECONDS.time(phase="restart"):
+                    exit_status, out_str, err_str = await conn.exec(restart_cmd)
+            SSL_RESTARTS.inc(outcome="executed")
+            pending.future.set_result(RestartResult(exit_status, out_str, err_str, pending.waiters - 1))
+        except BaseException as e:
+            pending.future.set_exception(e)
+            if not isinstance(e, Exception):
+                raise
+
+
+_coalescer: Optional[RestartCoalescer] = None
+
+
+def get_restart_coalescer() -> RestartCoalescer:
+    global _coalescer
+    if _coalescer is None:
+        _coalescer = RestartCoalescer(settings.SSL_RESTART_COALESCE_WINDOW)
+    return _coalescer
@@ -1,48 +1,99 @@
 import asyncio
+import hashlib
 import logging
-import paramiko
 import io
-import httpx
-from typing import Dict, Any
+import re
+import json
+import shlex
+import uuid
+from contextlib import asynccontextmanager, nullcontext
+from typing import AsyncContextManager, Dict, Any, List, Optional
 from core.config import settings
+from core.metrics import PHASE_SECONDS, SSL_RESTARTS, SSL_VALIDATIONS
+from core.progress import ProgressLog, report_progress
+from core.ssh_pool import PooledConnection, get_ssh_pool
+from core.webhook import report_status_to_laravel
+from .plan import RemotePlan
+from .restart import ExpectedDeploy, get_restart_coalescer
+from .validation import get_bundle_validator, leaf_fingerprint
 
 # Inisialisasi logger khusus untuk modul ini
 logger = logging.getLogger(__name__)
 
-async def report_status_to_laravel(log_id: int, status: str, output_log: str):
+def _safe_name(value: str) -> str:
+    # Nama file sementara: domain wildcard (*.example.com) dan karakter lain diganti '_'
+    return re.sub(r"[^A-Za-z0-9._-]", "_", value or "cert")
+
+def _content_sha256(content: str) -> str:
+    # SFTP menulis konten sebagai UTF-8, jadi hash ini sama dengan sha256sum file di server
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+async def _remote_fingerprints(conn: PooledConnection, paths: List[str]) -> Dict[str, str]:
+    """SHA-256 file remote dalam SATU command. File yang tidak ada / tidak terbaca tidak masuk hasil."""
+    command = "sudo -n sha256sum -- " + " ".join(shlex.quote(p) for p in paths)
+    with PHASE_SECONDS.time(phase="remote_fingerprint"):
+        _, out_str, _ = await conn.exec(command)  # Exit != 0 jika sebagian file tidak ada; output tetap dipakai
+    fingerprints = {}
+    for line in out_str.splitlines():
+        digest, _, path = line.partition("  ")
+        if len(digest) == 64 and path:
+            fingerprints[path] = digest
+    return fingerprints
+
+async def _live_fingerprint(conn: PooledConnection, domain_name: str, tls_port: int) -> str:
     """
-    Fungsi bantu untuk mengirim laporan balik ke Laravel via Webhook.
+    SHA-256 sertifikat yang sedang disajikan web server (dibaca dari host itu sendiri, dengan SNI domain).
+    String kosong jika tidak bisa dibaca (openssl tidak ada, port salah, dsb.).
     """
-    webhook_url = settings.TIARA_WEBHOOK_URL
-    secret_token = settings.TIARA_SYNC_KEY
-    payload = {
-        "log_id": log_id,
-        "status": status,          # 'SUCCESS' atau 'FAILED'
-        "output_log": output_log,  # Log lengkap untuk debugging di UI Laravel
-    }
-    headers = {
-        'X-Engine-Secret': secret_token, 
-        'Accept': 'application/json',
-    }
-    try:
-        async with httpx.AsyncClient() as client:
-            # Kirim POST request ke Laravel dengan timeout 10 detik
-            response = await client.post(webhook_url, json=payload, headers=headers, timeout=10.0)
-            if response.status_code == 200:
-                logger.info(f"Successfully reported status for Deployment {log_id}")
-            else:
-                logger.warning(f"Failed to report status to Laravel. Code: {response.status_code}, Body: {response.text}")
-    except Exception as e:
-        logger.error(f"Error reporting to webhook: {e}")
+    server_name = (domain_name or "localhost").replace("*", "www", 1)  # SNI tidak boleh wildcard
+    command = (f"echo | timeout 10 openssl s_client -connect 127.0.0.1:{int(tls_port)} "
+               f"-servername {shlex.quote(server_name)} 2>/dev/null | openssl x509 -noout -fingerprint -sha256")
+    with PHASE_SECONDS.time(phase="remote_fingerprint"):
+        _, out_str, _ = await conn.exec(command)
+    _, _, digest = out_str.partition("=")
+    return digest.strip().replace(":", "").lower()
 
-async def run_ssl_deploy_task(payload: Dict[str, Any]):
+async def _check_bundle(data: Dict[str, Any], log_buffer: List[str]) -> bool:
     """
-    Task utama yang dijalankan di background oleh Celery/FastAPI BackgroundTasks.
-    Menerima payload lengkap dari Laravel.
+    Validasi bundle secara lokal sebelum koneksi SSH (lihat validation.py).
+    Return False jika bundle ditolak; alasannya dicatat ke log_buffer.
+    Validasi berjalan di thread: load key RSA bisa memakan puluhan ms.
+    """
+    if not settings.SSL_VALIDATE_BUNDLE:
+        return True
+    # Chain hanya ikut dicek jika memang di-deploy ke chain_path
+    chain_content = data.get('new_chain_content') if data.get('chain_path') else None
+    with PHASE_SECONDS.time(phase="bundle_validation"):
+        result, cached = await asyncio.to_thread(
+            get_bundle_validator().validate,
+            data.get('new_cert_content'), data.get('new_key_content'), chain_content, data.get('domain_name'))
+    SSL_VALIDATIONS.inc(outcome="valid" if result.ok else "invalid", cache="hit" if cached else "miss")
+
+    for warning in result.warnings:
+        log_buffer.append(f"WARNING: {warning}")
+    if result.ok:
+        if result.subject:
+            log_buffer.append(f"Certificate bundle validated locally ({result.subject}, "
+                              f"valid until {result.not_after.isoformat()}).")
+        return True
+    if not cached:  # Batch rollout: cukup sekali per bundle, bukan sekali per target
+        logger.warning(f"Certificate bundle for {data.get('domain_name')} rejected: {'; '.join(result.errors)}")
+    for error in result.errors:
+        log_buffer.append(f"Bundle validation FAILED: {error}")
+    log_buffer.append("Deployment aborted before connecting to the server. No files were changed.")
+    return False
+
+async def _deploy_certificate(data: Dict[str, Any], log_buffer: List[str], expected: Optional[ExpectedDeploy] = None,
+                              limit: Optional[AsyncContextManager] = None) -> str:
+    """
+    Step 0-4 untuk satu server: validasi bundle, koneksi, cek perubahan, backup, upload, pindah file, dan restart.
+    `data` memakai format yang sama dengan payload 'ssl_deploy'
+    (opsional 'force_deploy': true untuk melewati cek perubahan, 'tls_port' (default 443) untuk
+    membaca sertifikat yang sedang disajikan saat file di server sudah sama dengan payload).
+    `expected`: tiket dari RestartCoalescer.expect() jika pemanggil sudah mendaftarkan deploy ini
+    (batch rollout); `limit`: dipegang hanya selama fase SSH (step 1-3), tidak selama restart.
+    Return 'SUCCESS' atau 'FAILED'; semua detail dicatat ke log_buffer.
     """
-    # 1. Ekstrak data dari payload
-    data = payload.get('data', {})
-    log_id = payload.get('log_id')
     domain_name = data.get('domain_name')
     
     # Data Server & Kredensial
@@ -61,136 +112,172 @@ async def run_ssl_deploy_task(payload: Dict[str, Any]):
     new_cert_content = data.get('new_cert_content')
     new_key_content = data.get('new_key_content')
     new_chain_content = data.get('new_chain_content') # Opsional
-    # logger.DEBUG(f"cer content{new_cert_content}")
-    logger.info(f"cer content{new_cert_content}")
-
-    logger.info(f"[START] Updating SSL Domain: {domain_name} on {server_ip}")
-    log_buffer = [] 
 
-    ssh = paramiko.SSHClient()
-    ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+    pool = get_ssh_pool()
+    restarts = get_restart_coalescer()
+    # Restart host ini yang sedang menunggu jendela ikut menunggu deploy ini (lihat restart.py)
+    if expected is None:
+        expected = restarts.expect(server_ip, server_port, ssh_user, ssh_pass, restart_cmd)
+    up_to_date = False
 
     try:
-        # --- STEP 1: KONEKSI SSH ---
+        # --- STEP 0: VALIDASI BUNDLE LOKAL (tanpa SSH; hasil di-cache per fingerprint bundle) ---
+        if not await _check_bundle(data, log_buffer):
+            return "FAILED"
+
+        # --- STEP 1: KONEKSI SSH (via pool) ---
         logger.info(f"Connecting to {server_ip}:{server_port} as {ssh_user}...")
         log_buffer.append(f"Connecting to {server_ip}...")
         
-        # Gunakan asyncio.to_thread agar koneksi blocking tidak menghentikan aplikasi utama
-        await asyncio.to_thread(ssh.connect, hostname=server_ip, port=server_port, username=ssh_user, password=ssh_pass, timeout=20)
-        
-        logger.info("SSH Connection established.")
-        log_buffer.append("SSH Connection established.")
+        # Transport diambil dari pool; task lain ke server yang sama memakai ulang koneksinya
+        async with limit or nullcontext(), pool.acquire(server_ip, server_port, ssh_user, ssh_pass) as conn:
+            logger.info("SSH Connection established.")
+            log_buffer.append("SSH Connection established.")
 
-        # Buka SFTP session untuk transfer file
-        sftp = ssh.open_sftp()
+            # Semua operasi remote di bawah ini berjalan di executor SSH (tidak memblokir event loop)
 
-        # --- STEP 2: BACKUP FILE LAMA (PERBAIKAN) ---
-        timestamp = "backup_tiara"
-        try:
-            # 1. Cek apakah file ada.
-            sftp.stat(cert_path) 
-            
-            # 2. Jika ada, jalankan backup DAN TUNGGU SAMPAI SELESAI
-            log_buffer.append(f"File {cert_path} exists. Attempting backup...")
-            backup_cmd = f"cp {cert_path} {cert_path}.{timestamp}"
-            
-            # --- INI CARA MEMBUATNYA MENUNGGU ---
-            stdin, stdout, stderr = ssh.exec_command(backup_cmd)
-            exit_status = stdout.channel.recv_exit_status() # <-- Ini akan 'blocking'
-            
-            if exit_status == 0:
-                log_buffer.append(f"Backed up old cert to {cert_path}.{timestamp}")
-            else:
-                err_str = stderr.read().decode().strip()
-                log_buffer.append(f"WARNING: Failed to backup file (Code {exit_status}). Error: {err_str}. Proceeding anyway...")
+            # --- STEP 1.5: CEK PERUBAHAN (fingerprint file remote vs payload) ---
+            candidates = {}
+            if new_cert_content:
+                candidates['cert'] = (cert_path, new_cert_content)
+            if new_key_content:
+                candidates['key'] = (key_path, new_key_content)
+            if chain_path and new_chain_content:
+                candidates['chain'] = (chain_path, new_chain_content)
 
-        except (FileNotFoundError, IOError) as e:
-            # 3. PERBAIKAN: Tangkap IOError (spt Permission Denied) dan FileNotFoundError
-            # Jika file tidak ada ATAU tidak bisa diakses, skip backup.
-            log_buffer.append(f"No existing file at {cert_path} or cannot access. Skipping backup.")
-            logger.info(f"No existing file at {cert_path} or cannot access. Skipping backup.")
-            pass # Lanjutkan ke Step 3
+            if candidates and not data.get('force_deploy'):
+                remote = await _remote_fingerprints(conn, [path for path, _ in candidates.values()])
+                unchanged = [label for label, (path, content) in candidates.items()
+                             if remote.get(path) == _content_sha256(content)]
+                if not remote:
+                    log_buffer.append("Could not read remote fingerprints. Deploying all files.")
+                for label in unchanged:
+                    log_buffer.append(f"Remote {label} {candidates[label][0]} already matches payload. Skipping upload.")
+                # File yang sama tidak di-upload / dipindah (step 3 & 3.5 melewati konten None)
+                if 'cert' in unchanged:
+                    new_cert_content = None
+                if 'key' in unchanged:
+                    new_key_content = None
+                if 'chain' in unchanged:
+                    new_chain_content = None
+                up_to_date = len(unchanged) == len(candidates)
 
-        # --- STEP 3: UPLOAD FILE BARU (VIA TMP) ---
-        logger.info("Uploading new SSL files to temporary location...")
-        log_buffer.append("Uploading files to /tmp/...")
+            if up_to_date:
+                # File sama belum tentu sudah aktif (misal restart deploy sebelumnya gagal):
+                # restart hanya dilewati jika web server memang sudah menyajikan sertifikat baru
+                new_fingerprint = leaf_fingerprint(data.get('new_cert_content'))
+                live = await _live_fingerprint(conn, domain_name, data.get('tls_port', 443))
+                if new_fingerprint and live == new_fingerprint:
+                    logger.info(f"Certificate for {domain_name} on {server_ip} is already live. Skipping upload and restart.")
+                    log_buffer.append("Certificate already up to date and being served. Skipping upload and restart.")
+                    SSL_RESTARTS.inc(outcome="skipped")
+                    return "SUCCESS"
+                log_buffer.append("Certificate files already up to date, but the web server is not serving "
+                                  "this certificate (or it could not be checked). Restarting anyway.")
 
-        # Tentukan lokasi sementara
-        tmp_cert_path = f"/tmp/{domain_name}.crt"
-        tmp_key_path = f"/tmp/{domain_name}.key"
-        tmp_chain_path = f"/tmp/{domain_name}.chain"
+            # --- STEP 2: UPLOAD FILE BARU (VIA TMP, SFTP PIPELINED) ---
+            # (file yang sudah sama dilewati; jika semuanya sama, langsung ke restart)
+            if not up_to_date:
+                logger.info("Uploading new SSL files to temporary location...")
+                log_buffer.append("Uploading files to /tmp/...")
 
-        try:
-            # Upload Cert ke /tmp/
+            # Lokasi sementara unik per deploy: deploy paralel untuk domain yang sama tidak saling menimpa
+            tmp_prefix = f"/tmp/{_safe_name(domain_name)}.{uuid.uuid4().hex[:12]}"
+            tmp_cert_path = f"{tmp_prefix}.crt"
+            tmp_key_path = f"{tmp_prefix}.key"
+            tmp_chain_path = f"{tmp_prefix}.chain"
+
+            uploads = []
+            if new_cert_content:
+                uploads.append(("cert", tmp_cert_path, new_cert_content))
+            if new_key_content:
+                uploads.append(("key", tmp_key_path, new_key_content))
+            if chain_path and new_chain_content:
+                uploads.append(("chain", tmp_chain_path, new_chain_content))
+
+            try:
+                if uploads:
+                    with PHASE_SECONDS.time(phase="sftp_upload"):
+                        await conn.write_files([(path, content) for _, path, content in uploads])
+            except Exception as e:
+                # Gagal upload bahkan ke /tmp/
+                raise Exception(f"Failed to upload to /tmp/ directory. Error: {e}")
+            for label, path, _ in uploads:
+                log_buffer.append(f"Uploaded {label} to {path}")
+
+            logger.info("Files uploaded to temp. Moving to final destination...")
+
+            # --- STEP 3: BACKUP + PINDAHKAN FILE (SATU REMOTE PLAN, DENGAN SUDO) ---
+            q = shlex.quote
+            plan = RemotePlan()
+
+            # Backup cert lama (cert yang tidak berubah di step 1.5 tidak perlu di-backup).
+            # Exit 3 = file tidak ada / tidak bisa diakses -> skip backup.
+            timestamp = "backup_tiara"
+            if new_cert_content:
+                plan.add("backup", f"[ -e {q(cert_path)} ] || exit 3; cp {q(cert_path)} {q(f'{cert_path}.{timestamp}')}")
+
+            # Buat daftar perintah yang akan dieksekusi
+            move_commands = []
             if new_cert_content:
-                with sftp.open(tmp_cert_path, 'w') as f:
-                    f.write(new_cert_content)
-                log_buffer.append(f"Uploaded cert to {tmp_cert_path}")
-            
-            # Upload Key ke /tmp/
+                move_commands.append(f"sudo mv {q(tmp_cert_path)} {q(cert_path)}")
+                move_commands.append(f"sudo chown root:root {q(cert_path)}") # Amankan kepemilikan
+                move_commands.append(f"sudo chmod 644 {q(cert_path)}")       # Amankan izin
+
             if new_key_content:
-                with sftp.open(tmp_key_path, 'w') as f:
-                    f.write(new_key_content)
-                log_buffer.append(f"Uploaded key to {tmp_key_path}")
+                move_commands.append(f"sudo mv {q(tmp_key_path)} {q(key_path)}")
+                move_commands.append(f"sudo chown root:root {q(key_path)}")
+                move_commands.append(f"sudo chmod 600 {q(key_path)}") # Key harus lebih ketat
 
-            # Upload Chain (jika ada) ke /tmp/
             if chain_path and new_chain_content:
-                with sftp.open(tmp_chain_path, 'w') as f:
-                    f.write(new_chain_content)
-                log_buffer.append(f"Uploaded chain to {tmp_chain_path}")
+                move_commands.append(f"sudo mv {q(tmp_chain_path)} {q(chain_path)}")
+                move_commands.append(f"sudo chown root:root {q(chain_path)}")
+                move_commands.append(f"sudo chmod 644 {q(chain_path)}")
 
-        except Exception as e:
-            # Gagal upload bahkan ke /tmp/
-            raise Exception(f"Failed to upload to /tmp/ directory. Error: {e}")
-        finally:
-            sftp.close() # Kita tutup sftp di sini
+            # Gabungkan semua perintah jadi satu; jika gagal, file sementara (termasuk key) dihapus
+            full_move_command = " && ".join(move_commands)
+            if full_move_command:
+                cleanup = "rm -f " + " ".join(q(path) for _, path, _ in uploads)
+                plan.add("move", full_move_command, required=True, cleanup=cleanup)
+                log_buffer.append(f"Executing: {full_move_command}")
 
-        logger.info("Files uploaded to temp. Moving to final destination...")
+            if plan.steps:
+                with PHASE_SECONDS.time(phase="remote_move"):
+                    exit_status, out_str, err_str = await conn.exec(plan.command()) # Tunggu selesai
+                results = RemotePlan.parse(out_str)
 
-        # --- STEP 3.5: PINDAHKAN FILE DARI /tmp/ KE LOKASI ASLI (DENGAN SUDO) ---
-        
-        # Buat daftar perintah yang akan dieksekusi
-        move_commands = []
-        if new_cert_content:
-            move_commands.append(f"sudo mv {tmp_cert_path} {cert_path}")
-            move_commands.append(f"sudo chown root:root {cert_path}") # Amankan kepemilikan
-            move_commands.append(f"sudo chmod 644 {cert_path}")       # Amankan izin
-        
-        if new_key_content:
-            move_commands.append(f"sudo mv {tmp_key_path} {key_path}")
-            move_commands.append(f"sudo chown root:root {key_path}")
-            move_commands.append(f"sudo chmod 600 {key_path}") # Key harus lebih ketat
-        
-        if chain_path and new_chain_content:
-            move_commands.append(f"sudo mv {tmp_chain_path} {chain_path}")
-            move_commands.append(f"sudo chown root:root {chain_path}")
-            move_commands.append(f"sudo chmod 644 {chain_path}")
+                backup = results.get("backup")
+                if backup is not None:
+                    if backup.exit_status == 3:
+                        # Jika file tidak ada ATAU tidak bisa diakses, skip backup.
+                        log_buffer.append(f"No existing file at {cert_path} or cannot access. Skipping backup.")
+                        logger.info(f"No existing file at {cert_path} or cannot access. Skipping backup.")
+                    elif backup.exit_status == 0:
+                        log_buffer.append(f"File {cert_path} exists. Backed up old cert to {cert_path}.{timestamp}")
+                    else:
+                        log_buffer.append(f"WARNING: Failed to backup file (Code {backup.exit_status}). Error: {backup.output}. Proceeding anyway...")
 
-        # Gabungkan semua perintah jadi satu
-        full_move_command = " && ".join(move_commands)
-        
-        if full_move_command:
-            log_buffer.append(f"Executing: {full_move_command}")
-            stdin, stdout, stderr = ssh.exec_command(full_move_command)
-            exit_status = stdout.channel.recv_exit_status() # Tunggu selesai
-            
-            if exit_status != 0:
-                # GAGAL memindahkan file
-                err_str = stderr.read().decode().strip() or stdout.read().decode().strip()
-                raise Exception(f"Failed to move files from /tmp/ (Code {exit_status}). Error: {err_str}")
-
-        logger.info("All files moved successfully.")
-        log_buffer.append("All files moved successfully.")
+                move = results.get("move")
+                if full_move_command and (move is None or move.exit_status != 0):
+                    # GAGAL memindahkan file (atau plan terhenti sebelum step move)
+                    code = move.exit_status if move is not None else exit_status
+                    error = (move.output if move is not None else "") or err_str or out_str
+                    raise Exception(f"Failed to move files from /tmp/ (Code {code}). Error: {error}")
+
+            if plan.steps:
+                logger.info("All files moved successfully.")
+                log_buffer.append("All files moved successfully.")
 
         # --- STEP 4: RESTART WEB SERVER ---
+        # Dijalankan setelah koneksi dikembalikan ke pool: deploy lain ke host yang sama
+        # dalam jendela SSL_RESTART_COALESCE_WINDOW berbagi satu restart.
         logger.info(f"Executing restart command: {restart_cmd}")
         log_buffer.append(f"Executing: {restart_cmd}")
 
-        stdin, stdout, stderr = ssh.exec_command(restart_cmd)
-        exit_status = stdout.channel.recv_exit_status() # Tunggu command selesai
-
-        out_str = stdout.read().decode().strip()
-        err_str = stderr.read().decode().strip()
+        restart = await restarts.restart(server_ip, server_port, ssh_user, ssh_pass, restart_cmd, expected)
+        exit_status, out_str, err_str = restart.exit_status, restart.out_str, restart.err_str
+        if restart.shared_with:
+            log_buffer.append(f"Restart shared with {restart.shared_with} other deployment(s) on this host.")
 
         if exit_status == 0:
             logger.info("Web server restarted successfully.")
@@ -198,7 +285,7 @@ async def run_ssl_deploy_task(payload: Dict[str, Any]):
             final_status = "SUCCESS"
         else:
             logger.error(f"Web server restart FAILED. Exit code: {exit_status}")
-            
+
             if err_str:
                 log_buffer.append(f"Restart FAILED (Code {exit_status}). Error: {err_str}")
             elif out_str:
@@ -212,11 +299,141 @@ async def run_ssl_deploy_task(payload: Dict[str, Any]):
         logger.exception(f"Deployment failed due to unexpected error: {e}")
         log_buffer.append(f"CRITICAL ERROR: {str(e)}")
         final_status = "FAILED"
-    
     finally:
-        ssh.close()
-        logger.info(f"[FINISH] Deployment ID {domain_name} finished with status: {final_status}")
-        
-        # --- STEP 5: LAPOR BALIK KE LARAVEL ---
-        full_log = "\n".join(log_buffer)
-        await report_status_to_laravel(log_id, final_status, full_log)
\ No newline at end of file
+        expected.release()
+
+    return final_status
+
+async def run_ssl_deploy_task(payload: Dict[str, Any]):
+    """
+    Task utama yang dijalankan di background oleh Celery/FastAPI BackgroundTasks.
+    Menerima payload lengkap dari Laravel.
+    """
+    # 1. Ekstrak data dari payload
+    data = payload.get('data', {})
+    log_id = payload.get('log_id')
+    domain_name = data.get('domain_name')
+    server_ip = data.get('server_ip')
+    new_cert_content = data.get('new_cert_content')
+    # logger.DEBUG(f"cer content{new_cert_content}")
+    logger.info(f"cer content{new_cert_content}")
+
+    logger.info(f"[START] Updating SSL Domain: {domain_name} on {server_ip}")
+    log_buffer = ProgressLog()  # Tiap baris juga di-stream sebagai event progress
+    final_status = "FAILED"
+
+    try:
+        final_status = await _deploy_certificate(data, log_buffer)
+    except asyncio.CancelledError:
+        # Shutdown: job dikembalikan ke antrian dan dijalankan ulang, jangan lapor FAILED
+        logger.warning(f"[CANCELLED] Deployment ID {domain_name} interrupted; not reporting.")
+        raise
+    logger.info(f"[FINISH] Deployment ID {domain_name} finished with status: {final_status}")
+
+    # --- STEP 5: LAPOR BALIK KE LARAVEL ---
+    full_log = "\n".join(log_buffer)
+    await report_status_to_laravel(log_id, final_status, full_log)
+
+    return final_status
+# --- Batch Rollout: satu bundle sertifikat ke banyak server ---
+BUNDLE_FIELDS = ('domain_name', 'new_cert_content', 'new_key_content', 'new_chain_content')
+
+async def run_ssl_deploy_batch_task(payload: Dict[str, Any]):
+    """
+    Rollout satu bundle sertifikat ke banyak server sekaligus.
+    Payload dari Laravel:
+    {
+        "data": {
+            "domain_name": "*.example.com",
+            "new_cert_content": "...", "new_key_content": "...", "new_chain_content": "...",
+            "cert_path": "...", "restart_command": "...",   (default untuk semua target, opsional)
+            "targets": [
+                {"server_ip": "10.0.0.1", "server_port": 22, "ssh_user": "...", "ssh_pass_raw": "...", ...},
+                ...
+            ],
+            "max_concurrency": 20,  (opsional)
+            "max_per_host": 1       (opsional)
+        },
+        "log_id": 123
+    }
+    Hasil seluruh target dilaporkan dalam SATU webhook.
+    """
+    data = payload.get('data', {})
+    log_id = payload.get('log_id')
+    targets = data.get('targets') or []
+    domain_name = data.get('domain_name')
+
+    max_concurrency = int(data.get('max_concurrency') or settings.SSL_BATCH_MAX_CONCURRENCY)
+    max_per_host = int(data.get('max_per_host') or settings.SSL_BATCH_MAX_PER_HOST)
+
+    # Field selain 'targets' menjadi default untuk setiap target (target boleh override, kecuali bundle)
+    shared = {k: v for k, v in data.items() if k not in ('targets', 'max_concurrency', 'max_per_host')}
+    bundle = {k: data.get(k) for k in BUNDLE_FIELDS}
+
+    logger.info(f"[START] SSL batch rollout {domain_name} to {len(targets)} targets "
+                f"(concurrency={max_concurrency}, per_host={max_per_host})")
+
+    global_limit = asyncio.Semaphore(max_concurrency)
+    host_limits: Dict[str, asyncio.Semaphore] = {}
+    progress = {"done": 0, "succeeded": 0}  # Untuk event progress per target yang selesai
+
+    @asynccontextmanager
+    async def ssh_slot(server_ip: str):
+        async with global_limit, host_limits.setdefault(server_ip, asyncio.Semaphore(max_per_host)):
+            yield
+
+    # Semua target didaftarkan ke coalescer sebelum deploy pertama mulai: restart host yang menunggu
+    # jendela ikut menunggu target lain ke host itu (yang masih antre slot per host)
+    restarts = get_restart_coalescer()
+    target_datas = [{**shared, **target, **{k: v for k, v in bundle.items() if v is not None}} for target in targets]
+    expectations = [
+        restarts.expect(d.get('server_ip'), int(d.get('server_port', 22)), d.get('ssh_user'),
+                        d.get('ssh_pass_raw'), d.get('restart_command'))
+        for d in target_datas
+    ]
+
+    async def deploy_one(index: int, target_data: Dict[str, Any], expected: ExpectedDeploy) -> Dict[str, Any]:
+        server_ip = target_data.get('server_ip')
+        log_buffer = ProgressLog(server_ip=server_ip, target=index)
+        status = "FAILED"
+
+        try:
+            status = await _deploy_certificate(target_data, log_buffer, expected, ssh_slot(server_ip))
+        except Exception as e:
+            logger.exception(f"Batch target {server_ip} failed: {e}")
+            log_buffer.append(f"CRITICAL ERROR: {str(e)}")
+
+        logger.info(f"[BATCH] {domain_name} on {server_ip} finished with status: {status}")
+        progress["done"] += 1
+        progress["succeeded"] += status == "SUCCESS"
+        report_progress(f"{progress['done']}/{len(targets)} targets finished ({progress['succeeded']} succeeded)",
+                        total=len(targets), server_ip=server_ip, target=index, status=status, **progress)
+        return {
+            "index": index,
+            "server_ip": server_ip,
+            "server_port": int(target_data.get('server_port', 22)),
+            "status": status,
+            "output_log": "\n".join(log_buffer),
+        }
+
+    try:
+        results = await asyncio.gather(*(deploy_one(i, d, e) for i, (d, e) in enumerate(zip(target_datas, expectations))))
+    finally:
+        for expected in expectations:
+            expected.release()
+
+    succeeded = sum(1 for r in results if r['status'] == "SUCCESS")
+    final_status = "SUCCESS" if targets and succeeded == len(targets) else "FAILED"
+    summary = {
+        "domain_name": domain_name,
+        "total": len(targets),
+        "succeeded": succeeded,
+        "failed": len(targets) - succeeded,
+        "targets": results,
+    }
+    if not targets:
+        summary["error"] = "No targets provided in payload."
+
+    logger.info(f"[FINISH] SSL batch rollout {domain_name}: {succeeded}/{len(targets)} succeeded.")
+    await report_status_to_laravel(log_id, final_status, json.dumps(summary, indent=2))
+    return final_status
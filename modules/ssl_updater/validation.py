@@ -0,0 +1,359 @@
+# modules/ssl_updater/validation.py
+"""
+Validasi bundle sertifikat secara lokal (offline), SEBELUM membuka koneksi SSH.
+Bundle yang rusak (key tidak cocok, chain salah urutan / tidak lengkap, sertifikat kedaluwarsa,
+domain tidak tercakup SAN) gagal dalam hitungan milidetik tanpa memakai kapasitas SSH,
+dan tanpa sempat membuat web server gagal reload.
+
+Hasil di-cache per fingerprint bundle (SHA-256 cert + key + chain + domain), sehingga batch rollout
+ke ratusan server hanya memvalidasi satu kali. Material key tidak ikut disimpan di cache.
+"""
+import hashlib
+import logging
+import os
+import ssl
+import threading
+import time
+import warnings
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+from cryptography import x509
+from cryptography.exceptions import InvalidSignature, UnsupportedAlgorithm
+from cryptography.utils import CryptographyDeprecationWarning
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.x509.oid import ExtensionOID
+
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class BundleValidation:
+    errors: List[str] = field(default_factory=list)    # Bundle ditolak jika ada error
+    warnings: List[str] = field(default_factory=list)  # Dicatat ke log deploy, deploy tetap jalan
+    subject: Optional[str] = None
+    not_after: Optional[datetime] = None
+    checked_at: float = field(default_factory=time.time)
+
+    @property
+    def ok(self) -> bool:
+        return not self.errors
+
+
+# --- Trust store (untuk memastikan chain berakhir di root yang dikenal) ---
+_PEM_BEGIN = b"-----BEGIN CERTIFICATE-----"
+_PEM_END = b"-----END CERTIFICATE-----"
+
+
+@lru_cache(maxsize=4)
+def _trust_store(path: Optional[str]) -> Dict[x509.Name, List[x509.Certificate]]:
+    """Root CA per subject. Default: bundle certifi (ikut terpasang bersama httpx), lalu CA file sistem."""
+    if not path:
+        try:
+            import certifi
+            path = certifi.where()
+        except ImportError:
+            path = ssl.get_default_verify_paths().cafile
+    roots: Dict[x509.Name, List[x509.Certificate]] = {}
+    if path and os.path.exists(path):
+        with open(path, "rb") as f:
+            blocks = f.read().split(_PEM_END)
+        # Per sertifikat: satu root lama yang tidak lagi bisa di-parse tidak menggagalkan seluruh trust store
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", CryptographyDeprecationWarning)
+            for block in blocks:
+                if _PEM_BEGIN not in block:
+                    continue
+                try:
+                    cert = x509.load_pem_x509_certificate(block + _PEM_END)
+                except ValueError:
+                    continue
+                roots.setdefault(cert.subject, []).append(cert)
+    else:
+        logger.warning(f"SSL trust store not found ({path}). Chain completeness cannot be checked.")
+    return roots
+
+
+def _issued_by(cert: x509.Certificate, issuer: x509.Certificate) -> bool:
+    if cert.issuer != issuer.subject:
+        return False
+    try:
+        cert.verify_directly_issued_by(issuer)
+        return True
+    except (InvalidSignature, ValueError, TypeError):
+        return False
+
+
+def _is_self_signed(cert: x509.Certificate) -> bool:
+    return _issued_by(cert, cert)
+
+
+def _public_key_der(cert: x509.Certificate) -> bytes:
+    return cert.public_key().public_bytes(serialization.Encoding.DER, serialization.PublicFormat.SubjectPublicKeyInfo)
+
+
+def _is_anchor(cert: x509.Certificate, roots: Dict[x509.Name, List[x509.Certificate]]) -> bool:
+    """
+    Sertifikat adalah trust anchor jika subject + public key-nya sama dengan root tepercaya, walau
+    sertifikatnya sendiri versi cross-signed (misal ISRG Root X1 yang ditandatangani DST Root CA X3).
+    """
+    candidates = roots.get(cert.subject, [])
+    return bool(candidates) and any(_public_key_der(root) == _public_key_der(cert) for root in candidates)
+
+
+def _is_ca(cert: x509.Certificate) -> bool:
+    try:
+        return cert.extensions.get_extension_for_oid(ExtensionOID.BASIC_CONSTRAINTS).value.ca
+    except x509.ExtensionNotFound:
+        return False
+
+
+def _describe(cert: x509.Certificate) -> str:
+    return cert.subject.rfc4514_string() or "<empty subject>"
+
+
+def _load_certificates(content: str, label: str, errors: List[str]) -> List[x509.Certificate]:
+    try:
+        return x509.load_pem_x509_certificates(content.encode("utf-8"))
+    except ValueError as e:
+        errors.append(f"{label} is not a valid PEM certificate: {e}")
+        return []
+
+
+def leaf_fingerprint(cert_content: Optional[str]) -> Optional[str]:
+    """SHA-256 (hex) sertifikat pertama di cert_content, atau None jika tidak bisa dibaca."""
+    try:
+        certs = x509.load_pem_x509_certificates((cert_content or "").encode("utf-8"))
+    except ValueError:
+        return None
+    return certs[0].fingerprint(hashes.SHA256()).hex()
+
+
+# --- Pemeriksaan ---
+def _check_key(leaf: x509.Certificate, key_content: str, result: BundleValidation):
+    try:
+        key = serialization.load_pem_private_key(key_content.encode("utf-8"), password=None)
+    except TypeError:
+        result.errors.append("Private key is encrypted with a passphrase; the web server cannot load it unattended.")
+        return
+    except (ValueError, UnsupportedAlgorithm) as e:
+        result.errors.append(f"Private key is not a valid PEM key: {e}")
+        return
+    spki = serialization.PublicFormat.SubjectPublicKeyInfo
+    if key.public_key().public_bytes(serialization.Encoding.DER, spki) != \
+            leaf.public_key().public_bytes(serialization.Encoding.DER, spki):
+        result.errors.append(f"Private key does not match certificate {_describe(leaf)}.")
+
+
+def _check_chain(chain: List[x509.Certificate], result: BundleValidation, trust_store: Optional[str],
+                 strict: bool):
+    """
+    chain[0] = leaf; setiap sertifikat berikutnya harus penerbit sertifikat sebelumnya.
+    Chain dianggap lengkap begitu salah satu sertifikatnya adalah trust anchor, atau diterbitkan root tepercaya.
+    Root yang tidak dikenal hanya error jika `strict` (SSL_TRUST_STORE diset eksplisit);
+    selain itu cukup warning, karena CA internal memang tidak ada di certifi.
+    """
+    for index in range(len(chain) - 1):
+        if not _issued_by(chain[index], chain[index + 1]):
+            issuer = next((c for c in chain if _issued_by(chain[index], c)), None)
+            if issuer is not None:
+                result.errors.append(
+                    f"Chain is out of order: certificate #{index + 2} ({_describe(chain[index + 1])}) is not the "
+                    f"issuer of #{index + 1} ({_describe(chain[index])}); its issuer appears later in the bundle."
+                )
+            else:
+                result.errors.append(
+                    f"Chain is broken: certificate #{index + 2} ({_describe(chain[index + 1])}) did not issue "
+                    f"#{index + 1} ({_describe(chain[index])})."
+                )
+            return
+
+    last = chain[-1]
+    if _is_self_signed(last):
+        if len(chain) == 1:
+            result.warnings.append(f"Certificate {_describe(last)} is self-signed.")
+        return
+    roots = _trust_store(trust_store)
+    if not roots:
+        return
+    if any(_is_anchor(cert, roots) for cert in chain):
+        return
+    if any(_issued_by(last, root) for root in roots.get(last.issuer, [])):
+        return
+    if strict:
+        result.errors.append(
+            f"Chain is incomplete: issuer {last.issuer.rfc4514_string()} of {_describe(last)} is neither in the "
+            f"bundle nor a trusted root. Add the missing intermediate certificate(s)."
+        )
+    else:
+        result.warnings.append(
+            f"Issuer {last.issuer.rfc4514_string()} of {_describe(last)} is not a known root; "
+            f"chain completeness was not verified (set SSL_TRUST_STORE for internal CAs)."
+        )
+
+
+def _check_validity(chain: List[x509.Certificate], result: BundleValidation, now: datetime, warning_days: float):
+    for index, cert in enumerate(chain):
+        label = "Certificate" if index == 0 else f"Chain certificate #{index + 1}"
+        if cert.not_valid_after_utc <= now:
+            result.errors.append(f"{label} {_describe(cert)} expired on {cert.not_valid_after_utc.isoformat()}.")
+        elif cert.not_valid_before_utc > now:
+            result.errors.append(f"{label} {_describe(cert)} is not valid before {cert.not_valid_before_utc.isoformat()}.")
+        elif cert.not_valid_after_utc - now < timedelta(days=warning_days):
+            result.warnings.append(f"{label} {_describe(cert)} expires soon ({cert.not_valid_after_utc.isoformat()}).")
+
+
+def _san_matches(pattern: str, domain: str) -> bool:
+    pattern, domain = pattern.lower().rstrip("."), domain.lower().rstrip(".")
+    if pattern == domain:
+        return True
+    # Wildcard SAN hanya mencakup satu label paling kiri: *.example.com -> a.example.com
+    if pattern.startswith("*.") and not domain.startswith("*."):
+        host, _, parent = domain.partition(".")
+        return bool(host) and parent == pattern[2:]
+    return False
+
+
+def _check_domain(leaf: x509.Certificate, domain_name: str, result: BundleValidation):
+    try:
+        san = leaf.extensions.get_extension_for_oid(ExtensionOID.SUBJECT_ALTERNATIVE_NAME).value
+    except x509.ExtensionNotFound:
+        result.errors.append(f"Certificate {_describe(leaf)} has no Subject Alternative Name; "
+                             f"browsers will reject it for {domain_name}.")
+        return
+    names = san.get_values_for_type(x509.DNSName)
+    if not any(_san_matches(name, domain_name) for name in names):
+        result.errors.append(f"Certificate does not cover {domain_name} (SAN: {', '.join(names) or '-'}).")
+
+
+def validate_bundle(cert_content: Optional[str], key_content: Optional[str] = None,
+                    chain_content: Optional[str] = None, domain_name: Optional[str] = None,
+                    now: Optional[datetime] = None, trust_store: Optional[str] = None,
+                    expiry_warning_days: float = 14.0) -> BundleValidation:
+    """
+    Validasi tanpa cache. Hanya bagian bundle yang dikirim yang diperiksa
+    (misal deploy key saja tidak bisa dicocokkan dengan sertifikat).
+    """
+    result = BundleValidation()
+    now = now or datetime.now(timezone.utc)
+    if not cert_content:
+        if key_content:
+            result.warnings.append("No certificate in payload; private key was not checked against it.")
+        return result
+
+    certs = _load_certificates(cert_content, "Certificate", result.errors)
+    if not certs:
+        if not result.errors:
+            result.errors.append("Certificate content contains no PEM certificate.")
+        return result
+    # Sertifikat server harus paling depan; jika tidak, web server memasangkan key dengan sertifikat CA
+    leaf_index = next((i for i, cert in enumerate(certs) if not _is_ca(cert)), 0)
+    leaf = certs[leaf_index]
+    if leaf_index:
+        result.errors.append(f"Chain is out of order: server certificate {_describe(leaf)} is #{leaf_index + 1} "
+                             f"in the certificate file but must come first.")
+    result.subject = _describe(leaf)
+    result.not_after = leaf.not_valid_after_utc
+
+    # Cert file boleh berisi fullchain; chain terpisah digabung di belakangnya (duplikat diabaikan)
+    chain = list(certs)
+    if chain_content:
+        seen = {c.fingerprint(hashes.SHA256()) for c in chain}
+        for cert in _load_certificates(chain_content, "Chain", result.errors):
+            fingerprint = cert.fingerprint(hashes.SHA256())
+            if fingerprint not in seen:
+                seen.add(fingerprint)
+                chain.append(cert)
+
+    if key_content:
+        _check_key(leaf, key_content, result)
+    if not leaf_index:
+        _check_chain(chain, result, trust_store, strict=bool(trust_store))
+    _check_validity(chain, result, now, expiry_warning_days)
+    if domain_name:
+        _check_domain(leaf, domain_name, result)
+    return result
+
+
+class BundleValidator:
+    """Cache hasil validate_bundle per fingerprint bundle (LRU, dengan TTL karena expiry bergantung waktu)."""
+
+    def __init__(self, max_items: int = 256, ttl: float = 3600.0, trust_store: Optional[str] = None,
+                 expiry_warning_days: float = 14.0):
+        self.max_items = max_items
+        self.ttl = ttl
+        self.trust_store = trust_store
+        self.expiry_warning_days = expiry_warning_days
+        self._cache: "OrderedDict[str, BundleValidation]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._pending: Dict[str, threading.Lock] = {}  # Satu validasi per bundle walau dipanggil paralel
+
+    @classmethod
+    def from_settings(cls) -> "BundleValidator":
+        return cls(
+            max_items=settings.SSL_VALIDATION_CACHE_ITEMS,
+            ttl=settings.SSL_VALIDATION_CACHE_TTL,
+            trust_store=settings.SSL_TRUST_STORE,
+            expiry_warning_days=settings.SSL_EXPIRY_WARNING_DAYS,
+        )
+
+    @staticmethod
+    def fingerprint(cert_content: Optional[str], key_content: Optional[str], chain_content: Optional[str],
+                    domain_name: Optional[str]) -> str:
+        digest = hashlib.sha256()
+        for part in (cert_content, key_content, chain_content, domain_name):
+            encoded = (part or "").encode("utf-8")
+            digest.update(len(encoded).to_bytes(8, "big"))
+            digest.update(encoded)
+        return digest.hexdigest()
+
+    def validate(self, cert_content: Optional[str], key_content: Optional[str] = None,
+                 chain_content: Optional[str] = None, domain_name: Optional[str] = None) -> Tuple[BundleValidation, bool]:
+        """Return (hasil, dari_cache). Thread-safe; dipanggil via asyncio.to_thread."""
+        key = self.fingerprint(cert_content, key_content, chain_content, domain_name)
+        cached = self._cached(key)
+        if cached is not None:
+            return cached, True
+
+        # Target batch yang datang bersamaan menunggu validasi pertama, bukan ikut memvalidasi
+        with self._lock:
+            pending = self._pending.setdefault(key, threading.Lock())
+        try:
+            with pending:
+                cached = self._cached(key)
+                if cached is not None:
+                    return cached, True
+                result = validate_bundle(cert_content, key_content, chain_content, domain_name,
+                                         trust_store=self.trust_store, expiry_warning_days=self.expiry_warning_days)
+                with self._lock:
+                    self._cache[key] = result
+                    self._cache.move_to_end(key)
+                    while len(self._cache) > self.max_items:
+                        self._cache.popitem(last=False)
+                return result, False
+        finally:
+            with self._lock:
+                self._pending.pop(key, None)
+
+    def _cached(self, key: str) -> Optional[BundleValidation]:
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None and time.time() - cached.checked_at < self.ttl:
+                self._cache.move_to_end(key)
+                return cached
+        return None
+
+
+_validator: Optional[BundleValidator] = None
+
+
+def get_bundle_validator() -> BundleValidator:
+    global _validator
+    if _validator is None:
+        _validator = BundleValidator.from_settings()
+    return _validator
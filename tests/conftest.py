@@ -0,0 +1,10 @@
+# tests/conftest.py
+import base64
+import os
+import sys
+
+# core.config wajib punya key + URL webhook; nilai dummy cukup untuk test (tidak ada request keluar)
+os.environ.setdefault("TIARA_SYNC_KEY", "base64:" + base64.b64encode(b"0" * 32).decode())
+os.environ.setdefault("TIARA_WEBHOOK_URL", "http://127.0.0.1:9/hook")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
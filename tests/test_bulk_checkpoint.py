@@ -0,0 +1,56 @@
+# tests/test_bulk_checkpoint.py
+import pytest
+
+from modules.deployment_parser.bulk import BulkCheckpoint
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "bulk.sqlite3")
+
+
+def test_resume_skips_reported_documents_but_retries_failed_ones(db_path):
+    checkpoint = BulkCheckpoint(db_path)
+    checkpoint.record("bulk-1", 0, [
+        {"key": "zip:a.pdf", "doc_hash": "h-a", "status": "parsed"},
+        {"key": "zip:b.pdf", "doc_hash": "h-b", "status": "skipped"},
+    ])
+    checkpoint.record("bulk-1", 1, [
+        {"key": "zip:c.pdf", "doc_hash": None, "status": "failed"},
+    ])
+    checkpoint.close()
+
+    # Proses baru (engine restart) membaca checkpoint yang sama
+    resumed = BulkCheckpoint(db_path)
+    try:
+        done, next_chunk = resumed.load("bulk-1")
+        assert done == {"zip:a.pdf": ("h-a", "parsed"), "zip:b.pdf": ("h-b", "skipped")}
+        assert next_chunk == 2
+        assert resumed.load("bulk-2") == ({}, 0)
+    finally:
+        resumed.close()
+
+
+def test_retried_document_replaces_failed_entry(db_path):
+    checkpoint = BulkCheckpoint(db_path)
+    try:
+        checkpoint.record("bulk-1", 0, [{"key": "url:x", "doc_hash": None, "status": "failed"}])
+        checkpoint.record("bulk-1", 1, [{"key": "url:x", "doc_hash": "h-x", "status": "parsed"}])
+        assert checkpoint.load("bulk-1") == ({"url:x": ("h-x", "parsed")}, 2)
+
+        checkpoint.clear("bulk-1")
+        assert checkpoint.load("bulk-1") == ({}, 0)
+    finally:
+        checkpoint.close()
+
+
+def test_abandoned_bulks_expire_after_retention(db_path):
+    checkpoint = BulkCheckpoint(db_path)
+    checkpoint.record("old", 0, [{"key": "file:a.pdf", "doc_hash": "h", "status": "parsed"}])
+    checkpoint.close()
+
+    expired = BulkCheckpoint(db_path, retention_days=-1)
+    try:
+        assert expired.load("old") == ({}, 0)
+    finally:
+        expired.close()
@@ -0,0 +1,82 @@
+# tests/test_job_queue.py
+import time
+
+import pytest
+
+from core.job_queue import DEAD_LETTER, LEASED, READY, JobQueue
+
+
+@pytest.fixture
+def queue(tmp_path):
+    queue = JobQueue(str(tmp_path / "jobs.sqlite3"), max_attempts=2, retry_backoff=0.0)
+    yield queue
+    queue.close()
+
+
+def _status(queue: JobQueue, job_id: str) -> str:
+    return next(job.status for job in queue._select("job_id = ?", (job_id,)))
+
+
+def test_expired_lease_is_redelivered_to_another_worker(queue):
+    job = queue.enqueue("ssl_deploy", "payload", "task-1")
+    [first] = queue.lease("worker-a", "ssl_deploy", 10, visibility_timeout=0.01)
+    assert queue.lease("worker-b", "ssl_deploy", 10, visibility_timeout=60) == []
+
+    time.sleep(0.05)
+    [second] = queue.lease("worker-b", "ssl_deploy", 10, visibility_timeout=60)
+    assert second.job_id == job.job_id
+    assert second.lease_owner == "worker-b"
+    assert second.attempts == 2
+
+    # Worker lama tidak bisa memperpanjang atau meng-ack lease yang sudah diambil alih
+    assert not queue.extend(first, "worker-a", 60)
+    queue.ack(first, "worker-a")
+    assert _status(queue, job.job_id) == LEASED
+    queue.ack(second, "worker-b")
+    assert queue.counts() == {}
+
+
+def test_nack_retries_then_dead_letters(queue):
+    job = queue.enqueue("deployment_parse", "payload")
+
+    [leased] = queue.lease("worker-a", "deployment_parse", 1, visibility_timeout=60)
+    assert queue.nack(leased, "worker-a", "RuntimeError: boom")
+    assert _status(queue, job.job_id) == READY
+
+    [leased] = queue.lease("worker-a", "deployment_parse", 1, visibility_timeout=60)
+    assert leased.attempts == 2
+    assert not queue.nack(leased, "worker-a", "RuntimeError: boom again")
+
+    [dead] = queue.dead_letters()
+    assert dead.job_id == job.job_id
+    assert dead.status == DEAD_LETTER
+    assert dead.last_error == "RuntimeError: boom again"
+    assert queue.lease("worker-a", "deployment_parse", 1, visibility_timeout=60) == []
+
+    assert queue.requeue(job.job_id)
+    [again] = queue.lease("worker-a", "deployment_parse", 1, visibility_timeout=60)
+    assert again.attempts == 1
+
+
+def test_expired_lease_without_attempts_left_is_reaped(tmp_path):
+    queue = JobQueue(str(tmp_path / "jobs.sqlite3"), max_attempts=1)
+    try:
+        job = queue.enqueue("ssl_deploy", "payload")
+        queue.lease("worker-a", "ssl_deploy", 1, visibility_timeout=0.01)
+        time.sleep(0.05)
+
+        assert queue.lease("worker-b", "ssl_deploy", 1, visibility_timeout=60) == []
+        [reaped] = queue.reap_expired()
+        assert reaped.job_id == job.job_id
+        assert _status(queue, job.job_id) == DEAD_LETTER
+    finally:
+        queue.close()
+
+
+def test_release_does_not_count_an_attempt(queue):
+    job = queue.enqueue("ssl_deploy", "payload")
+    [leased] = queue.lease("worker-a", "ssl_deploy", 1, visibility_timeout=60)
+    queue.release(leased, "worker-a")
+    [again] = queue.lease("worker-b", "ssl_deploy", 1, visibility_timeout=60)
+    assert again.job_id == job.job_id
+    assert again.attempts == 1
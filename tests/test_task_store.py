@@ -0,0 +1,76 @@
+# tests/test_task_store.py
+import asyncio
+
+import pytest
+
+from core.task_store import TaskStore
+
+
+@pytest.fixture
+def stores(tmp_path):
+    # Dua worker uvicorn yang berbagi file task store (mode antrian durable)
+    path = str(tmp_path / "tasks.sqlite3")
+    first, second = TaskStore(path, shared=True), TaskStore(path, shared=True)
+    yield first, second
+    first.close()
+    second.close()
+
+
+def test_claim_is_deduplicated_across_store_instances(stores):
+    first, second = stores
+    payload = {"task": "ssl_deploy", "log_id": 7, "data": {}}
+
+    async def scenario():
+        record, created = await first.claim(payload)
+        duplicate, duplicate_created = await second.claim(payload)
+        return record, created, duplicate, duplicate_created
+
+    record, created, duplicate, duplicate_created = asyncio.run(scenario())
+    assert created and not duplicate_created
+    assert duplicate.task_id == record.task_id
+    assert first.get(record.task_id).duplicates == 1
+
+
+def test_concurrent_claims_create_one_task(stores):
+    first, second = stores
+    payloads = [{"task": "deployment_parse", "log_id": log_id, "data": {}} for log_id in range(20)]
+
+    async def scenario():
+        return await asyncio.gather(first.claim_many(payloads), second.claim_many(payloads))
+
+    a, b = asyncio.run(scenario())
+    for (record_a, created_a), (record_b, created_b) in zip(a, b):
+        assert created_a != created_b
+        assert record_a.task_id == record_b.task_id
+
+
+def test_only_successful_tasks_absorb_retries(stores):
+    first, second = stores
+
+    async def scenario():
+        failed, _ = await first.claim({"task": "ssl_deploy", "log_id": 1})
+        await first.mark_finished(failed, "FAILED")
+        _, retried = await second.claim({"task": "ssl_deploy", "log_id": 1})
+
+        succeeded, _ = await first.claim({"task": "ssl_deploy", "log_id": 2})
+        await first.mark_finished(succeeded, "SUCCESS")
+        _, resent = await second.claim({"task": "ssl_deploy", "log_id": 2})
+        return retried, resent
+
+    retried, resent = asyncio.run(scenario())
+    assert retried
+    assert not resent
+
+
+def test_released_claim_does_not_block_retry(stores):
+    first, second = stores
+    payload = {"task": "ssl_deploy", "log_id": 3}
+
+    async def scenario():
+        record, _ = await first.claim(payload)
+        await first.release(record)
+        return await second.claim(payload)
+
+    record, created = asyncio.run(scenario())
+    assert created
+    assert first.get(record.task_id) is not None
@@ -0,0 +1,111 @@
+# tests/test_validation.py
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+from cryptography.x509.oid import NameOID
+
+from modules.ssl_updater.validation import validate_bundle
+
+NOW = datetime.now(timezone.utc)
+DOMAIN = "www.example.com"
+
+
+def _make(cn, issuer=None, issuer_key=None, ca=False, key=None):
+    key = key or ec.generate_private_key(ec.SECP256R1())
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, cn)])
+    builder = (
+        x509.CertificateBuilder()
+        .subject_name(name)
+        .issuer_name(issuer.subject if issuer else name)
+        .public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(NOW - timedelta(days=1))
+        .not_valid_after(NOW + timedelta(days=365))
+        .add_extension(x509.BasicConstraints(ca=ca, path_length=None), critical=True)
+    )
+    if not ca:
+        builder = builder.add_extension(x509.SubjectAlternativeName([x509.DNSName(DOMAIN)]), critical=False)
+    return builder.sign(issuer_key or key, hashes.SHA256()), key
+
+
+def _pem(*certs) -> str:
+    return "".join(cert.public_bytes(serialization.Encoding.PEM).decode() for cert in certs)
+
+
+def _key_pem(key) -> str:
+    return key.private_bytes(serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8,
+                             serialization.NoEncryption()).decode()
+
+
+@pytest.fixture(scope="module")
+def pki():
+    root, root_key = _make("Test Root", ca=True)
+    inter, inter_key = _make("Test Intermediate", root, root_key, ca=True)
+    leaf, leaf_key = _make(DOMAIN, inter, inter_key)
+    return {"root": root, "inter": inter, "inter_key": inter_key, "leaf": leaf, "leaf_key": leaf_key}
+
+
+@pytest.fixture
+def trust_store(tmp_path, pki):
+    path = tmp_path / "roots.pem"
+    path.write_text(_pem(pki["root"]))
+    return str(path)
+
+
+def _validate(pki, cert, chain=None, trust_store=None):
+    return validate_bundle(cert, _key_pem(pki["leaf_key"]), chain, DOMAIN, trust_store=trust_store)
+
+
+def test_complete_chain_to_trusted_root(pki, trust_store):
+    fullchain = _validate(pki, _pem(pki["leaf"], pki["inter"]), trust_store=trust_store)
+    split = _validate(pki, _pem(pki["leaf"]), _pem(pki["inter"]), trust_store=trust_store)
+    with_root = _validate(pki, _pem(pki["leaf"]), _pem(pki["inter"], pki["root"]), trust_store=trust_store)
+    for result in (fullchain, split, with_root):
+        assert result.ok, result.errors
+        assert not result.warnings
+
+
+def test_missing_intermediate_fails_with_trust_store(pki, trust_store):
+    result = _validate(pki, _pem(pki["leaf"]), trust_store=trust_store)
+    assert not result.ok
+    assert any("Chain is incomplete" in error for error in result.errors)
+
+
+def test_unknown_root_without_trust_store_is_only_a_warning(pki):
+    # Default certifi: root uji tidak dikenal, tapi tanpa SSL_TRUST_STORE itu bukan alasan menolak deploy
+    result = _validate(pki, _pem(pki["leaf"], pki["inter"]))
+    assert result.ok, result.errors
+    assert any("not a known root" in warning for warning in result.warnings)
+
+
+def test_out_of_order_chain(pki, trust_store):
+    result = _validate(pki, _pem(pki["leaf"]), _pem(pki["root"], pki["inter"]), trust_store=trust_store)
+    assert any("out of order" in error for error in result.errors)
+
+    result = _validate(pki, _pem(pki["inter"], pki["leaf"]), trust_store=trust_store)
+    assert any("must come first" in error for error in result.errors)
+
+
+def test_broken_chain(pki, trust_store):
+    other_root, other_key = _make("Other Root", ca=True)
+    stranger, _ = _make("Other Intermediate", other_root, other_key, ca=True)
+    result = _validate(pki, _pem(pki["leaf"]), _pem(stranger), trust_store=trust_store)
+    assert any("Chain is broken" in error for error in result.errors)
+
+
+def test_cross_signed_root_is_accepted_as_anchor(tmp_path):
+    # Root baru juga diterbitkan silang oleh root lama; bundle membawa versi cross-signed-nya
+    new_root_key = ec.generate_private_key(ec.SECP256R1())
+    new_root, _ = _make("New Root", ca=True, key=new_root_key)
+    old_root, old_root_key = _make("Old Root", ca=True)
+    cross, _ = _make("New Root", old_root, old_root_key, ca=True, key=new_root_key)
+    inter, inter_key = _make("New Intermediate", new_root, new_root_key, ca=True)
+    leaf, leaf_key = _make(DOMAIN, inter, inter_key)
+    path = tmp_path / "new-root.pem"
+    path.write_text(_pem(new_root))
+
+    result = validate_bundle(_pem(leaf), _key_pem(leaf_key), _pem(inter, cross), DOMAIN, trust_store=str(path))
+    assert result.ok, result.errors